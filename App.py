@@ -1,15 +1,50 @@
 # app.py - Complete Employee Idea Management System
+import time
+_SCRIPT_START = time.perf_counter()
+
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 import pandas as pd
-#import plotly.express as px
-#import plotly.graph_objects as go
 from datetime import datetime, timedelta
+from collections import deque
 import os
 from pathlib import Path
-import requests
+import importlib
+import threading
 import json
-from io import BytesIO
 import hashlib
+import analytics
+import comments
+import exports
+import gamification
+import perf
+import ratelimit
+import queries
+from tags import TagIndex, normalize_tags, format_tags
+from history import quarter_bounds
+from store import IdeaStore
+from compute import ComputeService
+from notify import Notifier
+from recommend import Recommender
+from trending import TrendingScores
+from viewcache import ViewCache, view_key
+from queries import hash_password
+
+class LazyModule:
+    """Import a heavy module the first time one of its attributes is used"""
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(importlib.import_module(self._name), attr)
+
+# Heavy modules are only imported when their feature is first used
+# (openpyxl is already loaded lazily by pandas' Excel writer)
+px = LazyModule("plotly.express")
+go = LazyModule("plotly.graph_objects")
+requests = LazyModule("requests")
+Image = LazyModule("PIL.Image")
 
 # Page config
 st.set_page_config(
@@ -20,7 +55,7 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
+APP_CSS = """
     <style>
     .main {
         padding: 1rem 2rem;
@@ -76,17 +111,18 @@ st.markdown("""
         margin: 8px 0;
     }
     </style>
-""", unsafe_allow_html=True)
+"""
+
+@st.cache_resource(show_spinner=False)
+def get_css():
+    """Minify the stylesheet once per process"""
+    return "\n".join(line.strip() for line in APP_CSS.splitlines() if line.strip())
+
+st.markdown(get_css(), unsafe_allow_html=True)
 
 # Initialize session state
 if 'current_user' not in st.session_state:
     st.session_state.current_user = None
-if 'ideas_df' not in st.session_state:
-    st.session_state.ideas_df = pd.DataFrame()
-if 'users_df' not in st.session_state:
-    st.session_state.users_df = pd.DataFrame()
-if 'comments_df' not in st.session_state:
-    st.session_state.comments_df = pd.DataFrame()
 
 # AI API Configuration
 LLM_ENDPOINT = "https://llm.blackbox.ai/chat/completions"
@@ -97,226 +133,399 @@ LLM_HEADERS = {
 }
 MODEL_NAME = "openrouter/claude-sonnet-4"
 
+# Dashboard "Trending Tags" window
+TRENDING_TAG_DAYS = 30
+
+# How often live fragments check the store for changes made by other sessions
+LIVE_UPDATE_SECONDS = 3
+# Database the store persists to unless IDEAS_DB says otherwise
+DEFAULT_DB = "ideas.db"
+# Rate-limited actions (see ratelimit.py) as worded in warnings and admin reports
+THROTTLED_ACTIONS = {'upvote': "upvoting", 'comment': "commenting", 'like': "liking comments",
+                     'submit': "submitting ideas"}
+# Ideas the Trending sort orders by score (the rest follow newest first)
+TRENDING_BROWSE_K = 100
+
+# Static assets (served from ./static, see .streamlit/config.toml)
+STATIC_DIR = Path(__file__).parent / "static"
+IMAGE_ASSETS = {
+    'sidebar_logo': {
+        'url': "https://storage.googleapis.com/workspace-0f70711f-8b4e-4d94-86f1-2a93ccde5887/image/f235bec8-f887-4b36-90ac-79a4c25cd446.png",
+        'width': 320
+    },
+    'landing_hero': {
+        'url': "https://storage.googleapis.com/workspace-0f70711f-8b4e-4d94-86f1-2a93ccde5887/image/c9c387f8-f61e-4b6e-8ce4-739515e0038f.png",
+        'width': 480
+    }
+}
+
 # Helper Functions
-def init_data():
-    """Initialize data structures"""
-    if st.session_state.users_df.empty:
-        st.session_state.users_df = pd.DataFrame([
-            {
-                'username': 'admin',
-                'password': hashlib.sha256('admin123'.encode()).hexdigest(),
-                'email': 'admin@company.com',
-                'department': 'IT',
-                'role': 'Admin',
-                'join_date': datetime.now().strftime('%Y-%m-%d'),
-                'points': 0,
-                'level': 1,
-                'ideas_submitted': 0,
-                'ideas_approved': 0
-            },
-            {
-                'username': 'john_doe',
-                'password': hashlib.sha256('demo123'.encode()).hexdigest(),
-                'email': 'john@company.com',
-                'department': 'Product',
-                'role': 'Employee',
-                'join_date': datetime.now().strftime('%Y-%m-%d'),
-                'points': 0,
-                'level': 1,
-                'ideas_submitted': 0,
-                'ideas_approved': 0
-            },
-            {
-                'username': 'jane_smith',
-                'password': hashlib.sha256('demo123'.encode()).hexdigest(),
-                'email': 'jane@company.com',
-                'department': 'Marketing',
-                'role': 'Employee',
-                'join_date': datetime.now().strftime('%Y-%m-%d'),
-                'points': 250,
-                'level': 2,
-                'ideas_submitted': 3,
-                'ideas_approved': 1
-            }
-        ])
+@st.cache_resource(show_spinner=False)
+def load_seed_data():
+    """Build the sample tables once per process"""
+    # Load-testing mode: IDEAS_SYNTHETIC="users,ideas,comments"
+    if os.environ.get('IDEAS_SYNTHETIC'):
+        import synthetic
+        return synthetic.generate_data(*synthetic.parse_scale(os.environ['IDEAS_SYNTHETIC']))
+    
+    users_df = pd.DataFrame([
+        {
+            'username': 'admin',
+            'password': hash_password('admin123'),
+            'email': 'admin@company.com',
+            'department': 'IT',
+            'role': 'Admin',
+            'join_date': datetime.now().strftime('%Y-%m-%d'),
+            'points': 0,
+            'level': 1,
+            'ideas_submitted': 0,
+            'ideas_approved': 0
+        },
+        {
+            'username': 'john_doe',
+            'password': hash_password('demo123'),
+            'email': 'john@company.com',
+            'department': 'Product',
+            'role': 'Employee',
+            'join_date': datetime.now().strftime('%Y-%m-%d'),
+            'points': 0,
+            'level': 1,
+            'ideas_submitted': 0,
+            'ideas_approved': 0
+        },
+        {
+            'username': 'jane_smith',
+            'password': hash_password('demo123'),
+            'email': 'jane@company.com',
+            'department': 'Marketing',
+            'role': 'Employee',
+            'join_date': datetime.now().strftime('%Y-%m-%d'),
+            'points': 250,
+            'level': 2,
+            'ideas_submitted': 3,
+            'ideas_approved': 1
+        }
+    ])
     
-    if st.session_state.ideas_df.empty:
-        # Create sample ideas
-        sample_ideas = [
-            {
-                'id': 1,
-                'title': 'AI-Powered Customer Support Chatbot',
-                'description': 'Implement an intelligent chatbot to handle common customer queries 24/7, reducing response time and support costs.',
-                'category': 'Technology',
-                'problem': 'Customer support team is overwhelmed with repetitive questions, leading to slow response times.',
-                'solution': 'Deploy an AI chatbot trained on our FAQ and historical support tickets to answer common questions instantly.',
-                'benefits': 'Reduce support costs by 40%, improve response time from hours to seconds, increase customer satisfaction.',
-                'resources': '2 developers for 3 months, $50K budget for AI platform',
-                'submitter': 'john_doe',
-                'submit_date': (datetime.now() - timedelta(days=15)).strftime('%Y-%m-%d'),
-                'status': 'Approved',
-                'upvotes': 23,
-                'comments_count': 5,
-                'impact_score': 9,
-                'feasibility_score': 7,
-                'innovation_score': 8,
-                'strategic_score': 9,
-                'total_score': 33,
-                'tags': 'AI, automation, customer service',
-                'cost_savings': 120000,
-                'revenue_impact': 0
-            },
-            {
-                'id': 2,
-                'title': 'Employee Wellness Program',
-                'description': 'Launch a comprehensive wellness program including gym memberships, mental health support, and healthy snacks.',
-                'category': 'Process',
-                'problem': 'Employee burnout and health issues leading to increased sick days and turnover.',
-                'solution': 'Partner with local gyms, provide mental health counseling, stock office with healthy snacks.',
-                'benefits': 'Reduce sick days by 25%, improve employee satisfaction, lower healthcare costs.',
-                'resources': '$100K annual budget, HR coordinator',
-                'submitter': 'jane_smith',
-                'submit_date': (datetime.now() - timedelta(days=10)).strftime('%Y-%m-%d'),
-                'status': 'Under Review',
-                'upvotes': 18,
-                'comments_count': 3,
-                'impact_score': 7,
-                'feasibility_score': 8,
-                'innovation_score': 5,
-                'strategic_score': 8,
-                'total_score': 28,
-                'tags': 'wellness, culture, retention',
-                'cost_savings': 50000,
-                'revenue_impact': 0
-            },
-            {
-                'id': 3,
-                'title': 'Mobile App for Product Ordering',
-                'description': 'Develop a mobile app to allow customers to browse and order products on-the-go.',
-                'category': 'Product',
-                'problem': 'Customers want to shop from mobile devices but our website is not mobile-optimized.',
-                'solution': 'Build native iOS and Android apps with seamless ordering experience.',
-                'benefits': 'Increase mobile sales by 60%, improve customer retention, expand market reach.',
-                'resources': '3 developers for 6 months, $150K budget',
-                'submitter': 'john_doe',
-                'submit_date': (datetime.now() - timedelta(days=5)).strftime('%Y-%m-%d'),
-                'status': 'New',
-                'upvotes': 12,
-                'comments_count': 2,
-                'impact_score': 0,
-                'feasibility_score': 0,
-                'innovation_score': 0,
-                'strategic_score': 0,
-                'total_score': 0,
-                'tags': 'mobile, app, ecommerce',
-                'cost_savings': 0,
-                'revenue_impact': 300000
-            },
-            {
-                'id': 4,
-                'title': 'Green Office Initiative',
-                'description': 'Implement eco-friendly practices including solar panels, recycling programs, and paperless workflows.',
-                'category': 'Sustainability',
-                'problem': 'High energy costs and environmental impact from office operations.',
-                'solution': 'Install solar panels, set up comprehensive recycling, digitize all documents.',
-                'benefits': 'Reduce energy costs by 30%, improve brand reputation, meet sustainability goals.',
-                'resources': '$200K upfront investment, facilities team',
-                'submitter': 'jane_smith',
-                'submit_date': (datetime.now() - timedelta(days=3)).strftime('%Y-%m-%d'),
-                'status': 'New',
-                'upvotes': 15,
-                'comments_count': 4,
-                'impact_score': 0,
-                'feasibility_score': 0,
-                'innovation_score': 0,
-                'strategic_score': 0,
-                'total_score': 0,
-                'tags': 'sustainability, cost reduction, environment',
-                'cost_savings': 80000,
-                'revenue_impact': 0
-            },
-            {
-                'id': 5,
-                'title': 'Referral Reward Program',
-                'description': 'Create a customer referral program offering discounts for successful referrals.',
-                'category': 'Revenue Growth',
-                'problem': 'Customer acquisition costs are high and marketing ROI is declining.',
-                'solution': 'Offer 20% discount to customers who refer friends who make a purchase.',
-                'benefits': 'Reduce acquisition cost by 50%, increase customer lifetime value, viral growth.',
-                'resources': 'Marketing team, $30K budget for rewards',
-                'submitter': 'john_doe',
-                'submit_date': (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d'),
-                'status': 'Approved',
-                'upvotes': 20,
-                'comments_count': 6,
-                'impact_score': 8,
-                'feasibility_score': 9,
-                'innovation_score': 6,
-                'strategic_score': 8,
-                'total_score': 31,
-                'tags': 'marketing, growth, referral',
-                'cost_savings': 0,
-                'revenue_impact': 250000
-            }
-        ]
-        st.session_state.ideas_df = pd.DataFrame(sample_ideas)
+    # Create sample ideas
+    sample_ideas = [
+        {
+            'id': 1,
+            'title': 'AI-Powered Customer Support Chatbot',
+            'description': 'Implement an intelligent chatbot to handle common customer queries 24/7, reducing response time and support costs.',
+            'category': 'Technology',
+            'problem': 'Customer support team is overwhelmed with repetitive questions, leading to slow response times.',
+            'solution': 'Deploy an AI chatbot trained on our FAQ and historical support tickets to answer common questions instantly.',
+            'benefits': 'Reduce support costs by 40%, improve response time from hours to seconds, increase customer satisfaction.',
+            'resources': '2 developers for 3 months, $50K budget for AI platform',
+            'submitter': 'john_doe',
+            'submit_date': (datetime.now() - timedelta(days=15)).strftime('%Y-%m-%d'),
+            'status': 'Approved',
+            'upvotes': 23,
+            'comments_count': 5,
+            'impact_score': 9,
+            'feasibility_score': 7,
+            'innovation_score': 8,
+            'strategic_score': 9,
+            'total_score': 33,
+            'tags': 'AI, automation, customer service',
+            'cost_savings': 120000,
+            'revenue_impact': 0
+        },
+        {
+            'id': 2,
+            'title': 'Employee Wellness Program',
+            'description': 'Launch a comprehensive wellness program including gym memberships, mental health support, and healthy snacks.',
+            'category': 'Process',
+            'problem': 'Employee burnout and health issues leading to increased sick days and turnover.',
+            'solution': 'Partner with local gyms, provide mental health counseling, stock office with healthy snacks.',
+            'benefits': 'Reduce sick days by 25%, improve employee satisfaction, lower healthcare costs.',
+            'resources': '$100K annual budget, HR coordinator',
+            'submitter': 'jane_smith',
+            'submit_date': (datetime.now() - timedelta(days=10)).strftime('%Y-%m-%d'),
+            'status': 'Under Review',
+            'upvotes': 18,
+            'comments_count': 3,
+            'impact_score': 7,
+            'feasibility_score': 8,
+            'innovation_score': 5,
+            'strategic_score': 8,
+            'total_score': 28,
+            'tags': 'wellness, culture, retention',
+            'cost_savings': 50000,
+            'revenue_impact': 0
+        },
+        {
+            'id': 3,
+            'title': 'Mobile App for Product Ordering',
+            'description': 'Develop a mobile app to allow customers to browse and order products on-the-go.',
+            'category': 'Product',
+            'problem': 'Customers want to shop from mobile devices but our website is not mobile-optimized.',
+            'solution': 'Build native iOS and Android apps with seamless ordering experience.',
+            'benefits': 'Increase mobile sales by 60%, improve customer retention, expand market reach.',
+            'resources': '3 developers for 6 months, $150K budget',
+            'submitter': 'john_doe',
+            'submit_date': (datetime.now() - timedelta(days=5)).strftime('%Y-%m-%d'),
+            'status': 'New',
+            'upvotes': 12,
+            'comments_count': 2,
+            'impact_score': 0,
+            'feasibility_score': 0,
+            'innovation_score': 0,
+            'strategic_score': 0,
+            'total_score': 0,
+            'tags': 'mobile, app, ecommerce',
+            'cost_savings': 0,
+            'revenue_impact': 300000
+        },
+        {
+            'id': 4,
+            'title': 'Green Office Initiative',
+            'description': 'Implement eco-friendly practices including solar panels, recycling programs, and paperless workflows.',
+            'category': 'Sustainability',
+            'problem': 'High energy costs and environmental impact from office operations.',
+            'solution': 'Install solar panels, set up comprehensive recycling, digitize all documents.',
+            'benefits': 'Reduce energy costs by 30%, improve brand reputation, meet sustainability goals.',
+            'resources': '$200K upfront investment, facilities team',
+            'submitter': 'jane_smith',
+            'submit_date': (datetime.now() - timedelta(days=3)).strftime('%Y-%m-%d'),
+            'status': 'New',
+            'upvotes': 15,
+            'comments_count': 4,
+            'impact_score': 0,
+            'feasibility_score': 0,
+            'innovation_score': 0,
+            'strategic_score': 0,
+            'total_score': 0,
+            'tags': 'sustainability, cost reduction, environment',
+            'cost_savings': 80000,
+            'revenue_impact': 0
+        },
+        {
+            'id': 5,
+            'title': 'Referral Reward Program',
+            'description': 'Create a customer referral program offering discounts for successful referrals.',
+            'category': 'Revenue Growth',
+            'problem': 'Customer acquisition costs are high and marketing ROI is declining.',
+            'solution': 'Offer 20% discount to customers who refer friends who make a purchase.',
+            'benefits': 'Reduce acquisition cost by 50%, increase customer lifetime value, viral growth.',
+            'resources': 'Marketing team, $30K budget for rewards',
+            'submitter': 'john_doe',
+            'submit_date': (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d'),
+            'status': 'Approved',
+            'upvotes': 20,
+            'comments_count': 6,
+            'impact_score': 8,
+            'feasibility_score': 9,
+            'innovation_score': 6,
+            'strategic_score': 8,
+            'total_score': 31,
+            'tags': 'marketing, growth, referral',
+            'cost_savings': 0,
+            'revenue_impact': 250000
+        }
+    ]
+    ideas_df = pd.DataFrame(sample_ideas)
     
-    if st.session_state.comments_df.empty:
-        st.session_state.comments_df = pd.DataFrame([
-            {
-                'id': 1,
-                'idea_id': 1,
-                'username': 'jane_smith',
-                'comment': 'Great idea! We should integrate this with our CRM system.',
-                'date': (datetime.now() - timedelta(days=14)).strftime('%Y-%m-%d'),
-                'likes': 5
-            },
-            {
-                'id': 2,
-                'idea_id': 1,
-                'username': 'admin',
-                'comment': 'Approved for Q2 implementation. Team assigned.',
-                'date': (datetime.now() - timedelta(days=13)).strftime('%Y-%m-%d'),
-                'likes': 8
-            }
-        ])
+    comments_df = pd.DataFrame([
+        {
+            'id': 1,
+            'idea_id': 1,
+            'username': 'jane_smith',
+            'comment': 'Great idea! We should integrate this with our CRM system.',
+            'date': (datetime.now() - timedelta(days=14)).strftime('%Y-%m-%d'),
+            'likes': 5,
+            'parent_id': None
+        },
+        {
+            'id': 2,
+            'idea_id': 1,
+            'username': 'admin',
+            'comment': 'Approved for Q2 implementation. Team assigned.',
+            'date': (datetime.now() - timedelta(days=13)).strftime('%Y-%m-%d'),
+            'likes': 8,
+            'parent_id': None
+        }
+    ])
+    
+    # Demo status history, consistent with each sample idea's current status
+    import synthetic
+    transitions_df = synthetic.generate_transitions(ideas_df)
+    
+    return {'users': users_df, 'ideas': ideas_df, 'comments': comments_df, 'transitions': transitions_df}
+
+@st.cache_resource(show_spinner=False)
+def load_image_asset(name):
+    """Resize an image to its display width and store it in the static directory once per process
+
+    Raises if the image can't be fetched or converted; exceptions aren't cached, so the next run retries.
+    """
+    asset = IMAGE_ASSETS[name]
+    original = STATIC_DIR / f"{name}.png"
+    resized = STATIC_DIR / f"{name}_w{asset['width']}.png"
+    
+    if not resized.exists():
+        if not original.exists():
+            # Not bundled: fetch it once and keep it next to the app
+            response = requests.get(asset['url'], timeout=10)
+            response.raise_for_status()
+            STATIC_DIR.mkdir(exist_ok=True)
+            original.write_bytes(response.content)
+        
+        img = Image.open(original)
+        if img.width > asset['width']:
+            img = img.resize((asset['width'], round(img.height * asset['width'] / img.width)), Image.LANCZOS)
+        tmp = resized.with_suffix('.tmp')
+        img.save(tmp, format='PNG', optimize=True)
+        tmp.replace(resized)
+    
+    # Content hash in the query string lets browsers cache the file until it changes
+    version = hashlib.md5(resized.read_bytes()).hexdigest()[:12]
+    return {'path': resized, 'url': f"app/static/{resized.name}?v={version}"}
+
+def show_image(name):
+    """Render a cached local image, falling back to its remote URL"""
+    try:
+        local = load_image_asset(name)
+    except Exception:
+        local = None
+    if local is None:
+        st.image(IMAGE_ASSETS[name]['url'], use_container_width=True)
+    elif st.get_option("server.enableStaticServing"):
+        st.markdown(f'<img src="{local["url"]}" style="width:100%;" alt="">', unsafe_allow_html=True)
+    else:
+        st.image(str(local['path']), use_container_width=True)
+
+@st.cache_resource(show_spinner=False)
+def get_store():
+    """The idea store shared by every session in this process"""
+    seed = load_seed_data()
+    # Durable by default: the SQLite store (see sqlstore.py), which several workers can share.
+    # IDEAS_DB= (empty) keeps everything in memory for this process only.
+    if os.environ.get('IDEAS_DB', DEFAULT_DB):
+        from sqlstore import SqliteIdeaStore
+        return SqliteIdeaStore(os.environ.get('IDEAS_DB', DEFAULT_DB), seed['users'], seed['ideas'], seed['comments'],
+                               seed['transitions'])
+    return IdeaStore(
+        seed['users'].copy(),
+        seed['ideas'].copy(),
+        seed['comments'].copy(),
+        TagIndex.from_ideas(seed['ideas']),
+        seed['transitions'].copy()
+    )
+
+@st.cache_resource(show_spinner=False)
+def get_compute():
+    """Process pool for the heavy analytics (see compute.py)"""
+    return ComputeService()
+
+@st.cache_resource(show_spinner=False)
+def get_notifier():
+    """Background fan-out of idea events to inboxes and e-mail digests (see notify.py)"""
+    return Notifier(get_store())
+
+@st.cache_resource(show_spinner=False)
+def get_gamification():
+    """Achievement tracking fed by the store's events (see gamification.py)"""
+    return gamification.GamificationEngine(get_store())
+
+@st.cache_resource(show_spinner=False)
+def get_trending():
+    """Decayed engagement scores per idea (see trending.py)"""
+    return TrendingScores(get_store())
+
+@st.cache_resource(show_spinner=False)
+def get_recommender():
+    """Per-user "For You" feeds (see recommend.py)"""
+    return Recommender(get_store(), get_trending())
+
+@st.cache_resource(show_spinner=False)
+def get_view_cache():
+    """Browse Ideas results shared by every session (see viewcache.py)"""
+    return ViewCache()
+
+@st.cache_resource(show_spinner=False)
+def get_exports():
+    """Background export jobs and their artifacts (see exports.py)"""
+    return exports.ExportService(get_store())
+
+@st.cache_resource(show_spinner=False)
+def get_rate_limiter():
+    """Per-user quotas on votes, comments, likes and submissions (see ratelimit.py)"""
+    def report_to_admins(username, action, entry):
+        admins = store.users_df.loc[store.users_df['role'] == 'Admin', 'username'].tolist()
+        text = f"{username} was rate limited on {THROTTLED_ACTIONS[action]} ({entry['count']} refused so far)"
+        for admin in admins:
+            get_notifier().inbox.deliver(admin, [{'at': entry['last'].isoformat(timespec='seconds'), 'idea_id': None,
+                                                  'icon': "🚦", 'text': text}])
+    store = get_store()
+    return ratelimit.RateLimiter(on_throttle=report_to_admins)
+
+def init_data():
+    """Initialize data structures"""
+    store = get_store()
+    get_notifier()
+    get_gamification()
+    get_recommender()
+    store.sync()
+    if 'seen_version' not in st.session_state:
+        st.session_state.seen_version = store.version
+    # A full run renders everything up to this version
+    st.session_state.rendered_version = store.version
+    st.session_state.new_ideas = 0
+    return store
+
+@st.cache_resource(show_spinner=False)
+def get_startup_metrics():
+    """Process-wide cold-start and first-paint timings"""
+    return {'lock': threading.Lock(), 'cold_start_ms': None, 'first_paint_ms': deque(maxlen=500)}
+
+def record_first_paint():
+    """Record how long this session's first full render took"""
+    if st.session_state.get('first_paint_ms') is not None:
+        return
+    elapsed_ms = (time.perf_counter() - _SCRIPT_START) * 1000
+    st.session_state.first_paint_ms = elapsed_ms
+    metrics = get_startup_metrics()
+    with metrics['lock']:
+        if metrics['cold_start_ms'] is None:
+            metrics['cold_start_ms'] = elapsed_ms
+        metrics['first_paint_ms'].append(elapsed_ms)
 
 def authenticate(username, password):
     """Authenticate user"""
-    password_hash = hashlib.sha256(password.encode()).hexdigest()
-    user = st.session_state.users_df[
-        (st.session_state.users_df['username'] == username) & 
-        (st.session_state.users_df['password'] == password_hash)
-    ]
-    if not user.empty:
-        return user.iloc[0].to_dict()
-    return None
+    return queries.authenticate(store.users_df, username, password)
 
-def calculate_level(points):
-    """Calculate user level"""
-    if points < 100:
-        return 1, "Innovator", "🌱"
-    elif points < 500:
-        return 2, "Explorer", "🔍"
-    elif points < 1500:
-        return 3, "Creator", "🎨"
-    elif points < 3000:
-        return 4, "Pioneer", "🚀"
-    elif points < 5000:
-        return 5, "Visionary", "🔮"
-    else:
-        return 6, "Innovation Master", "👑"
+def rerun_fragment():
+    """Rerun only the current fragment (the whole app if this is a full run)"""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+def allowed(action):
+    """Take one of the current user's quota for action, or warn them and refuse"""
+    username = st.session_state.current_user['username']
+    limiter = get_rate_limiter()
+    if limiter.allow(username, action):
+        return True
+    st.toast(f"Slow down! Too much {THROTTLED_ACTIONS[action]} in a short time. "
+             f"Try again in {limiter.retry_after(username, action):.0f}s.", icon="🚦")
+    return False
 
 def award_points(username, points, reason):
     """Award points to user"""
-    idx = st.session_state.users_df[st.session_state.users_df['username'] == username].index
-    if not idx.empty:
-        st.session_state.users_df.loc[idx, 'points'] += points
-        current_points = st.session_state.users_df.loc[idx, 'points'].values[0]
-        level, level_name, emoji = calculate_level(current_points)
-        st.session_state.users_df.loc[idx, 'level'] = level
+    if store.award_points(username, points, gamification.level_for) is not None:
         st.toast(f"🎉 +{points} points for {reason}!", icon="⭐")
+        if username == st.session_state.current_user['username']:
+            toast_achievements(username)
 
+def toast_achievements(username):
+    """Announce achievements unlocked since the last announcement"""
+    for emoji, name in get_gamification().pop_unlocked(username):
+        st.toast(f"Achievement unlocked: {name}", icon=emoji)
+
+@perf.timed("call_ai_api", "external")
 def call_ai_api(prompt, system_prompt):
     """Call AI API"""
     try:
@@ -337,31 +546,32 @@ def call_ai_api(prompt, system_prompt):
 
 def get_user_stats(username):
     """Get user statistics"""
-    user = st.session_state.users_df[st.session_state.users_df['username'] == username]
-    if user.empty:
+    user = store.get_user(username)
+    if user is None:
         return None
     
-    user_ideas = st.session_state.ideas_df[st.session_state.ideas_df['submitter'] == username]
+    user_ideas = store.ideas_df[store.ideas_df['submitter'] == username]
     
-    points = int(user['points'].values[0])
-    level, level_name, emoji = calculate_level(points)
+    points = int(user['points'])
     
     return {
         'points': points,
-        'level': level,
-        'level_name': level_name,
-        'emoji': emoji,
+        **gamification.level_info(points),
         'ideas_submitted': len(user_ideas),
         'ideas_approved': len(user_ideas[user_ideas['status'].isin(['Approved', 'In Progress', 'Implemented'])]),
         'total_upvotes': int(user_ideas['upvotes'].sum()) if not user_ideas.empty else 0
     }
 
 # Initialize data
-init_data()
+store = init_data()
+
+# Profiling (opt-in, see perf.py)
+perf.start_metrics_server()
+perf.recorder.begin_run(st.session_state.current_user['username'] if st.session_state.current_user else None)
 
 # Sidebar
-with st.sidebar:
-    st.image("https://storage.googleapis.com/workspace-0f70711f-8b4e-4d94-86f1-2a93ccde5887/image/f235bec8-f887-4b36-90ac-79a4c25cd446.png", use_container_width=True)
+with st.sidebar, perf.span("Sidebar", "tab"):
+    show_image('sidebar_logo')
     
     if st.session_state.current_user is None:
         st.header("🔐 Login")
@@ -408,7 +618,6 @@ with st.sidebar:
     
     else:
         user = st.session_state.current_user
-        stats = get_user_stats(user['username'])
         
         st.success(f"👤 **{user['username']}**")
         st.caption(f"📧 {user['email']}")
@@ -420,30 +629,57 @@ with st.sidebar:
         
         st.divider()
         
-        if stats:
-            st.markdown(f"""
-            <div class="level-badge">
-                {stats['emoji']} Level {stats['level']}: {stats['level_name']}
-            </div>
-            """, unsafe_allow_html=True)
-            
-            st.metric("⭐ Points", stats['points'])
-            next_level_points = [100, 500, 1500, 3000, 5000, 10000][stats['level']-1] if stats['level'] < 6 else 10000
-            progress = min((stats['points'] % next_level_points) / next_level_points, 1.0) if stats['level'] < 6 else 1.0
-            st.progress(progress)
-            
-            if stats['level'] < 6:
-                remaining = next_level_points - (stats['points'] % next_level_points)
-                st.caption(f"🎯 {remaining} points to next level")
-            else:
-                st.caption("🏆 Maximum level reached!")
-            
-            st.divider()
+        # Points badge and stats refresh on their own after votes, comments and approvals
+        @st.fragment(run_every=LIVE_UPDATE_SECONDS)
+        def sidebar_stats():
+            stats = store.memo(('user_stats', user['username']), lambda: get_user_stats(user['username']))
+            if stats:
+                st.markdown(f"""
+                <div class="level-badge">
+                    {stats['emoji']} Level {stats['level']}: {stats['level_name']}
+                </div>
+                """, unsafe_allow_html=True)
+                
+                st.metric("⭐ Points", stats['points'])
+                st.progress(stats['progress'])
+                
+                if stats['next_level_points'] is not None:
+                    st.caption(f"🎯 {stats['remaining']} points to next level")
+                else:
+                    st.caption("🏆 Maximum level reached!")
+                
+                st.divider()
+                
+                col1, col2 = st.columns(2)
+                col1.metric("💡 Ideas", stats['ideas_submitted'])
+                col2.metric("✅ Approved", stats['ideas_approved'])
+                st.metric("👍 Upvotes", stats['total_upvotes'])
             
-            col1, col2 = st.columns(2)
-            col1.metric("💡 Ideas", stats['ideas_submitted'])
-            col2.metric("✅ Approved", stats['ideas_approved'])
-            st.metric("👍 Upvotes", stats['total_upvotes'])
+            badges = get_gamification().badges(user['username'])
+            if badges:
+                st.markdown("**🏅 Achievements**")
+                st.markdown(" ".join(f'<span title="{name}: {description}">{emoji}</span>'
+                                     for emoji, name, description, _ in badges), unsafe_allow_html=True)
+        
+        sidebar_stats()
+        
+        @st.fragment(run_every=LIVE_UPDATE_SECONDS)
+        def sidebar_inbox():
+            inbox = get_notifier().inbox
+            unread = inbox.unread_count(user['username'])
+            with st.expander(f"🔔 Notifications ({unread} new)" if unread else "🔔 Notifications"):
+                entries = inbox.latest(user['username'])
+                if not entries:
+                    st.caption("Nothing yet. You'll hear about votes, comments and reviews on your ideas here.")
+                for entry in entries:
+                    st.markdown(f"{entry['icon']} {'**' + entry['text'] + '**' if not entry['read'] else entry['text']}")
+                    st.caption(entry['at'])
+                if unread and st.button("✔️ Mark all as read", key="inbox_read", use_container_width=True):
+                    inbox.mark_read(user['username'])
+                    rerun_fragment()
+        
+        st.divider()
+        sidebar_inbox()
 
 # Main App
 if st.session_state.current_user is None:
@@ -487,7 +723,7 @@ if st.session_state.current_user is None:
         """)
     
     with col2:
-        st.image("https://storage.googleapis.com/workspace-0f70711f-8b4e-4d94-86f1-2a93ccde5887/image/c9c387f8-f61e-4b6e-8ce4-739515e0038f.png", use_container_width=True)
+        show_image('landing_hero')
         
         st.markdown("""
         ### 📈 Success Stories
@@ -509,6 +745,35 @@ else:
     # Main Application
     user = st.session_state.current_user
     
+    # Live activity from other sessions: a cheap version check, then toasts for
+    # the new deltas. Live panels refresh themselves; new ideas need a full rerun.
+    @st.fragment(run_every=LIVE_UPDATE_SECONDS)
+    def live_activity():
+        store.sync()
+        seen = st.session_state.seen_version
+        if store.version != seen:
+            deltas = store.bus.since(seen) or []
+            st.session_state.seen_version = store.version
+            toast_achievements(user['username'])
+            for delta in deltas:
+                if delta['actor'] == user['username']:
+                    continue
+                if delta['type'] == 'idea_added':
+                    if delta['version'] > st.session_state.rendered_version:
+                        st.session_state.new_ideas += 1
+                    st.toast(f"💡 {delta['actor']} submitted \"{delta['title']}\"", icon="🆕")
+                elif delta['type'] == 'comment_added':
+                    st.toast(f"💬 {delta['actor']} commented on \"{delta['title']}\"")
+                elif delta['type'] == 'status_changed':
+                    st.toast(f"📋 \"{delta['title']}\" is now {delta['status']}")
+        
+        if st.session_state.new_ideas:
+            if st.button(f"🔄 {st.session_state.new_ideas} new idea(s) — click to refresh", key="live_refresh"):
+                st.session_state.new_ideas = 0
+                st.rerun()
+    
+    live_activity()
+    
     tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
         "🏠 Dashboard",
         "💡 Browse Ideas",
@@ -518,47 +783,55 @@ else:
         "⚙️ Admin"
     ])
     
-    with tab1:
+    with tab1, perf.span("Dashboard", "tab"):
         st.title("📊 Innovation Dashboard")
         
-        # Key Metrics
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            total_ideas = len(st.session_state.ideas_df)
-            st.markdown(f"""
-            <div class="metric-card">
-                <h3 style="margin:0;font-size:2rem;">{total_ideas}</h3>
-                <p style="margin:5px 0 0 0;opacity:0.9;">Total Ideas</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            approved = len(st.session_state.ideas_df[st.session_state.ideas_df['status'].isin(['Approved', 'In Progress', 'Implemented'])])
-            st.markdown(f"""
-            <div class="metric-card" style="background: linear-gradient(135deg, #4caf50 0%, #45a049 100%);">
-                <h3 style="margin:0;font-size:2rem;">{approved}</h3>
-                <p style="margin:5px 0 0 0;opacity:0.9;">Approved</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            implemented = len(st.session_state.ideas_df[st.session_state.ideas_df['status'] == 'Implemented'])
-            st.markdown(f"""
-            <div class="metric-card" style="background: linear-gradient(135deg, #ff9800 0%, #f57c00 100%);">
-                <h3 style="margin:0;font-size:2rem;">{implemented}</h3>
-                <p style="margin:5px 0 0 0;opacity:0.9;">Implemented</p>
-            </div>
-            """, unsafe_allow_html=True)
+        # Key Metrics (refreshed in place when other sessions change the data)
+        @st.fragment(run_every=LIVE_UPDATE_SECONDS)
+        def dashboard_metrics():
+            with perf.span("ideas.status_summary", "data"):
+                summary = store.memo('status_summary', lambda: queries.status_summary(store.ideas_df))
+                impact = store.memo('impact_totals', lambda: queries.impact_totals(store.ideas_df))
+            
+            col1, col2, col3, col4 = st.columns(4)
+            
+            with col1:
+                total_ideas = summary['total']
+                st.markdown(f"""
+                <div class="metric-card">
+                    <h3 style="margin:0;font-size:2rem;">{total_ideas}</h3>
+                    <p style="margin:5px 0 0 0;opacity:0.9;">Total Ideas</p>
+                </div>
+                """, unsafe_allow_html=True)
+            
+            with col2:
+                approved = summary['approved']
+                st.markdown(f"""
+                <div class="metric-card" style="background: linear-gradient(135deg, #4caf50 0%, #45a049 100%);">
+                    <h3 style="margin:0;font-size:2rem;">{approved}</h3>
+                    <p style="margin:5px 0 0 0;opacity:0.9;">Approved</p>
+                </div>
+                """, unsafe_allow_html=True)
+            
+            with col3:
+                implemented = summary['implemented']
+                st.markdown(f"""
+                <div class="metric-card" style="background: linear-gradient(135deg, #ff9800 0%, #f57c00 100%);">
+                    <h3 style="margin:0;font-size:2rem;">{implemented}</h3>
+                    <p style="margin:5px 0 0 0;opacity:0.9;">Implemented</p>
+                </div>
+                """, unsafe_allow_html=True)
+            
+            with col4:
+                total_impact = impact['cost_savings'] + impact['revenue_impact']
+                st.markdown(f"""
+                <div class="metric-card" style="background: linear-gradient(135deg, #2196f3 0%, #1976d2 100%);">
+                    <h3 style="margin:0;font-size:2rem;">${total_impact/1000:.0f}K</h3>
+                    <p style="margin:5px 0 0 0;opacity:0.9;">Total Impact</p>
+                </div>
+                """, unsafe_allow_html=True)
         
-        with col4:
-            total_impact = st.session_state.ideas_df['cost_savings'].fillna(0).sum() + st.session_state.ideas_df['revenue_impact'].fillna(0).sum()
-            st.markdown(f"""
-            <div class="metric-card" style="background: linear-gradient(135deg, #2196f3 0%, #1976d2 100%);">
-                <h3 style="margin:0;font-size:2rem;">${total_impact/1000:.0f}K</h3>
-                <p style="margin:5px 0 0 0;opacity:0.9;">Total Impact</p>
-            </div>
-            """, unsafe_allow_html=True)
+        dashboard_metrics()
         
         st.divider()
         
@@ -567,84 +840,144 @@ else:
         
         with col1:
             st.subheader("📊 Ideas by Status")
-            status_counts = st.session_state.ideas_df['status'].value_counts()
-            fig = px.pie(
-                values=status_counts.values,
-                names=status_counts.index,
-                color_discrete_sequence=px.colors.qualitative.Set3,
-                hole=0.4
-            )
-            fig.update_layout(height=350, margin=dict(t=30, b=0, l=0, r=0))
-            st.plotly_chart(fig, use_container_width=True)
+            with perf.span("ideas.value_counts(status)", "data"):
+                status_counts = store.ideas_df['status'].value_counts()
+            with perf.span("status pie", "chart"):
+                fig = px.pie(
+                    values=status_counts.values,
+                    names=status_counts.index,
+                    color_discrete_sequence=px.colors.qualitative.Set3,
+                    hole=0.4
+                )
+                fig.update_layout(height=350, margin=dict(t=30, b=0, l=0, r=0))
+                st.plotly_chart(fig, use_container_width=True)
         
         with col2:
             st.subheader("📁 Ideas by Category")
-            category_counts = st.session_state.ideas_df['category'].value_counts()
-            fig = px.bar(
-                x=category_counts.values,
-                y=category_counts.index,
-                orientation='h',
-                color=category_counts.values,
-                color_continuous_scale='Viridis'
-            )
-            fig.update_layout(
-                height=350,
-                margin=dict(t=30, b=0, l=0, r=0),
-                showlegend=False,
-                xaxis_title="Count",
-                yaxis_title=""
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            with perf.span("ideas.value_counts(category)", "data"):
+                category_counts = store.ideas_df['category'].value_counts()
+            with perf.span("category bar", "chart"):
+                fig = px.bar(
+                    x=category_counts.values,
+                    y=category_counts.index,
+                    orientation='h',
+                    color=category_counts.values,
+                    color_continuous_scale='Viridis'
+                )
+                fig.update_layout(
+                    height=350,
+                    margin=dict(t=30, b=0, l=0, r=0),
+                    showlegend=False,
+                    xaxis_title="Count",
+                    yaxis_title=""
+                )
+                st.plotly_chart(fig, use_container_width=True)
+        
+        st.divider()
+        
+        # Trending Tags
+        st.subheader("🔥 Trending Tags")
+        with perf.span("tag_index.trending", "data"):
+            since = (datetime.now() - timedelta(days=TRENDING_TAG_DAYS)).strftime('%Y-%m-%d')
+            trending_tags = store.tag_index.trending(since, limit=10)
+        
+        if not trending_tags:
+            st.info(f"No tagged ideas in the last {TRENDING_TAG_DAYS} days yet.")
+        else:
+            with perf.span("trending tags bar", "chart"):
+                fig = px.bar(
+                    x=[count for _, count in trending_tags],
+                    y=[tag for tag, _ in trending_tags],
+                    orientation='h',
+                    color=[count for _, count in trending_tags],
+                    color_continuous_scale='Sunset'
+                )
+                fig.update_layout(
+                    height=300,
+                    margin=dict(t=30, b=0, l=0, r=0),
+                    showlegend=False,
+                    coloraxis_showscale=False,
+                    xaxis_title=f"Ideas in the last {TRENDING_TAG_DAYS} days",
+                    yaxis_title="",
+                    yaxis=dict(autorange="reversed")
+                )
+                st.plotly_chart(fig, use_container_width=True)
         
         st.divider()
         
         # Recent Ideas
-        st.subheader("🆕 Recent Ideas")
-        recent = st.session_state.ideas_df.sort_values('submit_date', ascending=False).head(5)
+        @st.fragment(run_every=LIVE_UPDATE_SECONDS)
+        def recent_ideas_panel():
+            st.subheader("🆕 Recent Ideas")
+            with perf.span("ideas.sort_values(submit_date)", "data"):
+                recent = store.memo('recent_ideas', lambda: queries.recent_ideas(store.ideas_df))
+            
+            for idx, row in recent.iterrows():
+                with st.container():
+                    col1, col2, col3 = st.columns([6, 2, 2])
+                    
+                    with col1:
+                        st.markdown(f"### 💡 {row['title']}")
+                        st.write(row['description'][:150] + "...")
+                        st.caption(f"📁 {row['category']} • 👤 {row['submitter']} • 📅 {row['submit_date']}")
+                    
+                    with col2:
+                        status_map = {
+                            'New': 'status-new',
+                            'Under Review': 'status-review',
+                            'Approved': 'status-approved',
+                            'Rejected': 'status-rejected',
+                            'In Progress': 'status-progress',
+                            'Implemented': 'status-implemented'
+                        }
+                        st.markdown(f'<span class="status-badge {status_map.get(row["status"], "status-new")}">{row["status"]}</span>', unsafe_allow_html=True)
+                        st.metric("👍 Upvotes", row['upvotes'])
+                    
+                    with col3:
+                        st.metric("💬 Comments", row['comments_count'])
+                        if row['total_score'] > 0:
+                            st.metric("⭐ Score", f"{row['total_score']}/40")
+                    
+                    st.divider()
         
-        for idx, row in recent.iterrows():
-            with st.container():
+        recent_ideas_panel()
+        
+        st.divider()
+        
+        @st.fragment(run_every=LIVE_UPDATE_SECONDS)
+        def trending_panel():
+            st.subheader("🔥 Trending Ideas")
+            st.caption("Votes and comments, counting less as they age")
+            with perf.span("trending.top", "data"):
+                trending = get_trending().top(5)
+            
+            for rank, (idea_id, score) in enumerate(trending, 1):
+                row = store.get_idea(idea_id)
+                if row is None:
+                    continue
                 col1, col2, col3 = st.columns([6, 2, 2])
-                
-                with col1:
-                    st.markdown(f"### 💡 {row['title']}")
-                    st.write(row['description'][:150] + "...")
-                    st.caption(f"📁 {row['category']} • 👤 {row['submitter']} • 📅 {row['submit_date']}")
-                
-                with col2:
-                    status_map = {
-                        'New': 'status-new',
-                        'Under Review': 'status-review',
-                        'Approved': 'status-approved',
-                        'Rejected': 'status-rejected',
-                        'In Progress': 'status-progress',
-                        'Implemented': 'status-implemented'
-                    }
-                    st.markdown(f'<span class="status-badge {status_map.get(row["status"], "status-new")}">{row["status"]}</span>', unsafe_allow_html=True)
-                    st.metric("👍 Upvotes", row['upvotes'])
-                
-                with col3:
-                    st.metric("💬 Comments", row['comments_count'])
-                    if row['total_score'] > 0:
-                        st.metric("⭐ Score", f"{row['total_score']}/40")
-                
-                st.divider()
+                col1.markdown(f"**{rank}. {row['title']}**")
+                col1.caption(f"📁 {row['category']} • 👤 {row['submitter']} • 📅 {row['submit_date']}")
+                col2.metric("🔥 Trending", f"{score:.1f}")
+                col3.metric("👍 Upvotes", row['upvotes'])
+        
+        trending_panel()
     
-    with tab2:
+    with tab2, perf.span("Browse Ideas", "tab"):
         st.title("💡 Browse Ideas")
         
         # Filters
-        col1, col2, col3, col4 = st.columns(4)
+        col1, col2, col3, col4, col5 = st.columns(5)
         
         with col1:
             filter_status = st.multiselect(
                 "Status",
-                ['New', 'Under Review', 'Approved', 'Rejected', 'In Progress', 'Implemented'],
-                default=['New', 'Under Review', 'Approved', 'In Progress']
+                queries.ALL_STATUSES,
+                default=queries.DEFAULT_BROWSE_STATUSES
             )
         
         with col2:
-            categories = st.session_state.ideas_df['category'].unique().tolist()
+            categories = store.categories.options()
             filter_category = st.multiselect(
                 "Category",
                 categories,
@@ -654,102 +987,155 @@ else:
         with col3:
             filter_submitter = st.selectbox(
                 "Submitter",
-                ['All'] + st.session_state.ideas_df['submitter'].unique().tolist()
+                ['All'] + store.submitter_options()
             )
         
         with col4:
+            filter_tags = st.multiselect(
+                "Tags",
+                store.tag_index.options()
+            )
+        
+        with col5:
             sort_by = st.selectbox(
                 "Sort by",
-                ['Recent', 'Most Upvoted', 'Highest Score', 'Most Commented']
+                list(queries.SORT_COLUMNS) + [queries.TRENDING, queries.FOR_YOU]
             )
         
-        # Filter ideas
-        filtered = st.session_state.ideas_df[
-            (st.session_state.ideas_df['status'].isin(filter_status)) &
-            (st.session_state.ideas_df['category'].isin(filter_category))
-        ]
-        
-        if filter_submitter != 'All':
-            filtered = filtered[filtered['submitter'] == filter_submitter]
-        
-        # Sort
-        if sort_by == 'Recent':
-            filtered = filtered.sort_values('submit_date', ascending=False)
-        elif sort_by == 'Most Upvoted':
-            filtered = filtered.sort_values('upvotes', ascending=False)
-        elif sort_by == 'Highest Score':
-            filtered = filtered.sort_values('total_score', ascending=False)
-        else:
-            filtered = filtered.sort_values('comments_count', ascending=False)
+        # Filter and sort ideas
+        def filter_and_sort():
+            tagged_ids = store.tag_index.ids_for(filter_tags) if filter_tags else None
+            filtered = queries.filter_ideas(store.ideas_df, filter_status, store.categories.ids_for(filter_category),
+                                            filter_submitter, tagged_ids)
+            if sort_by == queries.FOR_YOU:
+                feed_ids = [idea_id for idea_id, _ in get_recommender().feed(user['username'])]
+                filtered = queries.rank_ideas(filtered, feed_ids)
+            elif sort_by == queries.TRENDING:
+                # The top of the trending index among the filtered ideas, then the rest newest first
+                trending_ids = [idea_id for idea_id, _ in get_trending().top(TRENDING_BROWSE_K, filtered['id'].tolist())]
+                filtered = queries.rank_ideas(filtered, trending_ids)
+            else:
+                filtered = queries.sort_ideas(filtered, sort_by)
+            return filtered['id'].to_numpy(dtype='int64')
         
-        st.info(f"📋 Showing **{len(filtered)}** ideas")
+        with perf.span("browse filter+sort_values", "data"):
+            if sort_by == queries.FOR_YOU:
+                # Per-user order (the recommender caches the feed itself)
+                filtered_ids = filter_and_sort()
+            else:
+                view = view_key(filter_status, filter_category, filter_submitter, filter_tags, sort_by)
+                filtered_ids = get_view_cache().get(view, store.version, filter_and_sort)
         
-        # Display ideas
-        for idx, row in filtered.iterrows():
+        st.info(f"📋 Showing **{len(filtered_ids)}** ideas")
+        if sort_by == queries.FOR_YOU:
+            st.caption("✨ Ranked by similarity to the ideas you submitted, upvoted and commented on, and by what's trending")
+        
+        # Each card is a fragment: upvoting or commenting only reruns that card
+        @st.fragment
+        def idea_card(idea_id):
+            row = store.get_idea(idea_id)
+            if row is None:
+                return
+            
             with st.container():
                 col1, col2 = st.columns([7, 3])
                 
                 with col1:
                     st.markdown(f"### 💡 {row['title']}")
                     st.write(row['description'])
+                    idea_tags = store.tag_index.tags_for(row['id'])
+                    if idea_tags:
+                        st.caption("🏷️ " + " • ".join(idea_tags))
                     
-                    with st.expander("📖 View Full Details"):
-                        st.markdown(f"**❓ Problem:**")
-                        st.write(row['problem'])
-                        st.markdown(f"**✅ Solution:**")
-                        st.write(row['solution'])
-                        st.markdown(f"**🎯 Expected Benefits:**")
-                        st.write(row['benefits'])
-                        st.markdown(f"**🔧 Resources Needed:**")
-                        st.write(row['resources'])
-                        
-                        if row['total_score'] > 0:
+                    # Lazy: the details (and their text from the content store) are only built while open
+                    details_expander = st.expander("📖 View Full Details", key=f"details_{idea_id}", on_change="rerun")
+                    if details_expander.open:
+                        with details_expander:
+                            details = store.get_details(row['id']) or {}
+                            st.markdown(f"**❓ Problem:**")
+                            st.write(details.get('problem'))
+                            st.markdown(f"**✅ Solution:**")
+                            st.write(details.get('solution'))
+                            st.markdown(f"**🎯 Expected Benefits:**")
+                            st.write(details.get('benefits'))
+                            st.markdown(f"**🔧 Resources Needed:**")
+                            st.write(details.get('resources'))
+                            
+                            if row['total_score'] > 0:
+                                st.divider()
+                                st.markdown("**📊 Evaluation Scores:**")
+                                score_col1, score_col2, score_col3, score_col4 = st.columns(4)
+                                score_col1.metric("Impact", f"{row['impact_score']}/10")
+                                score_col2.metric("Feasibility", f"{row['feasibility_score']}/10")
+                                score_col3.metric("Innovation", f"{row['innovation_score']}/10")
+                                score_col4.metric("Strategy", f"{row['strategic_score']}/10")
+                            
+                            # Status history, from the transition log's per-idea index
+                            history = store.history.for_idea(row['id'])
+                            if len(history) > 1:
+                                st.divider()
+                                st.markdown("**📜 Status History:**")
+                                for change in history.itertuples():
+                                    note = f" — _{change.comment}_" if change.comment else ""
+                                    st.caption(f"{change.at} • {change.actor}: {change.from_status or 'Submitted'} → {change.to_status}{note}")
+                            
+                            # Comments: newest threads first, a page at a time, read through the thread index
                             st.divider()
-                            st.markdown("**📊 Evaluation Scores:**")
-                            score_col1, score_col2, score_col3, score_col4 = st.columns(4)
-                            score_col1.metric("Impact", f"{row['impact_score']}/10")
-                            score_col2.metric("Feasibility", f"{row['feasibility_score']}/10")
-                            score_col3.metric("Innovation", f"{row['innovation_score']}/10")
-                            score_col4.metric("Strategy", f"{row['strategic_score']}/10")
-                        
-                        # Comments section
-                        st.divider()
-                        st.markdown("**💬 Comments:**")
-                        idea_comments = st.session_state.comments_df[st.session_state.comments_df['idea_id'] == row['id']]
-                        if not idea_comments.empty:
-                            for _, comment in idea_comments.iterrows():
+                            thread_count = store.threads.count(row['id'])
+                            st.markdown(f"**💬 Comments ({thread_count}):**")
+                            shown = st.session_state.get(f"comment_pages_{idea_id}", 1) * comments.PAGE_SIZE
+                            threads = store.get_comments(store.threads.page(row['id'], 0, shown))
+                            replies = {}
+                            for thread in threads:
+                                limit = None if st.session_state.get(f"all_replies_{thread['id']}") else comments.REPLY_PAGE_SIZE
+                                replies[thread['id']] = store.get_comments(store.threads.reply_page(thread['id'], limit))
+                            liked = store.liked(user['username'], [thread['id'] for thread in threads] +
+                                                [reply['id'] for thread_replies in replies.values() for reply in thread_replies])
+                            
+                            def comment_entry(comment):
                                 st.markdown(f"""
                                 <div style="background-color: #f8f9fa; padding: 12px; border-radius: 8px; margin: 8px 0;">
                                     <strong>{comment['username']}</strong> • {comment['date']}
                                     <p style="margin: 8px 0 0 0;">{comment['comment']}</p>
-                                    <small>👍 {comment['likes']} likes</small>
                                 </div>
                                 """, unsafe_allow_html=True)
-                        
-                        # Add comment
-                        new_comment = st.text_area("Add a comment", key=f"comment_{idx}")
-                        if st.button("💬 Post Comment", key=f"post_{idx}"):
-                            if new_comment:
-                                new_comment_data = {
-                                    'id': len(st.session_state.comments_df) + 1,
-                                    'idea_id': row['id'],
-                                    'username': user['username'],
-                                    'comment': new_comment,
-                                    'date': datetime.now().strftime('%Y-%m-%d'),
-                                    'likes': 0
-                                }
-                                st.session_state.comments_df = pd.concat([
-                                    st.session_state.comments_df,
-                                    pd.DataFrame([new_comment_data])
-                                ], ignore_index=True)
-                                
-                                # Update comment count
-                                st.session_state.ideas_df.loc[idx, 'comments_count'] += 1
-                                
-                                award_points(user['username'], 2, "commenting on idea")
-                                st.success("Comment posted!")
-                                st.rerun()
-                
+                                if st.button(f"👍 {comment['likes']}", key=f"like_{comment['id']}",
+                                             disabled=comment['id'] in liked or comment['username'] == user['username'],
+                                             help="Already liked" if comment['id'] in liked else "Like") and allowed('like'):
+                                    store.like_comment(comment['id'], user['username'])
+                                    rerun_fragment()
+                            
+                            for thread in threads:
+                                comment_entry(thread)
+                                indent, body = st.columns([1, 19])
+                                with body:
+                                    for reply in replies[thread['id']]:
+                                        comment_entry(reply)
+                                    hidden = store.threads.reply_count(thread['id']) - len(replies[thread['id']])
+                                    if hidden > 0 and st.button(f"↩️ Show {hidden} more replies", key=f"more_replies_{thread['id']}"):
+                                        st.session_state[f"all_replies_{thread['id']}"] = True
+                                        rerun_fragment()
+                                    with st.popover("↩️ Reply"):
+                                        reply_text = st.text_area("Your reply", key=f"reply_text_{thread['id']}")
+                                        if st.button("💬 Post Reply", key=f"reply_{thread['id']}") and reply_text and allowed('comment'):
+                                            store.add_comment(row['id'], user['username'], reply_text, parent_id=thread['id'])
+                                            award_points(user['username'], 2, "commenting on idea")
+                                            rerun_fragment()
+                            
+                            if shown < thread_count:
+                                if st.button(f"⬇️ Older comments ({thread_count - shown} more)", key=f"more_comments_{idea_id}"):
+                                    st.session_state[f"comment_pages_{idea_id}"] = shown // comments.PAGE_SIZE + 1
+                                    rerun_fragment()
+                            
+                            # Add comment
+                            new_comment = st.text_area("Add a comment", key=f"comment_{idea_id}")
+                            if st.button("💬 Post Comment", key=f"post_{idea_id}"):
+                                if new_comment and allowed('comment'):
+                                    store.add_comment(row['id'], user['username'], new_comment)
+                                    award_points(user['username'], 2, "commenting on idea")
+                                    st.success("Comment posted!")
+                                    rerun_fragment()
+                    
                 with col2:
                     status_map = {
                         'New': 'status-new',
@@ -771,14 +1157,18 @@ else:
                     col_a.metric("👍", row['upvotes'])
                     col_b.metric("💬", row['comments_count'])
                     
-                    if st.button("👍 Upvote", key=f"upvote_{idx}", use_container_width=True):
-                        st.session_state.ideas_df.loc[idx, 'upvotes'] += 1
+                    if st.button("👍 Upvote", key=f"upvote_{idea_id}", use_container_width=True) and allowed('upvote'):
+                        store.upvote(row['id'], user['username'])
                         award_points(user['username'], 1, "upvoting")
-                        st.rerun()
+                        rerun_fragment()
                 
                 st.divider()
+        
+        # Display ideas
+        for idea_id in filtered_ids.tolist():
+            idea_card(idea_id)
     
-    with tab3:
+    with tab3, perf.span("Submit Idea", "tab"):
         st.title("➕ Submit New Idea")
         
         with st.form("submit_idea_form", clear_on_submit=True):
@@ -793,8 +1183,7 @@ else:
             with col1:
                 category = st.selectbox(
                     "Category *",
-                    ['Product', 'Process', 'Customer Experience', 'Technology',
-                     'Cost Reduction', 'Revenue Growth', 'Sustainability', 'Other']
+                    store.categories.options()
                 )
             with col2:
                 tags = st.text_input(
@@ -843,7 +1232,7 @@ else:
             if submit:
                 if not all([title, description, problem, solution, benefits]):
                     st.error("❌ Please fill in all required fields (*)")
-                else:
+                elif allowed('submit'):
                     final_description = description
                     
                     if ai_enhance:
@@ -866,10 +1255,8 @@ Provide an improved description that is professional, clear, and compelling."""
                                 st.success("✅ AI enhanced your description!")
                     
                     # Create new idea
-                    new_id = st.session_state.ideas_df['id'].max() + 1 if not st.session_state.ideas_df.empty else 1
-                    
+                    tag_list = normalize_tags(tags)
                     new_idea = {
-                        'id': new_id,
                         'title': title,
                         'description': final_description,
                         'category': category,
@@ -887,19 +1274,13 @@ Provide an improved description that is professional, clear, and compelling."""
                         'innovation_score': 0,
                         'strategic_score': 0,
                         'total_score': 0,
-                        'tags': tags,
+                        'tags': format_tags(tag_list),
                         'cost_savings': 0,
                         'revenue_impact': 0
                     }
                     
-                    st.session_state.ideas_df = pd.concat([
-                        st.session_state.ideas_df,
-                        pd.DataFrame([new_idea])
-                    ], ignore_index=True)
-                    
-                    # Update user stats
-                    user_idx = st.session_state.users_df[st.session_state.users_df['username'] == user['username']].index
-                    st.session_state.users_df.loc[user_idx, 'ideas_submitted'] += 1
+                    # Also counts the submission in the user's stats
+                    store.add_idea(new_idea, tag_list, user['username'])
                     
                     # Award points
                     award_points(user['username'], 10, "submitting idea")
@@ -908,84 +1289,182 @@ Provide an improved description that is professional, clear, and compelling."""
                     st.balloons()
                     st.info("💡 Your idea will be reviewed by the innovation team. Check back for updates!")
     
-    with tab4:
+    with tab4, perf.span("Analytics", "tab"):
         st.title("📊 Innovation Analytics")
         
         # Time period selector
         period = st.selectbox(
             "📅 Time Period",
-            ['Last 7 Days', 'Last 30 Days', 'Last 90 Days', 'Last Year', 'All Time']
+            list(analytics.PERIOD_DAYS)
         )
+        days = analytics.PERIOD_DAYS[period]
         
-        st.divider()
+        with perf.span("analytics.prepare", "data"):
+            prepared = store.memo(
+                'analytics.prepared',
+                lambda: analytics.prepare(store.ideas_df, store.users_df, store.history.frame()),
+                shared=False
+            )
         
-        # Submission trends
-        st.subheader("📈 Submission Trends")
-        ideas_df_copy = st.session_state.ideas_df.copy()
-        ideas_df_copy['submit_date'] = pd.to_datetime(ideas_df_copy['submit_date'])
-        ideas_by_month = ideas_df_copy.groupby(ideas_df_copy['submit_date'].dt.to_period('M')).size()
-        
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=ideas_by_month.index.astype(str),
-            y=ideas_by_month.values,
-            mode='lines+markers',
-            name='Ideas Submitted',
-            line=dict(color='#667eea', width=3),
-            marker=dict(size=10)
-        ))
-        fig.update_layout(
-            title="Ideas Submitted Over Time",
-            xaxis_title="Month",
-            yaxis_title="Number of Ideas",
-            height=400
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        # Period over period
+        with perf.span("analytics.period_deltas", "data"):
+            deltas = store.memo(('analytics.period_deltas', period), lambda: analytics.period_deltas(prepared, days))
+        
+        col1, col2, col3, col4, col5 = st.columns(5)
+        for col, label, key, fmt in [
+            (col1, "💡 Submitted", 'submitted', "{:,.0f}"),
+            (col2, "✅ Approved", 'approved', "{:,.0f}"),
+            (col3, "🚀 Implemented", 'implemented', "{:,.0f}"),
+            (col4, "💵 Savings + Revenue", None, "${:,.0f}"),
+            (col5, "⭐ Avg Score", 'avg_score', "{:.1f}")
+        ]:
+            if key is None:
+                current = deltas['cost_savings']['current'] + deltas['revenue_impact']['current']
+                delta = None if days is None else deltas['cost_savings']['delta'] + deltas['revenue_impact']['delta']
+            else:
+                current, delta = deltas[key]['current'], deltas[key]['delta']
+            col.metric(
+                label,
+                fmt.format(current) if not pd.isna(current) else "N/A",
+                delta=fmt.format(delta) if delta is not None and not pd.isna(delta) else None
+            )
+        if days is not None:
+            st.caption(f"Change against the {days} days before. Approvals and implementations count "
+                       f"when they happened; the other figures cover ideas submitted in the period.")
         
         st.divider()
         
+        # Approval funnel and cohorts, for ideas submitted in the period
+        period_ideas = analytics.in_period(prepared, days)
         col1, col2 = st.columns(2)
         
         with col1:
-            st.subheader("🏢 Ideas by Department")
-            dept_data = st.session_state.ideas_df.merge(
-                st.session_state.users_df[['username', 'department']],
-                left_on='submitter',
-                right_on='username',
-                how='left'
-            )
-            dept_counts = dept_data['department'].value_counts()
+            st.subheader("🔻 Approval Funnel")
+            with perf.span("analytics.funnel", "data"):
+                funnel = store.memo(('analytics.funnel', period), lambda: analytics.funnel(period_ideas))
             
-            fig = px.bar(
-                x=dept_counts.values,
-                y=dept_counts.index,
-                orientation='h',
-                color=dept_counts.values,
-                color_continuous_scale='Blues'
+            with perf.span("approval funnel", "chart"):
+                fig = go.Figure(go.Funnel(
+                    y=funnel.index,
+                    x=funnel['Ideas'],
+                    textinfo="value+percent previous",
+                    marker=dict(color=['#667eea', '#ff9800', '#4caf50', '#2196f3'])
+                ))
+                fig.update_layout(height=300, margin=dict(t=20, b=20))
+                st.plotly_chart(fig, use_container_width=True)
+            st.dataframe(
+                funnel.style.format({'Conversion': '{:.0%}', 'Median Days in Status': '{:.1f}'}, na_rep='—'),
+                use_container_width=True
             )
+        
+        with col2:
+            st.subheader("👥 Cohorts")
+            cohort_by = st.radio("Group by", ['department', 'category'], horizontal=True,
+                                 format_func=str.capitalize, key="cohort_by")
+            with perf.span("analytics.cohorts", "data"):
+                cohort_stats = store.memo(('analytics.cohorts', period, cohort_by),
+                                          lambda: analytics.cohorts(period_ideas, cohort_by))
+            st.dataframe(
+                cohort_stats.style.format({
+                    'approval_rate': '{:.0%}',
+                    'median_days_to_decision': '{:.1f}',
+                    'avg_score': '{:.1f}',
+                    'cost_savings': '${:,.0f}',
+                    'revenue_impact': '${:,.0f}'
+                }, na_rep='—'),
+                use_container_width=True
+            )
+        
+        st.divider()
+        
+        # Submission trends
+        st.subheader("📈 Submission Trends")
+        with perf.span("compute.monthly_submissions", "data"):
+            ideas_by_month = get_compute().run(store, 'monthly_submissions')
+        
+        with perf.span("submission trend line", "chart"):
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(
+                x=ideas_by_month.index.astype(str),
+                y=ideas_by_month.values,
+                mode='lines+markers',
+                name='Ideas Submitted',
+                line=dict(color='#667eea', width=3),
+                marker=dict(size=10)
+            ))
             fig.update_layout(
-                height=300,
-                showlegend=False,
-                xaxis_title="Number of Ideas",
-                yaxis_title=""
+                title="Ideas Submitted Over Time",
+                xaxis_title="Month",
+                yaxis_title="Number of Ideas",
+                height=400
             )
             st.plotly_chart(fig, use_container_width=True)
         
+        st.divider()
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.subheader("🏢 Ideas by Department")
+            with perf.span("compute.department_counts", "data"):
+                dept_counts = get_compute().run(store, 'department_counts')
+            
+            with perf.span("department bar", "chart"):
+                fig = px.bar(
+                    x=dept_counts.values,
+                    y=dept_counts.index,
+                    orientation='h',
+                    color=dept_counts.values,
+                    color_continuous_scale='Blues'
+                )
+                fig.update_layout(
+                    height=300,
+                    showlegend=False,
+                    xaxis_title="Number of Ideas",
+                    yaxis_title=""
+                )
+                st.plotly_chart(fig, use_container_width=True)
+        
         with col2:
             st.subheader("✅ Success Rate")
-            total = len(st.session_state.ideas_df)
-            approved = len(st.session_state.ideas_df[st.session_state.ideas_df['status'].isin(['Approved', 'In Progress', 'Implemented'])])
-            rejected = len(st.session_state.ideas_df[st.session_state.ideas_df['status'] == 'Rejected'])
-            pending = total - approved - rejected
+            summary = queries.status_summary(store.ideas_df)
+            approved, rejected, pending = summary['approved'], summary['rejected'], summary['pending']
             
-            fig = go.Figure(data=[go.Pie(
-                labels=['Approved/In Progress', 'Rejected', 'Pending Review'],
-                values=[approved, rejected, pending],
-                hole=0.4,
-                marker=dict(colors=['#4caf50', '#f44336', '#ff9800'])
-            )])
-            fig.update_layout(height=300)
-            st.plotly_chart(fig, use_container_width=True)
+            with perf.span("success rate pie", "chart"):
+                fig = go.Figure(data=[go.Pie(
+                    labels=['Approved/In Progress', 'Rejected', 'Pending Review'],
+                    values=[approved, rejected, pending],
+                    hole=0.4,
+                    marker=dict(colors=['#4caf50', '#f44336', '#ff9800'])
+                )])
+                fig.update_layout(height=300)
+                st.plotly_chart(fig, use_container_width=True)
+        
+        st.divider()
+        
+        # Tag usage
+        st.subheader("🏷️ Ideas by Tag")
+        with perf.span("tag_index.counts", "data"):
+            tag_counts = store.tag_index.counts().most_common(15)
+        
+        if not tag_counts:
+            st.info("No tagged ideas yet.")
+        else:
+            with perf.span("tag counts bar", "chart"):
+                fig = px.bar(
+                    x=[tag for tag, _ in tag_counts],
+                    y=[count for _, count in tag_counts],
+                    color=[count for _, count in tag_counts],
+                    color_continuous_scale='Teal'
+                )
+                fig.update_layout(
+                    height=300,
+                    showlegend=False,
+                    coloraxis_showscale=False,
+                    xaxis_title="",
+                    yaxis_title="Number of Ideas"
+                )
+                st.plotly_chart(fig, use_container_width=True)
         
         st.divider()
         
@@ -993,16 +1472,15 @@ Provide an improved description that is professional, clear, and compelling."""
         st.subheader("💰 Business Impact")
         col1, col2, col3, col4 = st.columns(4)
         
-        total_savings = st.session_state.ideas_df['cost_savings'].fillna(0).sum()
-        total_revenue = st.session_state.ideas_df['revenue_impact'].fillna(0).sum()
-        avg_score = st.session_state.ideas_df[st.session_state.ideas_df['total_score'] > 0]['total_score'].mean()
+        impact = queries.impact_totals(store.ideas_df)
+        total_savings, total_revenue, avg_score = impact['cost_savings'], impact['revenue_impact'], impact['avg_score']
         
         col1.metric("💵 Cost Savings", f"${total_savings:,.0f}")
         col2.metric("📈 Revenue Impact", f"${total_revenue:,.0f}")
         col3.metric("🎯 Total Value", f"${total_savings + total_revenue:,.0f}")
         col4.metric("⭐ Avg Score", f"{avg_score:.1f}/40" if not pd.isna(avg_score) else "N/A")
     
-    with tab5:
+    with tab5, perf.span("Leaderboard", "tab"):
         st.title("🏆 Leaderboard")
         
         lead_tab1, lead_tab2, lead_tab3 = st.tabs(["👤 Top Contributors", "🏢 Departments", "💡 Top Ideas"])
@@ -1010,8 +1488,10 @@ Provide an improved description that is professional, clear, and compelling."""
         with lead_tab1:
             st.subheader("🌟 Top Innovators")
             
-            rankings = st.session_state.users_df.sort_values('points', ascending=False).head(10)
+            with perf.span("compute.top_contributors", "data"):
+                rankings = store.users_df.loc[get_compute().run(store, 'top_contributors')]
             
+            rank_levels = gamification.levels_for(rankings['points'])
             for idx, (i, row) in enumerate(rankings.iterrows()):
                 col1, col2, col3, col4, col5 = st.columns([1, 3, 2, 2, 2])
                 
@@ -1026,7 +1506,8 @@ Provide an improved description that is professional, clear, and compelling."""
                         st.markdown(f"### {idx+1}")
                 
                 with col2:
-                    level, level_name, emoji = calculate_level(row['points'])
+                    level = int(rank_levels[idx])
+                    _, level_name, emoji = gamification.LEVELS[level - 1]
                     st.markdown(f"**{row['username']}**")
                     st.caption(f"{emoji} Level {level}: {level_name}")
                 
@@ -1044,31 +1525,23 @@ Provide an improved description that is professional, clear, and compelling."""
         with lead_tab2:
             st.subheader("🏢 Department Rankings")
             
-            dept_data = st.session_state.ideas_df.merge(
-                st.session_state.users_df[['username', 'department']],
-                left_on='submitter',
-                right_on='username',
-                how='left'
-            )
-            
-            dept_stats = dept_data.groupby('department').agg({
-                'id': 'count',
-                'upvotes': 'sum',
-                'total_score': 'mean'
-            }).round(2)
-            
-            dept_stats.columns = ['Total Ideas', 'Total Upvotes', 'Avg Score']
-            dept_stats = dept_stats.sort_values('Total Ideas', ascending=False)
+            with perf.span("compute.department_rankings", "data"):
+                dept_stats = get_compute().run(store, 'department_rankings')
             
             st.dataframe(dept_stats, use_container_width=True)
         
         with lead_tab3:
             st.subheader("💡 Most Popular Ideas")
             
-            top_ideas = st.session_state.ideas_df.sort_values('upvotes', ascending=False).head(10)
+            st.caption("🔥 Ranked by trending score: recent votes and comments count most")
+            
+            with perf.span("trending.top", "data"):
+                top_ideas = [(store.get_idea(idea_id), score) for idea_id, score in get_trending().top(10)]
             
-            for idx, row in top_ideas.iterrows():
-                with st.expander(f"💡 {row['title']} - 👍 {row['upvotes']} upvotes"):
+            for row, score in top_ideas:
+                if row is None:
+                    continue
+                with st.expander(f"💡 {row['title']} - 🔥 {score:.1f} • 👍 {row['upvotes']} upvotes"):
                     col1, col2 = st.columns([3, 1])
                     with col1:
                         st.write(f"**Category:** {row['category']}")
@@ -1078,7 +1551,7 @@ Provide an improved description that is professional, clear, and compelling."""
                         st.metric("Status", row['status'])
                         st.metric("Comments", row['comments_count'])
     
-    with tab6:
+    with tab6, perf.span("Admin", "tab"):
         st.title("⚙️ Admin Dashboard")
         
         if user['role'] != 'Admin':
@@ -1087,17 +1560,27 @@ Provide an improved description that is professional, clear, and compelling."""
         else:
             st.success("👑 Administrator Access Granted")
             
-            admin_tab1, admin_tab2, admin_tab3 = st.tabs(["📋 Review Ideas", "👥 Manage Users", "📊 Reports"])
+            admin_tab1, admin_tab2, admin_tab3, admin_tab4, admin_tab5, admin_tab6 = st.tabs(["📋 Review Ideas", "👥 Manage Users", "📊 Reports", "⏱️ Performance", "🧾 Audit Trail", "🕰️ Point in Time"])
             
             with admin_tab1:
                 st.subheader("💡 Ideas Pending Review")
                 
-                pending = st.session_state.ideas_df[st.session_state.ideas_df['status'].isin(['New', 'Under Review'])]
+                with perf.span("ideas.pending_ideas", "data"):
+                    pending = queries.pending_ideas(store.ideas_df)
                 
                 if pending.empty:
                     st.info("🎉 No ideas pending review!")
                 else:
-                    for idx, row in pending.iterrows():
+                    # Each review card is a fragment: evaluating an idea only reruns its card
+                    @st.fragment
+                    def review_card(idea_id):
+                        row = store.get_idea(idea_id)
+                        if row is None:
+                            return
+                        if row['status'] not in queries.PENDING_STATUSES:
+                            st.info(f"📋 **{row['title']}** is now {row['status']}")
+                            return
+                        
                         with st.expander(f"💡 {row['title']} - {row['status']}"):
                             col1, col2 = st.columns([2, 1])
                             
@@ -1105,9 +1588,10 @@ Provide an improved description that is professional, clear, and compelling."""
                                 st.write(f"**Category:** {row['category']}")
                                 st.write(f"**Submitted by:** {row['submitter']} on {row['submit_date']}")
                                 st.write(f"**Description:** {row['description']}")
-                                st.write(f"**Problem:** {row['problem']}")
-                                st.write(f"**Solution:** {row['solution']}")
-                                st.write(f"**Benefits:** {row['benefits']}")
+                                details = store.get_details(idea_id) or {}
+                                st.write(f"**Problem:** {details.get('problem')}")
+                                st.write(f"**Solution:** {details.get('solution')}")
+                                st.write(f"**Benefits:** {details.get('benefits')}")
                             
                             with col2:
                                 st.metric("👍 Upvotes", row['upvotes'])
@@ -1116,57 +1600,58 @@ Provide an improved description that is professional, clear, and compelling."""
                             st.divider()
                             
                             # Evaluation form
-                            with st.form(f"eval_form_{idx}"):
+                            with st.form(f"eval_form_{idea_id}"):
                                 st.markdown("**📊 Evaluate Idea:**")
                                 
                                 col_a, col_b = st.columns(2)
                                 with col_a:
-                                    impact = st.slider("💥 Impact Score", 1, 10, 5, key=f"impact_{idx}")
-                                    feasibility = st.slider("🔧 Feasibility Score", 1, 10, 5, key=f"feas_{idx}")
+                                    impact = st.slider("💥 Impact Score", 1, 10, 5, key=f"impact_{idea_id}")
+                                    feasibility = st.slider("🔧 Feasibility Score", 1, 10, 5, key=f"feas_{idea_id}")
                                 with col_b:
-                                    innovation = st.slider("💡 Innovation Score", 1, 10, 5, key=f"innov_{idx}")
-                                    strategic = st.slider("🎯 Strategic Alignment", 1, 10, 5, key=f"strat_{idx}")
+                                    innovation = st.slider("💡 Innovation Score", 1, 10, 5, key=f"innov_{idea_id}")
+                                    strategic = st.slider("🎯 Strategic Alignment", 1, 10, 5, key=f"strat_{idea_id}")
                                 
-                                eval_comments = st.text_area("💬 Evaluation Comments", key=f"eval_comments_{idx}")
+                                eval_comments = st.text_area("💬 Evaluation Comments", key=f"eval_comments_{idea_id}")
                                 
                                 col1, col2, col3 = st.columns(3)
                                 
                                 with col1:
                                     if st.form_submit_button("✅ Approve", use_container_width=True):
-                                        st.session_state.ideas_df.loc[idx, 'status'] = 'Approved'
-                                        st.session_state.ideas_df.loc[idx, 'impact_score'] = impact
-                                        st.session_state.ideas_df.loc[idx, 'feasibility_score'] = feasibility
-                                        st.session_state.ideas_df.loc[idx, 'innovation_score'] = innovation
-                                        st.session_state.ideas_df.loc[idx, 'strategic_score'] = strategic
-                                        st.session_state.ideas_df.loc[idx, 'total_score'] = impact + feasibility + innovation + strategic
+                                        # Also counts the approval in the submitter's stats
+                                        store.set_status(row['id'], 'Approved', user['username'], scores={
+                                            'impact_score': impact,
+                                            'feasibility_score': feasibility,
+                                            'innovation_score': innovation,
+                                            'strategic_score': strategic
+                                        }, comment=eval_comments)
                                         
-                                        # Update user stats
                                         submitter = row['submitter']
-                                        user_idx = st.session_state.users_df[st.session_state.users_df['username'] == submitter].index
-                                        st.session_state.users_df.loc[user_idx, 'ideas_approved'] += 1
-                                        
                                         award_points(submitter, 100, "idea approved")
                                         st.success("✅ Idea approved!")
-                                        st.rerun()
+                                        rerun_fragment()
                                 
                                 with col2:
                                     if st.form_submit_button("🔄 Mark Under Review", use_container_width=True):
-                                        st.session_state.ideas_df.loc[idx, 'status'] = 'Under Review'
+                                        store.set_status(row['id'], 'Under Review', user['username'], comment=eval_comments)
                                         st.info("🔄 Status updated to Under Review")
-                                        st.rerun()
+                                        rerun_fragment()
                                 
                                 with col3:
                                     if st.form_submit_button("❌ Reject", use_container_width=True):
-                                        st.session_state.ideas_df.loc[idx, 'status'] = 'Rejected'
+                                        store.set_status(row['id'], 'Rejected', user['username'], comment=eval_comments)
                                         st.warning("❌ Idea rejected")
-                                        st.rerun()
+                                        rerun_fragment()
+                    
+                    for idea_id in pending['id']:
+                        review_card(int(idea_id))
             
             with admin_tab2:
                 st.subheader("👥 User Management")
                 
                 st.dataframe(
-                    st.session_state.users_df[['username', 'email', 'department', 'role', 'points', 'level', 'ideas_submitted', 'ideas_approved']],
-                    use_container_width=True
+                    store.users_df[['username', 'email', 'department', 'role', 'points', 'level', 'ideas_submitted', 'ideas_approved']],
+                    use_container_width=True,
+                    hide_index=True
                 )
                 
                 st.divider()
@@ -1177,7 +1662,7 @@ Provide an improved description that is professional, clear, and compelling."""
                     with col1:
                         new_username = st.text_input("Username")
                         new_email = st.text_input("Email")
-                        new_department = st.selectbox("Department", ['IT', 'Product', 'Marketing', 'Sales', 'HR', 'Finance', 'Operations'])
+                        new_department = st.selectbox("Department", store.departments.options())
                     with col2:
                         new_password = st.text_input("Password", type="password")
                         new_role = st.selectbox("Role", ['Employee', 'Admin'])
@@ -1186,7 +1671,7 @@ Provide an improved description that is professional, clear, and compelling."""
                         if new_username and new_password and new_email:
                             new_user = {
                                 'username': new_username,
-                                'password': hashlib.sha256(new_password.encode()).hexdigest(),
+                                'password': hash_password(new_password),
                                 'email': new_email,
                                 'department': new_department,
                                 'role': new_role,
@@ -1196,54 +1681,99 @@ Provide an improved description that is professional, clear, and compelling."""
                                 'ideas_submitted': 0,
                                 'ideas_approved': 0
                             }
-                            st.session_state.users_df = pd.concat([
-                                st.session_state.users_df,
-                                pd.DataFrame([new_user])
-                            ], ignore_index=True)
-                            st.success(f"✅ User {new_username} added successfully!")
-                            st.rerun()
+                            if store.add_user(new_user, user['username']):
+                                st.success(f"✅ User {new_username} added successfully!")
+                                st.rerun()
+                            else:
+                                st.error(f"User {new_username} already exists")
                         else:
                             st.error("Please fill in all fields")
-            
+
+                st.divider()
+
+                st.subheader("🗂️ Categories & Departments")
+                st.caption("The options offered when submitting ideas, filtering them and adding users. "
+                           "Renaming one updates every idea or user in it.")
+                for kind, label in (('categories', "Category"), ('departments', "Department")):
+                    dimension = store.dimension(kind)
+                    with st.expander(f"{label} list ({len(dimension.options())})"):
+                        st.dataframe(dimension.frame(), use_container_width=True, hide_index=True)
+                        with st.form(f"add_{kind}_form", clear_on_submit=True):
+                            new_name = st.text_input(f"New {label.lower()}").strip()
+                            if st.form_submit_button(f"➕ Add {label}"):
+                                if not new_name:
+                                    st.error(f"Please enter a {label.lower()} name")
+                                elif store.add_option(kind, new_name, user['username']) is None:
+                                    st.error(f"{label} {new_name} already exists")
+                                else:
+                                    st.success(f"✅ {label} {new_name} added")
+                                    st.rerun()
+                        with st.form(f"rename_{kind}_form"):
+                            col1, col2 = st.columns(2)
+                            old_name = col1.selectbox(label, dimension.options())
+                            renamed = col2.text_input("New name").strip()
+                            if st.form_submit_button(f"✏️ Rename {label}"):
+                                if not renamed:
+                                    st.error("Please enter the new name")
+                                elif store.rename_option(kind, dimension.id_for(old_name), renamed, user['username']):
+                                    st.success(f"✅ {old_name} renamed to {renamed}")
+                                    st.rerun()
+                                else:
+                                    st.error(f"{label} {renamed} already exists")
+
             with admin_tab3:
                 st.subheader("📊 Generate Reports")
                 
                 col1, col2 = st.columns(2)
+                export_buttons = {'ideas': (col1, "📥 Export All Ideas"), 'users': (col2, "📥 Export User Data")}
+                for kind, (column, label) in export_buttons.items():
+                    if column.button(label, use_container_width=True):
+                        job = get_exports().submit(kind, user['username'])
+                        if job is None:
+                            st.warning("⏳ The export queue is full. Please try again when a running export finishes.")
+                        elif job.status == 'done':
+                            st.info("✅ This data was already exported: download it below.")
+                        else:
+                            st.success("🚀 Export started: it will appear below when ready.")
                 
-                with col1:
-                    if st.button("📥 Export All Ideas", use_container_width=True):
-                        output = BytesIO()
-                        st.session_state.ideas_df.to_excel(output, index=False, engine='openpyxl')
-                        
-                        st.download_button(
-                            label="💾 Download Ideas Excel",
-                            data=output.getvalue(),
-                            file_name=f"ideas_export_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                            use_container_width=True
-                        )
+                @st.fragment(run_every=LIVE_UPDATE_SECONDS)
+                def recent_exports():
+                    st.markdown("**🗂️ Recent Exports**")
+                    pending, finished = get_exports().recent()
+                    for job in pending:
+                        label = exports.EXPORTS[job.kind][0]
+                        if job.status == 'failed':
+                            st.error(f"❌ {label} export (v{job.version}) failed: {job.error}")
+                        else:
+                            st.info(f"⏳ {label} export (v{job.version}) {job.status} • requested by {job.submitted_by} "
+                                    f"at {job.submitted_at.strftime('%H:%M:%S')}")
+                    if not pending and not finished:
+                        st.caption("No exports yet.")
+                    for artifact in finished:
+                        col1, col2 = st.columns([3, 1])
+                        col1.write(f"📄 **{exports.EXPORTS[artifact['kind']][0]}** • data version {artifact['version']} • "
+                                   f"{artifact['created'].strftime('%Y-%m-%d %H:%M')} • {artifact['size'] / 1024:.0f} KiB")
+                        with col2:
+                            st.download_button(
+                                label="💾 Download",
+                                # Read from disk only when clicked
+                                data=lambda path=artifact['path']: path.read_bytes(),
+                                file_name=f"{artifact['kind']}_export_{artifact['created'].strftime('%Y%m%d')}.xlsx",
+                                mime=exports.XLSX_MIME,
+                                key=f"download_{artifact['path'].name}",
+                                use_container_width=True
+                            )
                 
-                with col2:
-                    if st.button("📥 Export User Data", use_container_width=True):
-                        output = BytesIO()
-                        st.session_state.users_df.to_excel(output, index=False, engine='openpyxl')
-                        
-                        st.download_button(
-                            label="💾 Download Users Excel",
-                            data=output.getvalue(),
-                            file_name=f"users_export_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                            use_container_width=True
-                        )
+                recent_exports()
                 
                 st.divider()
                 
                 st.subheader("📈 Executive Summary")
                 
                 col1, col2, col3 = st.columns(3)
-                col1.metric("👥 Total Users", len(st.session_state.users_df))
-                col2.metric("💡 Total Ideas", len(st.session_state.ideas_df))
-                col3.metric("📊 Avg Idea Score", f"{st.session_state.ideas_df[st.session_state.ideas_df['total_score'] > 0]['total_score'].mean():.1f}/40")
+                col1.metric("👥 Total Users", len(store.users_df))
+                col2.metric("💡 Total Ideas", len(store.ideas_df))
+                col3.metric("📊 Avg Idea Score", f"{store.ideas_df[store.ideas_df['total_score'] > 0]['total_score'].mean():.1f}/40")
                 
                 st.markdown("""
                 ### 📋 Key Metrics
@@ -1253,6 +1783,190 @@ Provide an improved description that is professional, clear, and compelling."""
                 - **Innovation Impact:** Significant cost savings and revenue growth
                 - **User Engagement:** Active community with regular submissions
                 """)
+                
+                st.subheader("⏱️ Startup Performance")
+                startup = get_startup_metrics()
+                with startup['lock']:
+                    cold_start_ms = startup['cold_start_ms']
+                    first_paints = list(startup['first_paint_ms'])
+                
+                col1, col2, col3 = st.columns(3)
+                col1.metric("🧊 Cold Start", f"{cold_start_ms:.0f} ms" if cold_start_ms is not None else "N/A")
+                col2.metric("🎨 This Session's First Paint", f"{st.session_state.first_paint_ms:.0f} ms" if st.session_state.get('first_paint_ms') is not None else "N/A")
+                col3.metric("📊 Median First Paint", f"{pd.Series(first_paints).median():.0f} ms" if first_paints else "N/A")
+                st.caption(f"Measured over the last {len(first_paints)} sessions of this process")
+                
+                st.subheader("🗂️ Browse View Cache")
+                view_stats = get_view_cache().stats()
+                lookups = view_stats['hits'] + view_stats['misses']
+                col1, col2, col3 = st.columns(3)
+                col1.metric("📦 Cached Views", view_stats['entries'])
+                col2.metric("💾 Memory", f"{view_stats['bytes'] / 1024:.0f} KiB")
+                col3.metric("🎯 Hit Rate", f"{view_stats['hits'] / lookups:.0%}" if lookups else "N/A")
+                st.caption("Filtered and sorted idea lists shared by every session of this process until the next write")
+
+                st.divider()
+                st.subheader("🚦 Rate Limiting")
+                limiter = get_rate_limiter()
+                st.caption("Per-user quotas in this process: " + ", ".join(
+                    f"{THROTTLED_ACTIONS.get(action, action)} {burst} per {seconds:g}s"
+                    for action, (burst, seconds) in limiter.quotas.items()))
+                throttled, recent_refusals = limiter.report()
+                if not throttled:
+                    st.success("✅ No one has hit a quota")
+                else:
+                    col1, col2 = st.columns(2)
+                    col1.metric("👤 Throttled Users", len({row['username'] for row in throttled}))
+                    col2.metric("🚫 Refused Actions", sum(row['refused'] for row in throttled))
+                    st.dataframe(pd.DataFrame(throttled), use_container_width=True, hide_index=True)
+                    with st.expander(f"Latest refusals ({len(recent_refusals)})"):
+                        st.dataframe(pd.DataFrame(recent_refusals), use_container_width=True, hide_index=True)
+            
+            with admin_tab4:
+                st.subheader("⏱️ Rerun Profiling")
+                
+                profiling = st.toggle("Enable profiling for this process", value=perf.recorder.enabled)
+                perf.recorder.enabled = profiling
+                
+                if not profiling:
+                    st.info("Profiling is off. Enable it here or start the app with `IDEAS_PROFILE=1` "
+                            "(optionally `IDEAS_TRACE_FILE=trace.jsonl` and `IDEAS_METRICS_PORT=9464`).")
+                else:
+                    recent_runs = perf.recorder.recent()
+                    if not recent_runs:
+                        st.info("No reruns recorded yet. Interact with the app to collect timings.")
+                    else:
+                        totals = pd.Series([run['total_ms'] for run in recent_runs])
+                        col1, col2, col3 = st.columns(3)
+                        col1.metric("🔁 Recent Reruns", len(recent_runs))
+                        col2.metric("⏱️ p50 Rerun", f"{totals.quantile(0.5):.0f} ms")
+                        col3.metric("🐢 p95 Rerun", f"{totals.quantile(0.95):.0f} ms")
+                        
+                        st.markdown("**🐢 Slowest Sections in Recent Reruns**")
+                        st.dataframe(pd.DataFrame(perf.recorder.slowest_spans(20)), use_container_width=True)
+                        
+                        st.markdown("**📊 Latency Percentiles by Section**")
+                        st.dataframe(pd.DataFrame(perf.recorder.summary()).round(2), use_container_width=True)
+                        
+                        col1, col2, col3 = st.columns(3)
+                        with col1:
+                            st.download_button(
+                                label="💾 Prometheus Metrics",
+                                data=perf.recorder.prometheus_text(),
+                                file_name="ideas_metrics.prom",
+                                mime="text/plain",
+                                use_container_width=True
+                            )
+                        with col2:
+                            st.download_button(
+                                label="💾 Recent Traces (JSONL)",
+                                data="\n".join(json.dumps(run) for run in recent_runs) + "\n",
+                                file_name="ideas_trace.jsonl",
+                                mime="application/jsonl",
+                                use_container_width=True
+                            )
+                        with col3:
+                            if st.button("🗑️ Reset Timings", use_container_width=True):
+                                perf.recorder.reset()
+                                st.rerun()
+
+            with admin_tab5:
+                st.subheader("🧾 Reviewer Audit Trail")
+
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    reviewers = store.users_df.loc[store.users_df['role'] == 'Admin', 'username'].tolist()
+                    audit_reviewer = st.selectbox("👤 Reviewer", reviewers, key="audit_reviewer")
+                with col2:
+                    audit_status = st.selectbox("📋 Changed To", ['Any'] + queries.ALL_STATUSES, index=3, key="audit_status")
+                with col3:
+                    audit_period = st.selectbox("📅 Period", ["Last Quarter", "This Quarter", "Last 30 Days", "All Time"], key="audit_period")
+
+                since, until = {
+                    'Last Quarter': quarter_bounds(1),
+                    'This Quarter': quarter_bounds(0),
+                    'Last 30 Days': (datetime.now() - timedelta(days=30), None),
+                    'All Time': (None, None)
+                }[audit_period]
+                with perf.span("history.by_reviewer", "data"):
+                    changes = store.history.by_reviewer(
+                        audit_reviewer,
+                        to_status=None if audit_status == 'Any' else audit_status,
+                        since=since,
+                        until=until
+                    )
+
+                st.metric("🔁 Status Changes", len(changes))
+                if changes.empty:
+                    st.info("No matching status changes.")
+                else:
+                    titles = store.ideas_df['title'].reindex(changes['idea_id']).to_numpy()
+                    st.dataframe(
+                        changes.assign(title=titles)[['at', 'idea_id', 'title', 'from_status', 'to_status', 'score', 'comment']],
+                        use_container_width=True,
+                        hide_index=True
+                    )
+
+                st.divider()
+
+                st.subheader("⏳ Time to Decision by Category")
+                with perf.span("history.time_to_decision", "data"):
+                    decision_times = store.memo('history.time_to_decision',
+                                                lambda: store.history.time_to_decision(store.ideas_df, by='category'))
+                if decision_times.empty:
+                    st.info("No decisions recorded yet.")
+                else:
+                    st.dataframe(decision_times.round(1), use_container_width=True)
+            
+            with admin_tab6:
+                st.subheader("🕰️ Inspect or Restore a Point in Time")
+                
+                if not hasattr(store, 'tables_at'):
+                    st.info("Point-in-time recovery needs the SQLite store: unset IDEAS_DB or point it at a database file.")
+                else:
+                    st.caption("Every write is logged with the rows it changed; any moment since the oldest kept "
+                               "snapshot can be rebuilt from a snapshot plus that log.")
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        pitr_date = st.date_input("Date", value=datetime.now().date(), key="pitr_date")
+                    with col2:
+                        pitr_time = st.time_input("Time", value=datetime.now().time().replace(microsecond=0),
+                                                  step=60, key="pitr_time")
+                    pitr_at = datetime.combine(pitr_date, pitr_time)
+                    
+                    col1, col2 = st.columns(2)
+                    if col1.button("🔍 Inspect", use_container_width=True):
+                        try:
+                            with perf.span("sqlstore.tables_at", "data"):
+                                st.session_state.pitr_tables = (pitr_at, store.tables_at(pitr_at))
+                        except ValueError as error:
+                            st.session_state.pitr_tables = None
+                            st.error(f"❌ {error}")
+                    if col2.button("💾 Write Restored Copy", use_container_width=True):
+                        copy_path = f"{os.environ.get('IDEAS_DB', DEFAULT_DB)}.restored-{pitr_at.strftime('%Y%m%dT%H%M%S')}"
+                        try:
+                            store.write_copy(pitr_at, copy_path)
+                            st.success(f"✅ Wrote the store as of {pitr_at} to `{copy_path}`. To roll back, stop the "
+                                       "app and start it on the copy:")
+                            st.code(f"IDEAS_DB={copy_path} streamlit run App.py")
+                        except (ValueError, FileExistsError) as error:
+                            st.error(f"❌ {error}")
+                    
+                    inspected = st.session_state.get('pitr_tables')
+                    if inspected:
+                        inspected_at, tables = inspected
+                        st.markdown(f"**As of {inspected_at}:**")
+                        col1, col2, col3, col4 = st.columns(4)
+                        col1.metric("💡 Ideas", len(tables['ideas']), len(tables['ideas']) - len(store.ideas_df))
+                        col2.metric("👥 Users", len(tables['users']), len(tables['users']) - len(store.users_df))
+                        col3.metric("💬 Comments", len(tables['comments']), len(tables['comments']) - len(store.comments_df))
+                        col4.metric("👍 Upvotes", int(tables['ideas']['upvotes'].sum()),
+                                    int(tables['ideas']['upvotes'].sum() - store.ideas_df['upvotes'].sum()))
+                        st.dataframe(
+                            tables['ideas'][['id', 'title', 'submitter', 'status', 'upvotes', 'comments_count', 'total_score']],
+                            use_container_width=True,
+                            hide_index=True
+                        )
 
 # Footer
 st.divider()
@@ -1265,3 +1979,6 @@ st.markdown("""
     </p>
 </div>
 """, unsafe_allow_html=True)
+
+perf.recorder.end_run()
+record_first_paint()
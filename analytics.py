@@ -0,0 +1,143 @@
+# analytics.py - Period, funnel and cohort metrics over the ideas and their status history
+"""
+prepare() parses and encodes the ideas, users and status transitions once per
+store version into two tables: one row per idea (its cohort keys, values and
+the first time it reached each funnel stage) and one row per stay in a
+status. Every metric below is a vectorized aggregation over those tables
+(bincount, one groupby) rather than a separate filter of the raw frames.
+"""
+import numpy as np
+import pandas as pd
+
+FUNNEL = ['New', 'Under Review', 'Approved', 'Implemented']
+# Funnel stage each status implies (Rejected is a decision taken under review)
+STAGE_OF = {'New': 0, 'Under Review': 1, 'Rejected': 1, 'Approved': 2, 'In Progress': 2, 'Implemented': 3}
+DECISIONS = ['Approved', 'Rejected']
+PERIOD_DAYS = {'Last 7 Days': 7, 'Last 30 Days': 30, 'Last 90 Days': 90, 'Last Year': 365, 'All Time': None}
+REACHED = [f"reached_{stage}" for stage in FUNNEL]
+
+def prepare(ideas_df, users_df, transitions_df):
+    """Per-idea facts and per-status stays for the current data"""
+    history = pd.DataFrame({
+        'idea_id': transitions_df['idea_id'].to_numpy(dtype=np.int64),
+        'status': transitions_df['to_status'].to_numpy(),
+        'at': pd.to_datetime(transitions_df['at'], format='%Y-%m-%d %H:%M:%S').to_numpy()
+    }).sort_values(['idea_id', 'at'], kind='stable')
+
+    # A stay lasts until the idea's next transition (still open if there is none)
+    same_idea = history['idea_id'].to_numpy()[1:] == history['idea_id'].to_numpy()[:-1]
+    left = np.append(np.where(same_idea, history['at'].to_numpy()[1:], np.datetime64('NaT')), np.datetime64('NaT'))
+    stays = history.assign(left=left)
+
+    # First time each idea reached each stage: where its running maximum stage goes up.
+    # Skipped stages (e.g. straight to Approved) count as reached at the same time.
+    stage = history['status'].map(STAGE_OF).fillna(0).astype(np.int64)
+    running = stage.groupby(history['idea_id']).cummax()
+    previous = running.groupby(history['idea_id']).shift(fill_value=-1)
+    ups = history[running > previous].assign(stage=running[running > previous])
+    reached = ups.pivot_table(index='idea_id', columns='stage', values='at', aggfunc='min')
+    reached = reached.reindex(columns=range(len(FUNNEL))).bfill(axis=1).astype('datetime64[ns]')
+    reached.columns = REACHED
+
+    decided = history[history['status'].isin(DECISIONS)].groupby('idea_id')['at'].min().astype('datetime64[ns]')
+
+    departments = users_df.set_index('username')['department']
+    facts = pd.DataFrame({
+        'id': ideas_df['id'].to_numpy(dtype=np.int64),
+        'category': ideas_df['category'].to_numpy(),
+        'department': ideas_df['submitter'].map(departments).fillna('Unknown').to_numpy(),
+        'submitted': pd.to_datetime(ideas_df['submit_date'], format='%Y-%m-%d').to_numpy(),
+        'cost_savings': ideas_df['cost_savings'].fillna(0).to_numpy(dtype=np.float64),
+        'revenue_impact': ideas_df['revenue_impact'].fillna(0).to_numpy(dtype=np.float64),
+        'total_score': ideas_df['total_score'].to_numpy(dtype=np.float64)
+    })
+    facts = facts.join(reached, on='id').join(decided.rename('decided'), on='id')
+    # Ideas without any recorded history were at least submitted
+    facts['reached_New'] = facts['reached_New'].fillna(facts['submitted'])
+    return {'facts': facts, 'stays': stays}
+
+def _window_labels(times, now, days):
+    """0 for the previous period, 1 for the current one, -1 otherwise (days=None: all time is current)"""
+    times = np.asarray(times, dtype='datetime64[ns]')
+    if days is None:
+        return np.where(np.isnat(times), -1, 1)
+    days = np.timedelta64(days, 'D')
+    edges = np.array([now - 2 * days, now - days, now], dtype='datetime64[ns]')
+    labels = np.searchsorted(edges, times, side='right') - 1
+    labels[np.isnat(times) | (labels > 1)] = -1
+    return labels
+
+def period_deltas(prepared, days, now=None):
+    """Current-period totals and their change against the period before (no change for all time)"""
+    facts = prepared['facts']
+    now = np.datetime64(now or pd.Timestamp.now(), 'ns')
+    submitted = _window_labels(facts['submitted'], now, days)
+    approved = _window_labels(facts['reached_Approved'], now, days)
+    implemented = _window_labels(facts['reached_Implemented'], now, days)
+    scored = facts['total_score'].to_numpy() > 0
+
+    def per_window(labels, weights=None):
+        keep = labels >= 0
+        return np.bincount(labels[keep], weights=None if weights is None else weights[keep], minlength=2)
+
+    score_sums = per_window(submitted, np.where(scored, facts['total_score'].to_numpy(), 0))
+    score_counts = per_window(submitted, scored.astype(np.float64))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_score = score_sums / score_counts
+    metrics = {
+        'submitted': per_window(submitted),
+        'approved': per_window(approved),
+        'implemented': per_window(implemented),
+        'cost_savings': per_window(submitted, facts['cost_savings'].to_numpy()),
+        'revenue_impact': per_window(submitted, facts['revenue_impact'].to_numpy()),
+        'avg_score': avg_score
+    }
+    return {name: {'current': values[1], 'previous': values[0] if days else None,
+                   'delta': values[1] - values[0] if days else None}
+            for name, values in metrics.items()}
+
+def in_period(prepared, days, now=None):
+    """The prepared tables restricted to ideas submitted within the last `days` (all if None)"""
+    if days is None:
+        return prepared
+    now = pd.Timestamp(now or pd.Timestamp.now())
+    facts = prepared['facts']
+    facts = facts[facts['submitted'] >= now - pd.Timedelta(days=days)]
+    stays = prepared['stays']
+    return {'facts': facts, 'stays': stays[stays['idea_id'].isin(facts['id'])]}
+
+def funnel(prepared):
+    """Ideas reaching each stage, conversion from the previous stage and median days spent in it"""
+    facts, stays = prepared['facts'], prepared['stays']
+    reached = facts[REACHED].notna().sum().to_numpy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        conversion = reached / np.concatenate([[reached[0]], reached[:-1]])
+    closed = stays[stays['left'].notna()]
+    days = (closed['left'] - closed['at']) / pd.Timedelta(days=1)
+    median_days = days.groupby(closed['status']).median()
+    return pd.DataFrame({
+        'Ideas': reached,
+        'Conversion': conversion,
+        'Median Days in Status': median_days.reindex(FUNNEL).to_numpy()
+    }, index=pd.Index(FUNNEL, name='stage'))
+
+def cohorts(prepared, by):
+    """Per-department or per-category outcome metrics, in one groupby"""
+    facts = prepared['facts']
+    days_to_decision = (facts['decided'] - facts['submitted']) / pd.Timedelta(days=1)
+    grouped = facts.assign(
+        approved=facts['reached_Approved'].notna(),
+        implemented=facts['reached_Implemented'].notna(),
+        days_to_decision=days_to_decision,
+        score=facts['total_score'].where(facts['total_score'] > 0)
+    ).groupby(by).agg(
+        ideas=('id', 'size'),
+        approved=('approved', 'sum'),
+        implemented=('implemented', 'sum'),
+        median_days_to_decision=('days_to_decision', 'median'),
+        avg_score=('score', 'mean'),
+        cost_savings=('cost_savings', 'sum'),
+        revenue_impact=('revenue_impact', 'sum')
+    )
+    grouped.insert(3, 'approval_rate', grouped['approved'] / grouped['ideas'])
+    return grouped.sort_values('ideas', ascending=False)
@@ -0,0 +1,472 @@
+# api.py - Headless REST/JSON API over the shared idea store, for integrations and load tests
+"""
+Usage:
+    python api.py                                    # http://localhost:8502/api/v1 on ideas.db
+    python api.py --db /data/ideas.db --port 8502
+    python api.py --db /tmp/load.db --synthetic 100000
+    python serve.py --workers 4 --api-port 8502      # alongside the app workers
+
+The API is a plain ASGI app, served by uvicorn in its own process. It opens
+the app's SQLite database (see sqlstore.py), so its writes reach every app
+worker through the events table and theirs reach it; nothing goes through a
+Streamlit rerun. Requests authenticate with HTTP Basic and the app's
+accounts. Writes pay the same points as the UI and count against the same
+per-user quotas (ratelimit.py), enforced in this process.
+
+    GET   /api/v1/health                             (no authentication)
+    GET   /api/v1/ideas?status=&category=&submitter=&tag=&limit=&cursor=
+    GET   /api/v1/ideas?ids=3,5,8                    batch read
+    POST  /api/v1/ideas                              submit
+    GET   /api/v1/ideas/{id}                         with problem/solution/benefits/resources
+    PATCH /api/v1/ideas/{id}                         status and scores (admins)
+    POST  /api/v1/ideas/{id}/votes
+    GET   /api/v1/ideas/{id}/comments?limit=&cursor=
+    POST  /api/v1/ideas/{id}/comments
+    GET   /api/v1/leaderboard?limit=
+    GET   /api/v1/stats
+    GET   /api/v1/categories, /api/v1/departments
+    GET   /api/v1/throttled                          rate limit report (admins)
+    POST  /api/v1/batch                              {"requests": [{"method", "path", "body"}, ...]}
+
+Every GET carries ETag W/"<data version>" (the store's event version, the
+same in every process); If-None-Match with the current tag is answered 304
+before any work. Lists page newest first with opaque cursors that stay valid
+while new ideas and comments arrive (keyset on idea id, comment position).
+Ideas are not deleted: the store has no delete, rejecting one is the archive.
+"""
+import argparse
+import asyncio
+import base64
+import binascii
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+import numpy as np
+import pandas as pd
+import gamification
+import queries
+import synthetic
+from ratelimit import RateLimiter
+from tags import format_tags, normalize_tags
+from trending import TrendingScores
+from viewcache import ViewCache, view_key
+
+API_PORT = 8502
+PREFIX = '/api/v1'
+PAGE_LIMIT = 20
+MAX_LIMIT = 100
+BATCH_MAX = 50
+MAX_BODY = 1024 * 1024
+# Public user columns (no password hash or e-mail)
+USER_FIELDS = ['username', 'department', 'role', 'points', 'level', 'ideas_submitted', 'ideas_approved']
+REQUIRED_IDEA_FIELDS = ['title', 'description', 'category', 'problem', 'solution', 'benefits']
+SCORE_FIELDS = ['impact_score', 'feasibility_score', 'innovation_score', 'strategic_score']
+# Points per write, as in the app
+POINTS = {'submit': 10, 'upvote': 1, 'comment': 2, 'approved': 100}
+
+logger = logging.getLogger(__name__)
+
+class ApiError(Exception):
+    """A request the API answers with an error status and message"""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+def _records(df):
+    """Rows as dicts of plain Python values (None for missing)"""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+def _plain(value):
+    """json.dumps fallback for numpy scalars and datetimes"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def _number(value):
+    return None if pd.isna(value) else float(value)
+
+def encode_cursor(value):
+    return base64.urlsafe_b64encode(str(value).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        return int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ApiError(400, "Invalid cursor")
+
+def _optional(body, field, kind, description):
+    """body[field] if it is None or of kind (never a bool, though bools are ints), else a 400"""
+    value = body.get(field)
+    if value is not None and (not isinstance(value, kind) or isinstance(value, bool)):
+        raise ApiError(400, f"{field} must be {description}")
+    return value
+
+def _limit(query):
+    try:
+        limit = int(query.get('limit', [PAGE_LIMIT])[0])
+    except ValueError:
+        raise ApiError(400, "limit must be an integer")
+    return min(max(limit, 1), MAX_LIMIT)
+
+class IdeaApi:
+    """ASGI application serving one store"""
+
+    def __init__(self, store, limiter=None):
+        self.store = store
+        self.limiter = limiter or RateLimiter()
+        self.trending = TrendingScores(store)
+        # Filtered id lists shared by every client until the next write, as Browse Ideas does
+        self.views = ViewCache()
+        routes = [
+            ('GET', r'/health', self.health, False),
+            ('GET', r'/ideas', self.list_ideas, True),
+            ('POST', r'/ideas', self.create_idea, True),
+            ('GET', r'/ideas/(?P<idea_id>\d+)', self.get_idea, True),
+            ('PATCH', r'/ideas/(?P<idea_id>\d+)', self.update_idea, True),
+            ('POST', r'/ideas/(?P<idea_id>\d+)/votes', self.vote, True),
+            ('GET', r'/ideas/(?P<idea_id>\d+)/comments', self.list_comments, True),
+            ('POST', r'/ideas/(?P<idea_id>\d+)/comments', self.add_comment, True),
+            ('GET', r'/leaderboard', self.leaderboard, True),
+            ('GET', r'/stats', self.stats, True),
+            ('GET', r'/(?P<kind>categories|departments)', self.dimension, True),
+            ('GET', r'/throttled', self.throttled, True),
+            ('POST', r'/batch', self.batch, True)
+        ]
+        self.routes = [(method, re.compile(f'^{PREFIX}{pattern}$'), handler, auth)
+                       for method, pattern, handler, auth in routes]
+
+    # Dispatch
+    def handle(self, method, path, query, headers, body, user=None):
+        """(status, payload, headers) for one request; user is set for the parts of a batch"""
+        try:
+            matches = [(route_method, match, handler, auth) for route_method, pattern, handler, auth in self.routes
+                       if (match := pattern.match(path))]
+            if not matches:
+                raise ApiError(404, f"No such resource: {path}")
+            route = next((route for route in matches if route[0] == method), None)
+            if route is None:
+                raise ApiError(405, f"{method} not allowed on {path}",
+                               {'Allow': ', '.join(route[0] for route in matches)})
+            _, match, handler, auth = route
+            if auth and user is None:
+                user = self.authenticate(headers)
+            self.store.sync()
+            etag = f'W/"{self.store.data_version}"'
+            if method == 'GET' and etag in headers.get('if-none-match', ''):
+                return 304, None, {'ETag': etag}
+            if isinstance(body, bytes):
+                try:
+                    body = json.loads(body) if body else {}
+                except ValueError:
+                    raise ApiError(400, "The request body is not valid JSON")
+            if not isinstance(body, dict):
+                raise ApiError(400, "The request body must be a JSON object")
+            result = handler(user, query, body, **{name: int(value) if name.endswith('_id') else value
+                                                   for name, value in match.groupdict().items()})
+            status, payload = result if isinstance(result, tuple) else (200, result)
+            if method != 'GET':
+                return status, payload, {}
+            return status, payload, {'ETag': f'W/"{self.store.data_version}"', 'Cache-Control': 'private, no-cache'}
+        except ApiError as error:
+            return error.status, {'error': str(error)}, error.headers
+        except Exception:
+            # A bug, not the client's fault: answer this request (or this part of a batch) alone
+            logger.exception("%s %s failed", method, path)
+            return 500, {'error': "Internal server error"}, {}
+
+    def authenticate(self, headers):
+        scheme, _, credentials = headers.get('authorization', '').partition(' ')
+        user = None
+        if scheme.lower() == 'basic':
+            try:
+                username, _, password = base64.b64decode(credentials).decode().partition(':')
+            except (binascii.Error, UnicodeDecodeError):
+                username = password = ''
+            user = queries.authenticate(self.store.users_df, username, password)
+        if user is None:
+            raise ApiError(401, "Authentication required", {'WWW-Authenticate': 'Basic realm="ideas"'})
+        return user
+
+    def _allow(self, user, action):
+        if not self.limiter.allow(user['username'], action):
+            retry_after = self.limiter.retry_after(user['username'], action)
+            raise ApiError(429, f"Too many {action} requests", {'Retry-After': str(int(retry_after) + 1)})
+
+    def _award(self, username, action):
+        self.store.award_points(username, POINTS[action], gamification.level_for)
+
+    def _idea(self, idea_id):
+        if not self.store.has_idea(idea_id):
+            raise ApiError(404, f"No idea {idea_id}")
+        return _records(self.store.ideas_df.loc[[idea_id]])[0]
+
+    # Ideas
+    def health(self, user, query, body):
+        return {'status': 'ok', 'version': self.store.data_version}
+
+    def list_ideas(self, user, query, body):
+        store = self.store
+        if 'ids' in query:
+            try:
+                ids = [int(idea_id) for idea_id in ','.join(query['ids']).split(',') if idea_id]
+            except ValueError:
+                raise ApiError(400, "ids must be comma-separated integers")
+            if len(ids) > MAX_LIMIT:
+                raise ApiError(400, f"At most {MAX_LIMIT} ids per request")
+            found = [idea_id for idea_id in ids if store.has_idea(idea_id)]
+            missing = set(ids) - set(found)
+            return {'ideas': _records(store.ideas_df.loc[found]),
+                    'missing': [idea_id for idea_id in ids if idea_id in missing]}
+        statuses = query.get('status', queries.ALL_STATUSES)
+        category_ids = (store.categories.ids_for(query['category']) if 'category' in query
+                        else list(store.categories.names) + [0])
+        submitter = query.get('submitter', ['All'])[0]
+        tags = normalize_tags(','.join(query.get('tag', [])))
+        limit = _limit(query)
+
+        def matching_ids():
+            tagged_ids = store.tag_index.ids_for(tags) if tags else None
+            filtered = queries.filter_ideas(store.ideas_df, statuses, category_ids, submitter, tagged_ids)
+            return np.sort(filtered['id'].to_numpy(dtype='int64'))
+
+        ids = self.views.get(view_key(statuses, category_ids, submitter, tags, 'api'), store.version, matching_ids)
+        # Newest first: the page ends just below the cursor's id
+        end = np.searchsorted(ids, decode_cursor(query['cursor'][0])) if 'cursor' in query else len(ids)
+        page = ids[max(end - limit, 0):end][::-1].tolist()
+        return {'ideas': _records(store.ideas_df.loc[page]), 'total': len(ids),
+                'next_cursor': encode_cursor(page[-1]) if end > limit else None}
+
+    def create_idea(self, user, query, body):
+        for field in REQUIRED_IDEA_FIELDS + ['resources']:
+            _optional(body, field, str, "a string")
+        tags = body.get('tags')
+        if tags is not None and not isinstance(tags, str) and \
+                not (isinstance(tags, list) and all(isinstance(tag, str) for tag in tags)):
+            raise ApiError(400, "tags must be a string or a list of strings")
+        missing = [field for field in REQUIRED_IDEA_FIELDS if not str(body.get(field) or '').strip()]
+        if missing:
+            raise ApiError(400, f"Missing required fields: {', '.join(missing)}")
+        if body['category'] not in self.store.categories.ids:
+            raise ApiError(400, f"Unknown category {body['category']!r}; see {PREFIX}/categories")
+        self._allow(user, 'submit')
+        tag_list = normalize_tags(tags if isinstance(tags, str) else ','.join(tags or []))
+        new_idea = {
+            'title': body['title'],
+            'description': body['description'],
+            'category': body['category'],
+            'problem': body['problem'],
+            'solution': body['solution'],
+            'benefits': body['benefits'],
+            'resources': body.get('resources') or 'Not specified',
+            'submitter': user['username'],
+            'submit_date': datetime.now().strftime('%Y-%m-%d'),
+            'status': 'New',
+            'upvotes': 0,
+            'comments_count': 0,
+            'impact_score': 0,
+            'feasibility_score': 0,
+            'innovation_score': 0,
+            'strategic_score': 0,
+            'total_score': 0,
+            'tags': format_tags(tag_list),
+            'cost_savings': 0,
+            'revenue_impact': 0
+        }
+        idea_id = self.store.add_idea(new_idea, tag_list, user['username'])
+        self._award(user['username'], 'submit')
+        return 201, self._idea(idea_id)
+
+    def get_idea(self, user, query, body, idea_id):
+        idea = self._idea(idea_id)
+        idea.update(self.store.get_details(idea_id) or {})
+        idea['threads'] = self.store.threads.count(idea_id)
+        return idea
+
+    def update_idea(self, user, query, body, idea_id):
+        """Review an idea: {"status": ..., "scores": {...}, "comment": ...}"""
+        if user['role'] != 'Admin':
+            raise ApiError(403, "Only administrators can change an idea's status")
+        previous = self._idea(idea_id)
+        status = body.get('status')
+        if status not in queries.ALL_STATUSES:
+            raise ApiError(400, f"status must be one of {', '.join(queries.ALL_STATUSES)}")
+        comment = _optional(body, 'comment', str, "a string")
+        scores = body.get('scores') or None
+        if scores is not None:
+            if not isinstance(scores, dict) or set(scores) - set(SCORE_FIELDS) or \
+                    not all(isinstance(value, int) and not isinstance(value, bool) and 1 <= value <= 10 for value in scores.values()):
+                raise ApiError(400, f"scores maps {', '.join(SCORE_FIELDS)} to integers from 1 to 10")
+        self.store.set_status(idea_id, status, user['username'], scores=scores, comment=comment)
+        if status == 'Approved' and previous['status'] != 'Approved':
+            self._award(previous['submitter'], 'approved')
+        return self._idea(idea_id)
+
+    def vote(self, user, query, body, idea_id):
+        self._idea(idea_id)
+        self._allow(user, 'upvote')
+        upvotes = self.store.upvote(idea_id, user['username'])
+        if upvotes is None:
+            raise ApiError(404, f"No idea {idea_id}")
+        self._award(user['username'], 'upvote')
+        return {'idea_id': idea_id, 'upvotes': upvotes}
+
+    # Comments
+    def list_comments(self, user, query, body, idea_id):
+        self._idea(idea_id)
+        threads = self.store.threads
+        end = decode_cursor(query['cursor'][0]) if 'cursor' in query else None
+        ids, start = threads.page_before(idea_id, end, _limit(query))
+        comments_df = self.store.comments_df
+        page = [dict(comment, reply_count=threads.reply_count(comment['id']),
+                     replies=_records(comments_df.loc[threads.reply_page(comment['id'])]))
+                for comment in _records(comments_df.loc[ids])]
+        return {'comments': page,
+                'total': threads.count(idea_id), 'next_cursor': encode_cursor(start) if start > 0 else None}
+
+    def add_comment(self, user, query, body, idea_id):
+        """{"comment": ..., "parent_id": optional top-level comment to reply to}"""
+        text = (_optional(body, 'comment', str, "a string") or '').strip()
+        if not text:
+            raise ApiError(400, "comment is required")
+        parent_id = _optional(body, 'parent_id', int, "a comment id or null")
+        self._idea(idea_id)
+        self._allow(user, 'comment')
+        comment_id = self.store.add_comment(idea_id, user['username'], text, parent_id=parent_id)
+        if comment_id is None:
+            raise ApiError(404, f"No comment {parent_id} on idea {idea_id}")
+        self._award(user['username'], 'comment')
+        return 201, _records(self.store.comments_df.loc[[comment_id]])[0]
+
+    # Aggregates
+    def leaderboard(self, user, query, body):
+        limit = _limit(query)
+        users_df = self.store.users_df
+        return {'users': self.store.memo(('api.leaderboard', limit),
+                                         lambda: _records(queries.top_contributors(users_df, limit)[USER_FIELDS]))}
+
+    def stats(self, user, query, body):
+        store = self.store
+        # Same memo keys as the dashboard, so a shared store serves both
+        summary = store.memo('status_summary', lambda: queries.status_summary(store.ideas_df))
+        impact = store.memo('impact_totals', lambda: queries.impact_totals(store.ideas_df))
+        categories = store.memo('api.category_counts', lambda: store.ideas_df['category'].value_counts().to_dict())
+        departments = store.memo('api.department_counts',
+                                 lambda: queries.department_counts(store.ideas_df, store.users_df).to_dict())
+        trending = [{'idea_id': idea_id, 'title': store.ideas_df.at[idea_id, 'title'], 'score': score}
+                    for idea_id, score in self.trending.top(10) if store.has_idea(idea_id)]
+        return {'ideas': summary, 'impact': {name: _number(value) for name, value in impact.items()},
+                'categories': categories, 'departments': departments, 'trending': trending}
+
+    def dimension(self, user, query, body, kind):
+        return {kind: _records(self.store.dimension(kind).frame())}
+
+    def throttled(self, user, query, body):
+        if user['role'] != 'Admin':
+            raise ApiError(403, "Only administrators can see the rate limit report")
+        throttled, recent = self.limiter.report()
+        return {'quotas': self.limiter.quotas, 'throttled': throttled, 'recent': recent}
+
+    def batch(self, user, query, body):
+        """Run up to BATCH_MAX requests in order as the same user; each gets its own status"""
+        requests = body.get('requests')
+        if not isinstance(requests, list) or not 0 < len(requests) <= BATCH_MAX:
+            raise ApiError(400, f"requests must be a list of 1 to {BATCH_MAX} requests")
+        responses = []
+        for request in requests:
+            if not isinstance(request, dict) or not isinstance(request.get('path'), str):
+                responses.append({'status': 400, 'body': {'error': "Each request needs a path"}})
+                continue
+            url = urlsplit(request['path'])
+            method = str(request.get('method', 'GET')).upper()
+            if url.path == f'{PREFIX}/batch':
+                responses.append({'status': 400, 'body': {'error': "Batches can't be nested"}})
+                continue
+            status, payload, _ = self.handle(method, url.path, parse_qs(url.query), {}, request.get('body') or {},
+                                             user=user)
+            responses.append({'status': status, 'body': payload})
+        return {'responses': responses}
+
+    # ASGI
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while (message := await receive())['type'] != 'lifespan.shutdown':
+                await send({'type': 'lifespan.startup.complete'})
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+        if scope['type'] != 'http':
+            return
+        body = b''
+        more = True
+        while more:
+            message = await receive()
+            body += message.get('body', b'')
+            more = message.get('more_body', False)
+            if len(body) > MAX_BODY:
+                await self._send(send, 413, {'error': "Request body too large"}, {})
+                return
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        # Store calls block (SQLite waits for its write lock): keep them off the event loop
+        status, payload, extra = await asyncio.to_thread(
+            self.handle, scope['method'], scope['path'], parse_qs(scope['query_string'].decode('latin-1')),
+            headers, body)
+        await self._send(send, status, payload, extra)
+
+    async def _send(self, send, status, payload, extra):
+        data = b'' if payload is None else json.dumps(payload, default=_plain).encode()
+        headers = [(b'content-type', b'application/json'), (b'content-length', str(len(data)).encode())]
+        headers += [(name.lower().encode('latin-1'), str(value).encode('latin-1')) for name, value in extra.items()]
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': data})
+
+def _seeded(path):
+    if not Path(path).exists():
+        return False
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT 1 FROM sqlite_master WHERE name = 'events'").fetchone() is not None
+
+def open_store(path, synthetic_size=None, wait=False):
+    """The SQLite store at path: the app's database, or a new one with synthetic_size ideas of synthetic data
+
+    wait: poll until an app worker has seeded the database (it does on its first session).
+    """
+    from sqlstore import SqliteIdeaStore
+
+    if synthetic_size:
+        data = synthetic.generate_data(max(synthetic_size // 20, 10), synthetic_size, 2 * synthetic_size)
+        return SqliteIdeaStore(path, data['users'], data['ideas'], data['comments'], data['transitions'])
+    while wait and not _seeded(path):
+        time.sleep(1)
+    if not _seeded(path):
+        raise SystemExit(f"{path} has no idea store yet: start the app on it once, or pass --synthetic N")
+    # The frames only seed an empty database
+    return SqliteIdeaStore(path, pd.DataFrame(), pd.DataFrame(), pd.DataFrame())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the idea store as a REST/JSON API")
+    parser.add_argument('--db', default=os.environ.get('IDEAS_DB') or 'ideas.db', help="the app's SQLite database")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=API_PORT)
+    parser.add_argument('--synthetic', type=int, help="seed a new database with this many synthetic ideas")
+    parser.add_argument('--wait', action='store_true', help="wait for the app to seed the database")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    app = IdeaApi(open_store(args.db, args.synthetic, args.wait))
+    print(f"Idea API on http://{args.host}:{args.port}{PREFIX} over {args.db}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,455 @@
+# bench.py - Benchmarks for the app's data operations and full Streamlit reruns
+"""
+Usage:
+    python bench.py                                    # data operations at 1k and 100k ideas
+    python bench.py --sizes 1000 100000 1000000 --repeat 3
+    python bench.py --sessions 8 --reruns 5 --app-size 10000
+    python bench.py --workers 1 2 4 --sessions 8       # multi-process scaling over a shared SQLite store
+    python bench.py --api 8 --app-size 10000           # the same store through the REST API (api.py)
+    python bench.py --json results.json                # save results
+    python bench.py --baseline results.json            # fail if anything got slower
+
+A size N means N ideas, N // 20 users (at least 10) and 2 * N comments,
+generated deterministically by synthetic.py.
+
+--workers runs the deployment of serve.py without the HTTP layer: W worker
+processes share one SQLite database (IDEAS_DB) and split the sessions between
+them, each worker serving its sessions in turn the way one Streamlit process
+does. Every timed operation is an upvote (a write every worker must pick up)
+followed by a rerun. Throughput should grow with W until the cores run out;
+on a single core it stays flat, which is the GIL-bound baseline.
+
+--api runs api.py on a seeded SQLite store and drives it with that many
+HTTP clients (keep-alive connections, one thread each). Its vote+get
+operation is the API counterpart of the UI's upvote+rerun above; list and
+get_304 (a conditional GET answered Not Modified) are read-only.
+"""
+import argparse
+import base64
+import http.client
+import json
+import multiprocessing
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import analytics
+import compute
+import gamification
+import queries
+import recommend
+import snapshots
+import synthetic
+from comments import CommentThreads
+from content import ContentStore, split_details
+from dimensions import DEFAULT_CATEGORIES, Dimension, seed_frame
+from history import TransitionLog, quarter_bounds
+from ratelimit import RateLimiter
+from tags import TagIndex
+from trending import MaxTree
+from viewcache import ViewCache, view_key
+
+APP_PATH = str(Path(__file__).parent / "App.py")
+
+def scale_for(size):
+    return max(size // 20, 10), size, 2 * size
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[rank]
+
+def time_op(func, repeat):
+    """Run func repeat times, returning timings in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def data_operations(data, export_max_rows):
+    """The operations each tab performs, keyed by a stable name"""
+    ideas, users, comments = data['ideas'], data['users'], data['comments']
+    dimension = Dimension.from_frame(seed_frame(DEFAULT_CATEGORIES, ideas['category']))
+    ideas = ideas.assign(category_id=dimension.codes(ideas['category']))
+    categories = dimension.ids_for(ideas['category'].unique().tolist())
+    sample_idea = int(ideas['id'].iloc[len(ideas) // 2]) if len(ideas) else 0
+    tag_index = TagIndex.from_ideas(ideas)
+    popular_tags = tag_index.options()[:2]
+    month_ago = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+    ops = {
+        'auth.authenticate': lambda: queries.authenticate(users, 'jane_smith', 'demo123'),
+        'browse.filter_default': lambda: queries.filter_ideas(ideas, queries.DEFAULT_BROWSE_STATUSES, categories),
+        'browse.filter_submitter': lambda: queries.filter_ideas(ideas, queries.DEFAULT_BROWSE_STATUSES, categories, 'john_doe'),
+        # Category options come cached from the dimension; submitters are recomputed once per new idea
+        'browse.option_lists': lambda: (dimension.options(), ideas['submitter'].unique().tolist()),
+        'browse.filter_tags': lambda: queries.filter_ideas(ideas, queries.DEFAULT_BROWSE_STATUSES, categories,
+                                                           idea_ids=tag_index.ids_for(popular_tags)),
+        'browse.idea_comments': lambda: comments[comments['idea_id'] == sample_idea],
+        'dashboard.status_summary': lambda: queries.status_summary(ideas),
+        'dashboard.impact_totals': lambda: queries.impact_totals(ideas),
+        'dashboard.status_value_counts': lambda: ideas['status'].value_counts(),
+        'dashboard.category_value_counts': lambda: ideas['category'].value_counts(),
+        'dashboard.recent_ideas': lambda: queries.recent_ideas(ideas),
+        'dashboard.trending_tags': lambda: tag_index.trending(month_ago),
+        'analytics.tag_counts': lambda: tag_index.counts().most_common(15),
+        'tags.build_index': lambda: TagIndex.from_ideas(ideas),
+        'analytics.monthly_submissions': lambda: queries.monthly_submissions(ideas),
+        'analytics.department_counts': lambda: queries.department_counts(ideas, users),
+        'leaderboard.top_contributors': lambda: queries.top_contributors(users),
+        'leaderboard.department_rankings': lambda: queries.department_rankings(ideas, users),
+        'leaderboard.top_ideas': lambda: queries.top_ideas(ideas),
+        'admin.pending_ideas': lambda: queries.pending_ideas(ideas),
+        'compute.snapshot_columns': lambda: compute.snapshot_columns(ideas, users),
+        'gamification.levels_for': lambda: gamification.levels_for(users['points']),
+        'recommend.embed': lambda: recommend.embed(ideas),
+    }
+    # Removed once the ops (whose closures hold it) are garbage collected
+    snapshot_dir = tempfile.TemporaryDirectory(prefix='bench-snapshots-')
+    snapshot_path = snapshots.write_snapshot(snapshot_dir.name, data, 0)
+    ops['snapshot.write'] = lambda: snapshots.write_snapshot(tempfile.mkdtemp(dir=snapshot_dir.name), data, 0)
+    ops['snapshot.load'] = lambda: snapshots.load_snapshot(snapshot_path)
+    arrays, meta = compute.snapshot_columns(ideas, users)
+    for task, func in compute.TASKS.items():
+        ops[f"compute.{task}"] = lambda func=func: func(arrays, meta)
+    prepared = analytics.prepare(ideas, users, data['transitions'])
+    ops['analytics.prepare'] = lambda: analytics.prepare(ideas, users, data['transitions'])
+    ops['analytics.period_deltas'] = lambda: analytics.period_deltas(prepared, 30)
+    ops['analytics.funnel'] = lambda: analytics.funnel(prepared)
+    ops['analytics.cohorts'] = lambda: analytics.cohorts(prepared, 'department')
+    log = TransitionLog.from_frame(data['transitions'])
+    since, until = quarter_bounds(1)
+    ops['history.load'] = lambda: TransitionLog.from_frame(data['transitions'])
+    ops['history.frame'] = lambda: log.frame()
+    ops['history.for_idea'] = lambda: log.for_idea(sample_idea)
+    ops['history.by_reviewer'] = lambda: log.by_reviewer('admin', 'Approved', since, until)
+    ops['history.time_to_decision'] = lambda: log.time_to_decision(ideas)
+    threads = CommentThreads.from_frame(comments)
+    ops['comments.build_threads'] = lambda: CommentThreads.from_frame(comments)
+    ops['comments.page'] = lambda: threads.page(sample_idea)
+    details_df = split_details(ideas.set_index('id', drop=False))[1]
+    content = ContentStore.from_frame(details_df)
+    ops['content.build'] = lambda: ContentStore.from_frame(details_df)
+    ops['content.get'] = lambda: content.get(sample_idea)
+    ops['content.frame'] = lambda: content.frame()
+    upvotes = ideas['upvotes'].to_numpy(dtype=float)
+    tree = MaxTree(upvotes)
+    ops['trending.build'] = lambda: MaxTree(upvotes)
+    ops['trending.update'] = lambda: tree.set(len(ideas) // 2, tree.get(len(ideas) // 2) + 1.0)
+    ops['trending.top'] = lambda: tree.top(100)
+    limiter = RateLimiter({'upvote': (10 ** 9, 60)})
+    sample_user = users['username'].iloc[0]
+    ops['ratelimit.allow'] = lambda: limiter.allow(sample_user, 'upvote')
+    view_cache = ViewCache()
+    default_view = view_key(queries.DEFAULT_BROWSE_STATUSES, categories, 'All', [], 'Recent')
+    default_ids = lambda: queries.sort_ideas(queries.filter_ideas(ideas, queries.DEFAULT_BROWSE_STATUSES, categories),
+                                             'Recent')['id'].to_numpy(dtype='int64')
+    view_cache.get(default_view, 0, default_ids)
+    ops['browse.view_cache_hit'] = lambda: view_cache.get(default_view, 0, default_ids)
+    for sort_by in queries.SORT_COLUMNS:
+        ops[f"browse.sort[{sort_by}]"] = lambda sort_by=sort_by: queries.sort_ideas(ideas, sort_by)
+    if len(ideas) <= export_max_rows:
+        ops['admin.export_ideas_xlsx'] = lambda: queries.export_excel(ideas)
+        ops['admin.export_users_xlsx'] = lambda: queries.export_excel(users)
+    return ops
+
+def run_data_benchmarks(sizes, repeat, export_max_rows, seed):
+    results = {}
+    for size in sizes:
+        n_users, n_ideas, n_comments = scale_for(size)
+        start = time.perf_counter()
+        data = synthetic.generate_data(n_users, n_ideas, n_comments, seed=seed)
+        print(f"\n== {n_ideas:,} ideas / {n_users:,} users / {n_comments:,} comments "
+              f"(generated in {time.perf_counter() - start:.1f}s) ==")
+        print(f"{'operation':40} {'min ms':>10} {'median ms':>10} {'p95 ms':>10}")
+        size_results = {}
+        for name, func in data_operations(data, export_max_rows).items():
+            timings = time_op(func, repeat)
+            size_results[name] = {
+                'min_ms': min(timings),
+                'median_ms': statistics.median(timings),
+                'p95_ms': percentile(timings, 95)
+            }
+            row = size_results[name]
+            print(f"{name:40} {row['min_ms']:10.2f} {row['median_ms']:10.2f} {row['p95_ms']:10.2f}")
+        results[f"data@{size}"] = size_results
+    return results
+
+def _session_worker(worker, n_reruns, app_size):
+    """One simulated user: log in, then time full reruns of the app"""
+    # The app reads this once per process when it builds its seed data
+    os.environ['IDEAS_SYNTHETIC'] = ','.join(str(n) for n in scale_for(app_size))
+    # In-memory store: a database file would ignore --app-size once it exists and keep the benchmark's writes
+    os.environ['IDEAS_DB'] = ''
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=600)
+    at.run()
+    username, password = ('admin', 'admin123') if worker % 4 == 0 else ('john_doe', 'demo123')
+    at.text_input[0].input(username)
+    at.text_input[1].input(password)
+    at.button[0].click()
+    at.run()
+    # The first logged-in run builds the process-wide caches; don't count it
+    at.run()
+    latencies = []
+    for _ in range(n_reruns):
+        start = time.perf_counter()
+        at.run()
+        latencies.append((time.perf_counter() - start) * 1000)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+    return latencies
+
+def run_session_benchmark(n_sessions, n_reruns, app_size):
+    """Drive concurrent logged-in sessions through AppTest and time full reruns
+
+    AppTest keeps a process-global runtime, so each simulated session runs in
+    its own process; they still compete for the same CPU cores.
+    """
+    latencies = []
+    errors = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=n_sessions) as pool:
+        futures = [pool.submit(_session_worker, i, n_reruns, app_size) for i in range(n_sessions)]
+        for i, future in enumerate(futures):
+            try:
+                latencies.extend(future.result())
+            except Exception as e:
+                errors.append(f"session {i}: {e}")
+    wall = time.perf_counter() - start
+
+    print(f"\n== {n_sessions} concurrent sessions x {n_reruns} reruns at {app_size:,} ideas ==")
+    for error in errors:
+        print(f"ERROR {error}")
+    result = {
+        'sessions': n_sessions,
+        'reruns': len(latencies),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'max_ms': max(latencies) if latencies else None,
+        'reruns_per_s': len(latencies) / wall if wall else None,
+        'errors': len(errors)
+    }
+    if latencies:
+        print(f"rerun latency p50 {result['p50_ms']:.0f} ms, p95 {result['p95_ms']:.0f} ms, "
+              f"p99 {result['p99_ms']:.0f} ms, max {result['max_ms']:.0f} ms "
+              f"({result['reruns_per_s']:.2f} reruns/s including login and warm-up)")
+    return {f"sessions@{app_size}": {'rerun': result}}
+
+def _login(app_path, username, password):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(app_path, default_timeout=600)
+    at.run()
+    at.text_input[0].input(username)
+    at.text_input[1].input(password)
+    at.button[0].click()
+    at.run()
+    return at
+
+def _worker_process(worker, session_ids, n_reruns, app_size, db_path, barrier):
+    """One app worker: serve its sessions in turn, each upvoting and rerunning"""
+    os.environ['IDEAS_SYNTHETIC'] = ','.join(str(n) for n in scale_for(app_size))
+    os.environ['IDEAS_DB'] = db_path
+    sessions = [_login(APP_PATH, 'jane_smith' if i % 2 else 'john_doe', 'demo123') for i in session_ids]
+    for at in sessions:
+        at.run()
+    barrier.wait()
+    latencies = []
+    start = time.monotonic()
+    for _ in range(n_reruns):
+        for at in sessions:
+            op_start = time.perf_counter()
+            next(b for b in at.button if (b.key or '').startswith('upvote_')).click()
+            at.run()
+            latencies.append((time.perf_counter() - op_start) * 1000)
+            if at.exception:
+                raise RuntimeError(at.exception[0].value)
+    return latencies, start, time.monotonic()
+
+def run_scaling_benchmark(worker_counts, n_sessions, n_reruns, app_size):
+    """Throughput of n_sessions write-and-rerun sessions spread over 1..W worker processes"""
+    from sqlstore import SqliteIdeaStore
+
+    results = {}
+    print(f"\n== {n_sessions} sessions x {n_reruns} upvote+rerun at {app_size:,} ideas, shared SQLite store ==")
+    print(f"{'workers':>8} {'ops/s':>10} {'p50 ms':>10} {'p95 ms':>10}")
+    for n_workers in worker_counts:
+        with tempfile.TemporaryDirectory() as tmp, multiprocessing.Manager() as manager:
+            db_path = os.path.join(tmp, 'ideas.db')
+            # Seed the database up front so no worker pays for it in the timed phase
+            data = synthetic.generate_data(*scale_for(app_size))
+            SqliteIdeaStore(db_path, data['users'], data['ideas'], data['comments'], data['transitions'])
+            barrier = manager.Barrier(n_workers)
+            shares = [list(range(n_sessions))[w::n_workers] for w in range(n_workers)]
+            with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                futures = [pool.submit(_worker_process, w, shares[w], n_reruns, app_size, db_path, barrier)
+                           for w in range(n_workers) if shares[w]]
+                runs = [future.result() for future in futures]
+        latencies = [ms for run in runs for ms in run[0]]
+        wall = max(run[2] for run in runs) - min(run[1] for run in runs)
+        results[f"workers={n_workers}"] = {
+            'ops_per_s': len(latencies) / wall if wall else None,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95)
+        }
+        row = results[f"workers={n_workers}"]
+        print(f"{n_workers:8} {row['ops_per_s']:10.2f} {row['p50_ms']:10.0f} {row['p95_ms']:10.0f}")
+    return {f"scaling@{app_size}": results}
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def _api_client(port, worker, op, n_requests, idea_ids):
+    """One keep-alive HTTP client timing n_requests of op"""
+    username = 'jane_smith' if worker % 2 else 'john_doe'
+    headers = {'Authorization': 'Basic ' + base64.b64encode(f"{username}:demo123".encode()).decode()}
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+
+    def request(method, path, extra=None):
+        connection.request(method, path, headers=dict(headers, **(extra or {})))
+        response = connection.getresponse()
+        response.read()
+        if response.status >= 400:
+            raise RuntimeError(f"{method} {path}: HTTP {response.status}")
+        return response
+
+    etag = request('GET', f"/api/v1/ideas/{idea_ids[0]}").getheader('ETag')
+    latencies = []
+    for i in range(n_requests):
+        idea_id = idea_ids[(worker * n_requests + i) % len(idea_ids)]
+        start = time.perf_counter()
+        if op == 'vote+get':
+            request('POST', f"/api/v1/ideas/{idea_id}/votes")
+            request('GET', f"/api/v1/ideas/{idea_id}")
+        elif op == 'list':
+            request('GET', "/api/v1/ideas?limit=20")
+        else:
+            request('GET', f"/api/v1/ideas/{idea_ids[0]}", {'If-None-Match': etag})
+        latencies.append((time.perf_counter() - start) * 1000)
+    connection.close()
+    return latencies
+
+def run_api_benchmark(n_clients, n_requests, app_size):
+    """Throughput of the REST API (api.py, one process) over a seeded SQLite store"""
+    from sqlstore import SqliteIdeaStore
+
+    results = {}
+    print(f"\n== {n_clients} API clients x {n_requests} requests at {app_size:,} ideas, shared SQLite store ==")
+    print(f"{'operation':>10} {'ops/s':>10} {'p50 ms':>10} {'p95 ms':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'ideas.db')
+        data = synthetic.generate_data(*scale_for(app_size))
+        SqliteIdeaStore(db_path, data['users'], data['ideas'], data['comments'], data['transitions'])
+        idea_ids = data['ideas']['id'].tolist()[-1000:]
+        port = _free_port()
+        # Quotas are for people; the load test votes as fast as it can
+        env = dict(os.environ, IDEAS_RATE_LIMITS='upvote=1000000000/1')
+        server = subprocess.Popen([sys.executable, str(Path(__file__).parent / 'api.py'), '--db', db_path,
+                                   '--port', str(port)], env=env)
+        try:
+            deadline = time.monotonic() + 120
+            while True:
+                try:
+                    with socket.create_connection(('127.0.0.1', port), timeout=1):
+                        break
+                except OSError:
+                    if time.monotonic() > deadline or server.poll() is not None:
+                        raise RuntimeError("api.py did not start")
+                    time.sleep(0.2)
+            for op in ('list', 'get_304', 'vote+get'):
+                start = time.perf_counter()
+                with ThreadPoolExecutor(n_clients) as pool:
+                    runs = list(pool.map(lambda worker: _api_client(port, worker, op, n_requests, idea_ids),
+                                         range(n_clients)))
+                wall = time.perf_counter() - start
+                latencies = [ms for run in runs for ms in run]
+                results[op] = {
+                    'ops_per_s': len(latencies) / wall if wall else None,
+                    'p50_ms': percentile(latencies, 50),
+                    'p95_ms': percentile(latencies, 95)
+                }
+                row = results[op]
+                print(f"{op:>10} {row['ops_per_s']:10.1f} {row['p50_ms']:10.1f} {row['p95_ms']:10.1f}")
+        finally:
+            server.terminate()
+            server.wait()
+    return {f"api@{app_size}": results}
+
+def compare(results, baseline, tolerance):
+    """Return the operations whose median (or p95 for sessions) regressed beyond tolerance"""
+    regressions = []
+    for group, ops in results.items():
+        for name, row in ops.items():
+            base = baseline.get(group, {}).get(name)
+            if not base:
+                continue
+            if 'ops_per_s' in row:
+                if base.get('ops_per_s') and row['ops_per_s'] and row['ops_per_s'] * tolerance < base['ops_per_s']:
+                    regressions.append(f"{group} {name}: {row['ops_per_s']:.2f} ops/s vs "
+                                       f"{base['ops_per_s']:.2f} ops/s baseline")
+                continue
+            key = 'median_ms' if 'median_ms' in row else 'p95_ms'
+            if base.get(key) and row.get(key) and row[key] > base[key] * tolerance:
+                regressions.append(f"{group} {name}: {row[key]:.2f} ms vs {base[key]:.2f} ms baseline")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the idea management app")
+    parser.add_argument('--sizes', type=int, nargs='*', default=[1000, 100000],
+                        help="idea counts to benchmark data operations at (empty to skip)")
+    parser.add_argument('--repeat', type=int, default=5, help="timed repetitions per operation")
+    parser.add_argument('--export-max-rows', type=int, default=100000,
+                        help="skip Excel exports above this many ideas")
+    parser.add_argument('--sessions', type=int, default=0, help="concurrent AppTest sessions (0 to skip)")
+    parser.add_argument('--workers', type=int, nargs='*', default=[],
+                        help="worker process counts for the shared-store scaling benchmark")
+    parser.add_argument('--reruns', type=int, default=5, help="timed reruns per session")
+    parser.add_argument('--api', type=int, default=0, help="concurrent REST API clients (0 to skip)")
+    parser.add_argument('--requests', type=int, default=200, help="timed requests per API client and operation")
+    parser.add_argument('--app-size', type=int, default=1000, help="idea count loaded by the app for sessions")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="write results to this file")
+    parser.add_argument('--baseline', help="compare against a previous --json file")
+    parser.add_argument('--tolerance', type=float, default=1.25,
+                        help="allowed slowdown factor against the baseline")
+    args = parser.parse_args(argv)
+
+    results = {}
+    if args.sizes:
+        results.update(run_data_benchmarks(args.sizes, args.repeat, args.export_max_rows, args.seed))
+    if args.workers:
+        results.update(run_scaling_benchmark(args.workers, args.sessions or 8, args.reruns, args.app_size))
+    elif args.sessions:
+        results.update(run_session_benchmark(args.sessions, args.reruns, args.app_size))
+    if args.api:
+        results.update(run_api_benchmark(args.api, args.requests, args.app_size))
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo regressions against baseline")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+# comments.py - Comment threads per idea: top-level comments newest first, replies oldest first
+"""
+CommentThreads indexes comment ids by idea (top-level comments) and by parent
+(replies), each in (date, id) order, using history.PostingIndex: a sorted base
+plus a per-key tail of appends. A page of an idea's comments is a slice of its
+postings, so opening an idea with thousands of comments reads only the rows
+on the page instead of scanning comments_df.
+"""
+import numpy as np
+import pandas as pd
+from history import PostingIndex
+
+PAGE_SIZE = 10
+REPLY_PAGE_SIZE = 5
+
+def parent_ids(comments_df):
+    """parent_id column (nullable ints, missing before threads existed) as int64 with 0 for top level"""
+    if 'parent_id' not in comments_df.columns:
+        return np.zeros(len(comments_df), dtype=np.int64)
+    return pd.to_numeric(comments_df['parent_id'], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+
+class CommentThreads:
+    """Comment ids by idea and by parent comment, oldest first within each"""
+
+    def __init__(self):
+        self.top_level = PostingIndex()
+        self.replies = PostingIndex()
+
+    @classmethod
+    def from_frame(cls, comments_df):
+        threads = cls()
+        ordered = comments_df.sort_values(['date', 'id'], kind='stable')
+        ids = ordered['id'].to_numpy(dtype=np.int64)
+        parents = parent_ids(ordered)
+        top = parents == 0
+        # extend() keeps the (date, id) order within every key
+        threads.top_level.extend(ordered['idea_id'].to_numpy(dtype=np.int64)[top], ids[top])
+        threads.replies.extend(parents[~top], ids[~top])
+        return threads
+
+    def add(self, comment_id, idea_id, parent_id=None):
+        """Index a new comment (newer than every indexed one)"""
+        if parent_id:
+            self.replies.add(int(parent_id), int(comment_id))
+        else:
+            self.top_level.add(int(idea_id), int(comment_id))
+
+    def count(self, idea_id):
+        return len(self.top_level.get(idea_id))
+
+    def page(self, idea_id, offset=0, limit=PAGE_SIZE):
+        """Ids of top-level comments newest first, [offset, offset + limit)"""
+        ids = self.top_level.get(idea_id)
+        end = len(ids) - offset
+        return ids[max(end - limit, 0):max(end, 0)][::-1].tolist()
+
+    def page_before(self, idea_id, end=None, limit=PAGE_SIZE):
+        """Top-level comment ids before position end, newest first, and the end of the next page
+
+        Positions count from the oldest comment, so newer comments don't shift them (a stable cursor).
+        """
+        ids = self.top_level.get(idea_id)
+        end = len(ids) if end is None else min(end, len(ids))
+        start = max(end - limit, 0)
+        return ids[start:end][::-1].tolist(), start
+
+    def reply_count(self, comment_id):
+        return len(self.replies.get(comment_id))
+
+    def reply_page(self, comment_id, limit=REPLY_PAGE_SIZE):
+        """Ids of the first limit replies, oldest first (a conversation reads top down)"""
+        return self.replies.get(comment_id)[:limit].tolist()
@@ -0,0 +1,181 @@
+# compute.py - Heavy analytics run in a process pool over memory-mapped column snapshots
+"""
+The department merge+groupby, the monthly trend and the full-table sorts of
+the Analytics and Leaderboard tabs hold the GIL for as long as they run, so
+one admin's analytics used to stall every other session's rerun.
+
+ComputeService writes the few columns those aggregations need to .npy files
+once per store version and hands the directory to worker processes (started
+clean, see workers.py), which
+np.load() them memory-mapped (the page cache is shared, nothing is pickled)
+and send back small results. The script thread only waits on a future, which
+releases the GIL. Below IDEAS_POOL_MIN_ROWS ideas the same functions run
+inline: the process round trip would cost more than the work.
+
+Results are memoized in store.memo, which a shared store copies between
+processes, so they name rows by idea id and username, never by position.
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from workers import process_pool
+
+COMPUTE_WORKERS = int(os.environ.get('IDEAS_COMPUTE_WORKERS', min(os.cpu_count() or 1, 4)))
+POOL_MIN_ROWS = int(os.environ.get('IDEAS_POOL_MIN_ROWS', 20000))
+SNAPSHOTS_KEPT = 2
+
+def snapshot_columns(ideas_df, users_df):
+    """Plain numpy columns (strings encoded as codes) plus the labels needed to decode results"""
+    dept_codes, departments = pd.factorize(users_df['department'])
+    arrays = {
+        'idea_id': ideas_df['id'].to_numpy(dtype=np.int64),
+        'idea_submitter': pd.Index(users_df['username']).get_indexer(ideas_df['submitter']).astype(np.int32),
+        'idea_submit_date': ideas_df['submit_date'].to_numpy(dtype='S10'),
+        'idea_upvotes': ideas_df['upvotes'].to_numpy(dtype=np.int64),
+        'idea_total_score': ideas_df['total_score'].to_numpy(dtype=np.float64),
+        'user_username': users_df['username'].to_numpy(dtype=str),
+        'user_department': dept_codes.astype(np.int32),
+        'user_points': users_df['points'].to_numpy(dtype=np.int64)
+    }
+    return arrays, {'departments': [str(d) for d in departments]}
+
+def write_snapshot(directory, arrays, meta):
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, values in arrays.items():
+        np.save(directory / f"{name}.npy", values)
+    (directory / 'meta.json').write_text(json.dumps(meta))
+
+def load_snapshot(directory):
+    """Memory-mapped, read-only view of a snapshot written by write_snapshot()"""
+    directory = Path(directory)
+    arrays = {path.stem: np.load(path, mmap_mode='r') for path in directory.glob('*.npy')}
+    return arrays, json.loads((directory / 'meta.json').read_text())
+
+# Aggregations (same results as their counterparts in queries.py)
+def _idea_departments(arrays):
+    submitter = np.asarray(arrays['idea_submitter'])
+    known = submitter >= 0
+    return known, np.asarray(arrays['user_department'])[submitter[known]]
+
+def monthly_submissions(arrays, meta):
+    months = np.asarray(arrays['idea_submit_date']).astype('datetime64[D]').astype('datetime64[M]')
+    values, counts = np.unique(months, return_counts=True)
+    return pd.Series(counts, index=pd.PeriodIndex(values, freq='M', name='submit_date'))
+
+def department_counts(arrays, meta):
+    _, departments = _idea_departments(arrays)
+    counts = np.bincount(departments, minlength=len(meta['departments']))
+    result = pd.Series(counts, index=pd.Index(meta['departments'], name='department'), name='count')
+    return result[result > 0].sort_values(ascending=False, kind='stable')
+
+def department_rankings(arrays, meta):
+    known, departments = _idea_departments(arrays)
+    n = len(meta['departments'])
+    counts = np.bincount(departments, minlength=n)
+    upvotes = np.bincount(departments, weights=np.asarray(arrays['idea_upvotes'])[known], minlength=n)
+    scores = np.bincount(departments, weights=np.asarray(arrays['idea_total_score'])[known], minlength=n)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_score = scores / counts
+    stats = pd.DataFrame({
+        'Total Ideas': counts,
+        'Total Upvotes': upvotes.astype(np.int64),
+        'Avg Score': avg_score
+    }, index=pd.Index(meta['departments'], name='department'))
+    stats = stats[stats['Total Ideas'] > 0].round(2)
+    return stats.sort_values('Total Ideas', ascending=False, kind='stable')
+
+def _top_positions(values, n):
+    values = np.asarray(values)
+    if len(values) > n:
+        candidates = np.argpartition(-values, n - 1)[:n]
+    else:
+        candidates = np.arange(len(values))
+    return candidates[np.argsort(-values[candidates], kind='stable')]
+
+def top_contributors(arrays, meta, n=10):
+    """Usernames of the users with the most points"""
+    return np.asarray(arrays['user_username'])[_top_positions(arrays['user_points'], n)].tolist()
+
+def top_ideas(arrays, meta, n=10):
+    """Ids of the most upvoted ideas"""
+    return np.asarray(arrays['idea_id'])[_top_positions(arrays['idea_upvotes'], n)].tolist()
+
+TASKS = {
+    'monthly_submissions': monthly_submissions,
+    'department_counts': department_counts,
+    'department_rankings': department_rankings,
+    'top_contributors': top_contributors,
+    'top_ideas': top_ideas
+}
+
+def _run_task(task, directory):
+    """Worker process entry point"""
+    arrays, meta = load_snapshot(directory)
+    return TASKS[task](arrays, meta)
+
+class ComputeService:
+    """Runs TASKS against the current store version, in worker processes for large tables"""
+
+    def __init__(self, workers=COMPUTE_WORKERS, min_rows=POOL_MIN_ROWS):
+        self.workers = workers
+        self.min_rows = min_rows
+        self._tmp = None
+        self.snapshots = []
+        self.lock = threading.Lock()
+        self._current = None
+        self._pool = None
+
+    @property
+    def root(self):
+        # Removed when the service is garbage collected or the process exits
+        if self._tmp is None:
+            self._tmp = tempfile.TemporaryDirectory(prefix='ideas-snapshots-')
+        return Path(self._tmp.name)
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            self._pool = process_pool(self.workers)
+        return self._pool
+
+    def snapshot(self, store):
+        """Columns of the store's current version, written to disk when they go to the pool
+
+        Kept per process (not in store.memo, which a shared store may copy between workers).
+        Only the shallow copies are taken under the store lock: writes and syncs don't wait
+        while the columns are built and written.
+        """
+        with self.lock:
+            if self._current is not None and self._current[0] == store.version:
+                return self._current[1]
+            with store.lock:
+                version = store.version
+                # Copy-on-write keeps these fixed while the store keeps updating
+                ideas_df = store.ideas_df.copy(deep=False)
+                users_df = store.users_df.copy(deep=False)
+            arrays, meta = snapshot_columns(ideas_df, users_df)
+            snapshot = {'arrays': arrays, 'meta': meta, 'path': None}
+            if self.workers > 0 and len(arrays['idea_submitter']) >= self.min_rows:
+                snapshot['path'] = self.root / f"v{version}"
+                write_snapshot(snapshot['path'], arrays, meta)
+                self.snapshots.append(snapshot['path'])
+                # Older snapshots may still be mapped by a worker; unlinking them is safe on POSIX
+                while len(self.snapshots) > SNAPSHOTS_KEPT:
+                    shutil.rmtree(self.snapshots.pop(0), ignore_errors=True)
+            self._current = (version, snapshot)
+            return snapshot
+
+    def run(self, store, task):
+        """Result of TASKS[task] for the store's current data (memoized per version)"""
+        def compute():
+            snapshot = self.snapshot(store)
+            if snapshot['path'] is None:
+                return TASKS[task](snapshot['arrays'], snapshot['meta'])
+            return self.pool.submit(_run_task, task, str(snapshot['path'])).result()
+        return store.memo(('compute', task), compute)
@@ -0,0 +1,89 @@
+# content.py - Long idea text kept out of the ideas frame, compressed, read per idea on demand
+"""
+Problem, solution, benefits and resources are the bulk of an idea row but are
+only shown in an idea's details and in exports. ContentStore keeps them out
+of ideas_df, so filtering, sorting and copying the frame only moves ids and
+short metadata.
+
+Ideas loaded at startup are packed BLOCK_SIZE at a time into zlib-compressed
+blocks (compressing many short texts together is what makes zlib worth it);
+reading one idea decompresses one block. Ideas added later stay as plain text.
+IDEAS_CONTENT_COMPRESSION=none keeps everything as plain text.
+"""
+import os
+import threading
+import zlib
+import pandas as pd
+
+DETAIL_COLUMNS = ['problem', 'solution', 'benefits', 'resources']
+COMPRESSION = os.environ.get('IDEAS_CONTENT_COMPRESSION', 'zlib')
+BLOCK_SIZE = 64
+# zlib level 1: most of the size win of level 6 at a quarter of the startup time
+LEVEL = 1
+# Separators that never occur in typed text: between ideas, and between one idea's fields
+_RECORD = '\x1e'
+_FIELD = '\x1f'
+
+def split_details(ideas_df):
+    """(ideas_df without the detail columns, the detail columns)"""
+    present = [column for column in DETAIL_COLUMNS if column in ideas_df.columns]
+    return ideas_df.drop(columns=present), ideas_df[present]
+
+class ContentStore:
+    """Detail text per idea id: compressed blocks for the initial ideas, plain text for later ones"""
+
+    def __init__(self, compression=COMPRESSION):
+        self.compress = compression == 'zlib'
+        self.lock = threading.Lock()
+        self.positions = pd.Index([], dtype='int64')
+        self.blocks = []
+        self.recent = {}
+
+    @classmethod
+    def from_frame(cls, details_df, compression=COMPRESSION):
+        """Pack a frame of detail columns indexed by idea id"""
+        content = cls(compression)
+        if details_df.columns.empty:
+            return content
+        columns = [details_df[column].fillna('').astype(str) if column in details_df.columns
+                   else pd.Series('', index=details_df.index) for column in DETAIL_COLUMNS]
+        records = columns[0].str.cat(columns[1:], sep=_FIELD).tolist()
+        content.positions = pd.Index(details_df.index.to_numpy(dtype='int64'))
+        for start in range(0, len(records), BLOCK_SIZE):
+            block = _RECORD.join(records[start:start + BLOCK_SIZE])
+            content.blocks.append(zlib.compress(block.encode(), LEVEL) if content.compress else block)
+        return content
+
+    def _block(self, number):
+        block = self.blocks[number]
+        return (zlib.decompress(block).decode() if isinstance(block, bytes) else block).split(_RECORD)
+
+    def add(self, idea_id, details):
+        with self.lock:
+            self.recent[idea_id] = _FIELD.join(str(details.get(column) or '') for column in DETAIL_COLUMNS)
+
+    def get(self, idea_id):
+        """{column: text} for one idea, or None"""
+        record = self.recent.get(idea_id)
+        if record is None:
+            position = self.positions.get_indexer([idea_id])[0]
+            if position < 0:
+                return None
+            record = self._block(position // BLOCK_SIZE)[position % BLOCK_SIZE]
+        return dict(zip(DETAIL_COLUMNS, record.split(_FIELD)))
+
+    def frame(self, idea_ids=None):
+        """Detail columns indexed by idea id, for all ideas or just idea_ids"""
+        if idea_ids is not None:
+            ids = list(idea_ids)
+            rows = [self.get(idea_id) or {} for idea_id in ids]
+            return pd.DataFrame(rows, index=pd.Index(ids, dtype='int64'), columns=DETAIL_COLUMNS)
+        records = [record for number in range(len(self.blocks)) for record in self._block(number)]
+        with self.lock:
+            recent = dict(self.recent)
+        records += list(recent.values())
+        index = pd.Index(self.positions.tolist() + list(recent), dtype='int64')
+        return pd.DataFrame([record.split(_FIELD) for record in records], index=index, columns=DETAIL_COLUMNS)
+
+    def nbytes(self):
+        return sum(len(block) for block in self.blocks) + sum(len(record) for record in self.recent.values())
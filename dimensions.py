@@ -0,0 +1,78 @@
+# dimensions.py - Managed category and department lists, referenced from ideas and users by integer id
+"""
+Categories and departments are small tables of (id, name). Ideas carry a
+category_id and users a department_id next to the name, so filters compare
+integers and a rename touches one dimension row plus the label column of the
+rows that reference it.
+
+Dimension.options() is the list every selectbox and multiselect shows; it is
+built once and cached until the next add or rename.
+"""
+import threading
+import numpy as np
+import pandas as pd
+
+DEFAULT_CATEGORIES = ['Product', 'Process', 'Customer Experience', 'Technology',
+                      'Cost Reduction', 'Revenue Growth', 'Sustainability', 'Other']
+DEFAULT_DEPARTMENTS = ['IT', 'Product', 'Marketing', 'Sales', 'HR', 'Finance', 'Operations']
+# dimension -> (table referencing it, its name column, its id column)
+DIMENSIONS = {
+    'categories': ('ideas', 'category', 'category_id'),
+    'departments': ('users', 'department', 'department_id')
+}
+DEFAULTS = {'categories': DEFAULT_CATEGORIES, 'departments': DEFAULT_DEPARTMENTS}
+
+def seed_frame(defaults, values):
+    """(id, name) rows for the defaults followed by any other names in use"""
+    names = list(dict.fromkeys(list(defaults) + pd.Series(values, dtype=object).dropna().unique().tolist()))
+    return pd.DataFrame({'id': np.arange(1, len(names) + 1), 'name': names})
+
+class Dimension:
+    """Names by integer id, in id order"""
+
+    def __init__(self, rows=()):
+        self.lock = threading.Lock()
+        self.names = {}
+        self.ids = {}
+        self._options = None
+        for option_id, name in rows:
+            self.set(option_id, name)
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(zip(df['id'].astype(int).tolist(), df['name'].tolist()))
+
+    def frame(self):
+        with self.lock:
+            return pd.DataFrame({'id': np.array(list(self.names), dtype=np.int64), 'name': list(self.names.values())})
+
+    def next_id(self):
+        return max(self.names, default=0) + 1
+
+    def set(self, option_id, name):
+        """Add an option or rename an existing one"""
+        with self.lock:
+            previous = self.names.get(option_id)
+            if previous is not None:
+                del self.ids[previous]
+            self.names[option_id] = name
+            self.ids[name] = option_id
+            self._options = None
+
+    def options(self):
+        """Names in id order (cached until the next change)"""
+        options = self._options
+        if options is None:
+            with self.lock:
+                options = self._options = list(self.names.values())
+        return options
+
+    def id_for(self, name):
+        return self.ids.get(name)
+
+    def ids_for(self, names):
+        return [self.ids[name] for name in names if name in self.ids]
+
+    def codes(self, names):
+        """Ids for a column of names as int64 (0 where the name is unknown)"""
+        return pd.Series(names).map(self.ids).fillna(0).to_numpy(dtype=np.int64)
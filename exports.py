@@ -0,0 +1,156 @@
+# exports.py - Background export jobs writing .xlsx artifacts, deduplicated by data version
+"""
+An admin's "Export" button only submits a job; the session carries on and
+the Reports tab lists the job until its file is ready to download.
+
+Each job takes a copy-on-write snapshot of the table it exports together
+with the data_version it shows (users without their password hashes), then hands
+the .xlsx serialization (openpyxl: pure Python and slow on large tables) to a
+process pool (started clean, see workers.py) so it doesn't hold this
+process's GIL. At most EXPORT_WORKERS jobs run at once and at most EXPORT_QUEUE wait;
+further submissions are refused until one finishes.
+
+Artifacts are named after the export, the store's instance_id and the
+data_version, so exporting the same data again (from any session, or from any
+worker sharing the database and the directory) returns the existing file
+instead of regenerating it, and a file left by another store or an earlier
+in-memory run never passes for the current data. Files older than
+EXPORT_KEEP_HOURS, or beyond the newest EXPORT_KEEP of a kind, are removed
+after each job.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import queries
+from workers import process_pool
+
+EXPORT_DIR = os.environ.get('IDEAS_EXPORT_DIR', 'exports')
+EXPORT_WORKERS = int(os.environ.get('IDEAS_EXPORT_WORKERS', 2))
+EXPORT_QUEUE = int(os.environ.get('IDEAS_EXPORT_QUEUE', 8))
+EXPORT_KEEP = int(os.environ.get('IDEAS_EXPORT_KEEP', 10))
+EXPORT_KEEP_HOURS = float(os.environ.get('IDEAS_EXPORT_KEEP_HOURS', 24))
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# kind -> (label, (data_version, table) to export from a store)
+EXPORTS = {
+    'ideas': ('Ideas', lambda store: store.export_ideas()),
+    'users': ('Users', lambda store: store.export_users())
+}
+
+def _write_xlsx(df, path):
+    """Runs in a pool process; the temporary name keeps half-written files out of the listing"""
+    partial = Path(f"{path}.partial")
+    partial.write_bytes(queries.export_excel(df))
+    os.replace(partial, path)
+    return str(path)
+
+class ExportJob:
+    """One submitted export: queued, running, done or failed"""
+
+    def __init__(self, kind, version, path, submitted_by):
+        self.kind = kind
+        self.version = version
+        self.path = path
+        self.submitted_by = submitted_by
+        self.submitted_at = datetime.now()
+        self.status = 'queued'
+        self.error = None
+
+class ExportService:
+    """Bounded export queue and artifact directory for one store"""
+
+    def __init__(self, store, directory=EXPORT_DIR, workers=EXPORT_WORKERS, max_queued=EXPORT_QUEUE):
+        self.store = store
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.workers = workers
+        self.max_queued = max_queued
+        self.lock = threading.Lock()
+        # (kind, version) -> the job producing that artifact, while it runs (and after, if it failed)
+        self.jobs = {}
+        self.runner = ThreadPoolExecutor(workers, thread_name_prefix='export')
+        self._pool = None
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            self._pool = process_pool(self.workers)
+        return self._pool
+
+    def artifact(self, kind, version):
+        return self.directory / f"{kind}_{self.store.instance_id}_v{version}.xlsx"
+
+    def submit(self, kind, username):
+        """The job for this export of the current data: an existing file, one in flight, or a new job
+
+        None if the queue is full.
+        """
+        version = self.store.data_version
+        path = self.artifact(kind, version)
+        with self.lock:
+            job = self.jobs.get((kind, version))
+            if job is not None and job.status != 'failed':
+                return job
+            if path.exists():
+                job = ExportJob(kind, version, path, username)
+                job.status = 'done'
+                return job
+            if sum(other.status in ('queued', 'running') for other in self.jobs.values()) >= self.workers + self.max_queued:
+                return None
+            job = self.jobs[(kind, version)] = ExportJob(kind, version, path, username)
+        self.runner.submit(self._run, job)
+        return job
+
+    def _run(self, job):
+        job.status = 'running'
+        try:
+            version, table = EXPORTS[job.kind][1](self.store)
+            if version != job.version:
+                # Written to since the job was submitted: name the file after the data it holds
+                with self.lock:
+                    self.jobs.pop((job.kind, job.version), None)
+                    job.version, job.path = version, self.artifact(job.kind, version)
+                    self.jobs.setdefault((job.kind, version), job)
+            if not job.path.exists():
+                self.pool.submit(_write_xlsx, table, job.path).result()
+            job.status = 'done'
+        except Exception as error:
+            job.status = 'failed'
+            job.error = str(error)
+        with self.lock:
+            if job.status == 'done' and self.jobs.get((job.kind, job.version)) is job:
+                del self.jobs[(job.kind, job.version)]
+        self.prune()
+
+    def prune(self):
+        """Apply the retention rules to the artifact directory"""
+        cutoff = time.time() - EXPORT_KEEP_HOURS * 3600
+        for kind in EXPORTS:
+            # Including other stores' files and those named before instance ids
+            files = sorted(self._artifacts(kind, f"{kind}_*v*.xlsx"), key=lambda artifact: artifact['created'],
+                           reverse=True)
+            for position, artifact in enumerate(files):
+                if position >= EXPORT_KEEP or artifact['created'].timestamp() < cutoff:
+                    artifact['path'].unlink(missing_ok=True)
+
+    def _artifacts(self, kind, pattern=None):
+        """This store's files of a kind (or those matching pattern)"""
+        for path in self.directory.glob(pattern or f"{kind}_{self.store.instance_id}_v*.xlsx"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                # Pruned by another worker meanwhile
+                continue
+            yield {'kind': kind, 'version': int(path.stem.rsplit('_v', 1)[1]), 'path': path,
+                   'size': stat.st_size, 'created': datetime.fromtimestamp(stat.st_mtime)}
+
+    def recent(self):
+        """Jobs still in flight or failed, then finished artifacts, newest first"""
+        with self.lock:
+            pending = sorted(self.jobs.values(), key=lambda job: job.submitted_at, reverse=True)
+        finished = [artifact for kind in EXPORTS for artifact in self._artifacts(kind)]
+        finished.sort(key=lambda artifact: artifact['created'], reverse=True)
+        return pending, finished
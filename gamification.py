@@ -0,0 +1,149 @@
+# gamification.py - Level bands and achievements, evaluated incrementally from store events
+"""
+LEVELS is the one threshold table: level lookups bisect it, levels_for()
+runs np.searchsorted over a whole points column, and the sidebar's progress
+bar reads the same band edges.
+
+Achievements watch one per-user counter each. GamificationEngine seeds the
+counters and already-earned achievements from the tables in one vectorized
+pass, then subscribes to the store's EventBus: every event bumps the counter
+it affects and bisects that counter's sorted thresholds for newly crossed
+ones, so nothing is recomputed per render.
+"""
+import threading
+from bisect import bisect_right
+from collections import deque
+import numpy as np
+
+# (minimum points, name, emoji); level n is LEVELS[n - 1]
+LEVELS = [
+    (0, 'Innovator', '🌱'),
+    (100, 'Explorer', '🔍'),
+    (500, 'Creator', '🎨'),
+    (1500, 'Pioneer', '🚀'),
+    (3000, 'Visionary', '🔮'),
+    (5000, 'Innovation Master', '👑')
+]
+THRESHOLDS = [minimum for minimum, _, _ in LEVELS]
+MAX_LEVEL = len(LEVELS)
+
+# (key, emoji, name, description, counter, threshold)
+ACHIEVEMENTS = [
+    ('first_idea', '💡', 'First Spark', 'Submitted your first idea', 'ideas_submitted', 1),
+    ('ten_ideas', '📚', 'Prolific Thinker', 'Submitted 10 ideas', 'ideas_submitted', 10),
+    ('first_approval', '✅', 'Green Light', 'Had an idea approved', 'ideas_approved', 1),
+    ('hat_trick', '🎩', 'Hat Trick', 'Had 3 ideas approved', 'ideas_approved', 3),
+    ('first_comment', '💬', 'Conversation Starter', 'Posted your first comment', 'comments', 1),
+    ('commentator', '🗣️', 'Commentator', 'Posted 25 comments', 'comments', 25),
+    ('crowd_pleaser', '🔥', 'Crowd Pleaser', 'An idea of yours reached 50 upvotes', 'max_upvotes', 50),
+    ('point_collector', '⭐', 'Point Collector', 'Earned 1,000 points', 'points', 1000),
+    ('pioneer', '🚀', 'Pioneer', 'Reached level 4', 'points', THRESHOLDS[3])
+]
+COUNTERS = ('points', 'ideas_submitted', 'ideas_approved', 'comments', 'max_upvotes')
+
+def level_for(points):
+    """Level number (1-based) for a points total"""
+    return bisect_right(THRESHOLDS, points)
+
+def levels_for(points):
+    """level_for() over a whole array or column"""
+    return np.searchsorted(THRESHOLDS, np.asarray(points), side='right')
+
+def level_info(points):
+    """Level, its name and emoji, and progress through the current band"""
+    level = level_for(points)
+    floor, name, emoji = LEVELS[level - 1]
+    info = {'level': level, 'level_name': name, 'emoji': emoji, 'next_level_points': None,
+            'remaining': 0, 'progress': 1.0}
+    if level < MAX_LEVEL:
+        ceiling = THRESHOLDS[level]
+        info.update(next_level_points=ceiling, remaining=ceiling - points,
+                    progress=(points - floor) / (ceiling - floor))
+    return info
+
+class GamificationEngine:
+    """Per-user counters and earned achievements for one store, kept current by its events"""
+
+    def __init__(self, store, achievements=ACHIEVEMENTS):
+        self.store = store
+        self.lock = threading.Lock()
+        self.achievements = {rule[0]: rule for rule in achievements}
+        # counter -> (sorted thresholds, rule keys in the same order)
+        self.rules = {}
+        for key, _, _, _, counter, threshold in sorted(achievements, key=lambda rule: rule[5]):
+            thresholds, keys = self.rules.setdefault(counter, ([], []))
+            thresholds.append(threshold)
+            keys.append(key)
+        self.counters = {counter: {} for counter in COUNTERS}
+        # username -> {achievement key: unlocked at (None if earned before startup)}
+        self.earned = {}
+        # username -> achievements unlocked since they were last shown
+        self.unseen = {}
+        with store.lock:
+            self._seed(store.users_df, store.ideas_df, store.comments_df)
+            store.bus.subscribe(self.on_event)
+
+    def _seed(self, users_df, ideas_df, comments_df):
+        columns = {
+            'points': users_df.set_index('username')['points'],
+            'ideas_submitted': ideas_df.groupby('submitter').size(),
+            'ideas_approved': users_df.set_index('username')['ideas_approved'],
+            'comments': comments_df.groupby('username').size(),
+            'max_upvotes': ideas_df.groupby('submitter')['upvotes'].max()
+        }
+        for counter, values in columns.items():
+            self.counters[counter] = dict(zip(values.index.tolist(), values.to_numpy(dtype=np.int64).tolist()))
+            thresholds, keys = self.rules.get(counter, ([], []))
+            if not thresholds:
+                continue
+            # Number of thresholds each user has crossed, for every user at once
+            crossed = np.searchsorted(thresholds, values.to_numpy(dtype=np.int64), side='right')
+            for username, count in zip(values.index[crossed > 0].tolist(), crossed[crossed > 0].tolist()):
+                self.earned.setdefault(username, {}).update(dict.fromkeys(keys[:count]))
+
+    def on_event(self, delta):
+        """Bus listener: update the counter the event touches and check only its rules"""
+        kind = delta['type']
+        if kind == 'points_awarded':
+            self._set(delta['username'], 'points', delta['total'], delta)
+        elif kind == 'idea_added':
+            idea = self.store.get_idea(delta['idea_id'])
+            if idea:
+                self._add(idea['submitter'], 'ideas_submitted', 1, delta)
+        elif kind == 'comment_added':
+            self._add(delta['actor'], 'comments', 1, delta)
+        elif kind == 'status_changed' and delta['status'] == 'Approved':
+            idea = self.store.get_idea(delta['idea_id'])
+            if idea:
+                self._add(idea['submitter'], 'ideas_approved', 1, delta)
+        elif kind == 'idea_upvoted':
+            idea = self.store.get_idea(delta['idea_id'])
+            if idea and delta['upvotes'] > self.counters['max_upvotes'].get(idea['submitter'], 0):
+                self._set(idea['submitter'], 'max_upvotes', delta['upvotes'], delta)
+
+    def _add(self, username, counter, amount, delta):
+        self._set(username, counter, self.counters[counter].get(username, 0) + amount, delta)
+
+    def _set(self, username, counter, value, delta):
+        with self.lock:
+            previous = self.counters[counter].get(username, 0)
+            self.counters[counter][username] = value
+            thresholds, keys = self.rules.get(counter, ([], []))
+            # Rules crossed between the old and the new value
+            for key in keys[bisect_right(thresholds, previous):bisect_right(thresholds, value)]:
+                earned = self.earned.setdefault(username, {})
+                if key not in earned:
+                    earned[key] = delta['at']
+                    self.unseen.setdefault(username, deque(maxlen=len(self.achievements))).append(key)
+
+    def badges(self, username):
+        """Earned achievements as (emoji, name, description, unlocked at), in table order"""
+        earned = self.earned.get(username, {})
+        return [(emoji, name, description, earned[key])
+                for key, emoji, name, description, _, _ in self.achievements.values() if key in earned]
+
+    def pop_unlocked(self, username):
+        """Achievements unlocked since the last call, as (emoji, name)"""
+        with self.lock:
+            keys = list(self.unseen.pop(username, ()))
+        return [(self.achievements[key][1], self.achievements[key][2]) for key in keys]
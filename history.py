@@ -0,0 +1,232 @@
+# history.py - Append-only status transition and evaluation log with per-idea and per-reviewer indexes
+"""
+TransitionLog keeps every status change (and the evaluation score and comment
+given with it) in growable numpy columns, in the order they happened. Two
+indexes map an idea id and a reviewer to their rows: a sorted base searched
+with np.searchsorted plus a short unsorted tail of recent appends, merged
+once it grows past TAIL_LIMIT. Lookups cost O(log n + matches) and appends
+amortized O(1), so audit queries stay fast with millions of events.
+"""
+import numpy as np
+import pandas as pd
+from queries import ALL_STATUSES
+
+COLUMNS = ['id', 'idea_id', 'from_status', 'to_status', 'actor', 'at', 'score', 'comment']
+DECISIONS = ('Approved', 'Rejected')
+TAIL_LIMIT = 4096
+_STATUS_CODES = {status: code for code, status in enumerate(ALL_STATUSES)}
+_STATUSES = np.array(ALL_STATUSES + [None], dtype=object)  # code -1 (no status) maps to None
+
+def _status_code(status):
+    return _STATUS_CODES.get(status, -1)
+
+def _status_codes(values):
+    """Vectorized _status_code: factorize, then look up each distinct value once"""
+    codes, uniques = pd.factorize(values)
+    lookup = np.array([_status_code(status) for status in uniques] + [-1], dtype=np.int8)
+    return lookup[codes]
+
+class PostingIndex:
+    """key -> ascending row numbers"""
+
+    def __init__(self):
+        self.keys = np.empty(0, dtype=np.int64)
+        self.rows = np.empty(0, dtype=np.int64)
+        self.tail = {}
+        self.tail_size = 0
+
+    def add(self, key, row):
+        self.tail.setdefault(key, []).append(row)
+        self.tail_size += 1
+        # Merging re-sorts everything, so let the tail grow with the base to keep appends amortized O(1)
+        if self.tail_size > max(TAIL_LIMIT, len(self.keys) // 8):
+            self.merge()
+
+    def extend(self, keys, rows):
+        self.merge(np.asarray(keys, dtype=np.int64), np.asarray(rows, dtype=np.int64))
+
+    def merge(self, keys=None, rows=None):
+        parts_keys, parts_rows = [self.keys], [self.rows]
+        for key, key_rows in self.tail.items():
+            parts_keys.append(np.full(len(key_rows), key, dtype=np.int64))
+            parts_rows.append(np.asarray(key_rows, dtype=np.int64))
+        if keys is not None:
+            parts_keys.append(keys)
+            parts_rows.append(rows)
+        keys, rows = np.concatenate(parts_keys), np.concatenate(parts_rows)
+        # Parts are in ascending row order within each key, which a stable sort keeps
+        order = np.argsort(keys, kind='stable')
+        self.keys, self.rows = keys[order], rows[order]
+        self.tail, self.tail_size = {}, 0
+
+    def get(self, key):
+        lo = np.searchsorted(self.keys, key, side='left')
+        hi = np.searchsorted(self.keys, key, side='right')
+        base = self.rows[lo:hi]
+        recent = self.tail.get(key)
+        return np.concatenate([base, np.asarray(recent, dtype=np.int64)]) if recent else base
+
+class TransitionLog:
+    """Status changes in the order they happened; rows are never updated or removed"""
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.columns = {
+            'id': np.zeros(capacity, dtype=np.int64),
+            'idea_id': np.zeros(capacity, dtype=np.int64),
+            'from_status': np.zeros(capacity, dtype=np.int8),
+            'to_status': np.zeros(capacity, dtype=np.int8),
+            'actor': np.zeros(capacity, dtype=np.int32),
+            'at': np.zeros(capacity, dtype='datetime64[s]'),
+            'score': np.zeros(capacity, dtype=np.float64)
+        }
+        # Most transitions carry no comment: row -> text
+        self.comments = {}
+        self.actors = []
+        self.actor_codes = {}
+        self.by_idea = PostingIndex()
+        self.by_actor = PostingIndex()
+        # idea id -> row of its first approval or rejection
+        self.first_decision = {}
+        self.next_id = 1
+
+    @classmethod
+    def from_frame(cls, df):
+        """Bulk-load a transitions table (any row order; rows are stored by time)"""
+        if df is None or df.empty:
+            return cls()
+        log = cls(capacity=len(df) * 2)
+        at = pd.to_datetime(df['at']).to_numpy(dtype='datetime64[s]')
+        ids = df['id'].to_numpy(dtype=np.int64)
+        order = np.lexsort((ids, at))
+        n = len(df)
+        actor_codes, actors = pd.factorize(df['actor'])
+        log.actors = actors.tolist()
+        log.actor_codes = {actor: code for code, actor in enumerate(log.actors)}
+        actor_codes = actor_codes[order]
+        cols = log.columns
+        cols['id'][:n] = ids[order]
+        cols['idea_id'][:n] = df['idea_id'].to_numpy(dtype=np.int64)[order]
+        # Unknown or missing statuses get code -1
+        cols['from_status'][:n] = _status_codes(df['from_status'])[order]
+        cols['to_status'][:n] = _status_codes(df['to_status'])[order]
+        cols['actor'][:n] = actor_codes
+        cols['at'][:n] = at[order]
+        cols['score'][:n] = df['score'].to_numpy(dtype=np.float64)[order] if 'score' in df else np.nan
+        if 'comment' in df:
+            comments = df['comment'].to_numpy(dtype=object)[order]
+            present = np.flatnonzero([isinstance(text, str) and text != '' for text in comments])
+            log.comments = dict(zip(present.tolist(), comments[present].tolist()))
+        log.size = n
+        rows = np.arange(n)
+        log.by_idea.extend(cols['idea_id'][:n], rows)
+        log.by_actor.extend(actor_codes, rows)
+        decided = np.isin(cols['to_status'][:n], [_STATUS_CODES[s] for s in DECISIONS])
+        ideas, first = np.unique(cols['idea_id'][:n][decided], return_index=True)
+        log.first_decision = dict(zip(ideas.tolist(), rows[decided][first].tolist()))
+        log.next_id = int(cols['id'][:n].max()) + 1
+        return log
+
+    def _actor_code(self, actor):
+        code = self.actor_codes.get(actor)
+        if code is None:
+            code = self.actor_codes[actor] = len(self.actors)
+            self.actors.append(actor)
+        return code
+
+    def _grow(self):
+        for name, values in self.columns.items():
+            grown = np.zeros(len(values) * 2, dtype=values.dtype)
+            grown[:self.size] = values[:self.size]
+            self.columns[name] = grown
+
+    def append(self, idea_id, from_status, to_status, actor, at=None, score=None, comment=None, transition_id=None):
+        """Record one status change; returns its id"""
+        if self.size == len(self.columns['id']):
+            self._grow()
+        row = self.size
+        transition_id = self.next_id if transition_id is None else transition_id
+        self.next_id = max(self.next_id, transition_id + 1)
+        actor_code = self._actor_code(actor)
+        cols = self.columns
+        cols['id'][row] = transition_id
+        cols['idea_id'][row] = idea_id
+        cols['from_status'][row] = _status_code(from_status)
+        cols['to_status'][row] = _status_code(to_status)
+        cols['actor'][row] = actor_code
+        cols['at'][row] = np.datetime64(pd.Timestamp(at) if at is not None else pd.Timestamp.now(), 's')
+        cols['score'][row] = np.nan if score is None else score
+        if isinstance(comment, str) and comment:
+            self.comments[row] = comment
+        self.size += 1
+        self.by_idea.add(int(idea_id), row)
+        self.by_actor.add(actor_code, row)
+        if to_status in DECISIONS and idea_id not in self.first_decision:
+            self.first_decision[int(idea_id)] = row
+        return transition_id
+
+    def __len__(self):
+        return self.size
+
+    def frame(self, rows=None):
+        """The log (or the given rows) as a DataFrame with decoded columns"""
+        rows = np.arange(self.size) if rows is None else np.asarray(rows, dtype=np.int64)
+        cols = self.columns
+        actors = np.array(self.actors + [None], dtype=object)
+        return pd.DataFrame({
+            'id': cols['id'][rows],
+            'idea_id': cols['idea_id'][rows],
+            'from_status': pd.Series(_STATUSES[cols['from_status'][rows]], dtype=object),
+            'to_status': _STATUSES[cols['to_status'][rows]],
+            'actor': actors[cols['actor'][rows]] if len(rows) else np.empty(0, dtype=object),
+            'at': cols['at'][rows],
+            'score': cols['score'][rows],
+            'comment': pd.Series([self.comments.get(row) for row in rows.tolist()], dtype=object)
+        })
+
+    # Audit queries
+    def for_idea(self, idea_id):
+        """An idea's history, oldest first"""
+        return self.frame(self.by_idea.get(int(idea_id)))
+
+    def by_reviewer(self, actor, to_status=None, since=None, until=None):
+        """Changes made by actor, optionally only to one status and within [since, until)"""
+        code = self.actor_codes.get(actor)
+        if code is None:
+            return self.frame([])
+        rows = self.by_actor.get(code)
+        # Rows are in time order, so the time range is a slice
+        times = self.columns['at'][rows]
+        lo = 0 if since is None else np.searchsorted(times, np.datetime64(pd.Timestamp(since), 's'), side='left')
+        hi = len(rows) if until is None else np.searchsorted(times, np.datetime64(pd.Timestamp(until), 's'), side='left')
+        rows = rows[lo:hi]
+        if to_status is not None:
+            rows = rows[self.columns['to_status'][rows] == _status_code(to_status)]
+        return self.frame(rows)
+
+    def reviewers(self):
+        return list(self.actors)
+
+    def time_to_decision(self, ideas_df, by='category'):
+        """Days from submission to the first approval or rejection, summarized per `by` column"""
+        if not self.first_decision:
+            return pd.DataFrame(columns=['decided', 'median_days', 'mean_days', 'p90_days'])
+        idea_ids = np.fromiter(self.first_decision.keys(), dtype=np.int64, count=len(self.first_decision))
+        rows = np.fromiter(self.first_decision.values(), dtype=np.int64, count=len(self.first_decision))
+        ideas = ideas_df.set_index('id')
+        known = np.isin(idea_ids, ideas.index.to_numpy())
+        idea_ids, rows = idea_ids[known], rows[known]
+        submitted = pd.to_datetime(ideas.loc[idea_ids, 'submit_date']).to_numpy(dtype='datetime64[s]')
+        days = (self.columns['at'][rows] - submitted) / np.timedelta64(1, 'D')
+        return pd.DataFrame({by: ideas.loc[idea_ids, by].to_numpy(), 'days': days}).groupby(by)['days'].agg(
+            decided='size',
+            median_days='median',
+            mean_days='mean',
+            p90_days=lambda d: d.quantile(0.9)
+        ).sort_values('decided', ascending=False)
+
+def quarter_bounds(quarters_ago=1, now=None):
+    """[start, end) of a calendar quarter; 1 is the last full quarter"""
+    current = pd.Timestamp(now or pd.Timestamp.now()).to_period('Q')
+    quarter = current - quarters_ago
+    return quarter.start_time, (quarter + 1).start_time
@@ -0,0 +1,192 @@
+# notify.py - Batched notification fan-out from store events to in-app inboxes and e-mail digests
+"""
+The store's EventBus hands every delta to Notifier.enqueue(), which only puts
+it on a queue, so a write never waits for the fan-out. A background thread
+drains the queue in batches of up to BATCH_SECONDS, works out each event's
+recipients (the idea's submitter and everyone who commented on it, minus the
+actor), coalesces them per recipient, idea and kind ("3 new upvotes on ...")
+and appends one entry per group to the recipient's inbox.
+
+If IDEAS_SMTP is set (host:port, e.g. a local stand-in started with
+`python -m aiosmtpd -n -l localhost:1025`), the same entries are also
+collected per recipient and mailed as one digest every DIGEST_SECONDS.
+
+Every process builds its inboxes from the deltas its store publishes, so with
+the SQLite store all workers hold the same inboxes. Digests go out on
+wall-clock windows and store.claim() lets only one worker mail each window.
+"""
+import logging
+import os
+import queue
+import smtplib
+import threading
+import time
+from collections import deque
+from email.message import EmailMessage
+
+BATCH_SECONDS = float(os.environ.get('IDEAS_NOTIFY_BATCH_SECONDS', 2))
+BATCH_SIZE = 10000
+DIGEST_SECONDS = float(os.environ.get('IDEAS_DIGEST_SECONDS', 900))
+SMTP = os.environ.get('IDEAS_SMTP')
+INBOX_SIZE = 200
+logger = logging.getLogger(__name__)
+# Event types that notify someone, and who: the submitter only or every follower
+FAN_OUT = {'idea_upvoted': 'submitter', 'comment_added': 'followers', 'status_changed': 'followers'}
+
+def _names(actors):
+    actors = list(dict.fromkeys(actors))
+    if len(actors) == 1:
+        return actors[0]
+    if len(actors) == 2:
+        return f"{actors[0]} and {actors[1]}"
+    return f"{actors[0]} and {len(actors) - 1} others"
+
+def describe(kind, title, deltas):
+    """One line for a coalesced group of deltas about the same idea"""
+    if kind == 'idea_upvoted':
+        count = len(deltas)
+        return "👍", f"{count} new upvote{'s' if count > 1 else ''} on \"{title}\" ({deltas[-1]['upvotes']} total)"
+    if kind == 'comment_added':
+        return "💬", f"{_names(d['actor'] for d in deltas)} commented on \"{title}\""
+    return "📋", f"\"{title}\" is now {deltas[-1]['status']}"
+
+class Inbox:
+    """Per-user bounded list of notifications, newest last"""
+
+    def __init__(self, size=INBOX_SIZE):
+        self.lock = threading.Lock()
+        self.size = size
+        self.entries = {}
+        self.unread = {}
+
+    def deliver(self, username, entries):
+        with self.lock:
+            self.entries.setdefault(username, deque(maxlen=self.size)).extend(entries)
+            self.unread[username] = min(self.unread.get(username, 0) + len(entries), self.size)
+
+    def unread_count(self, username):
+        return self.unread.get(username, 0)
+
+    def latest(self, username, limit=20):
+        with self.lock:
+            entries = list(self.entries.get(username, ()))
+            unread = self.unread.get(username, 0)
+        latest = entries[-limit:][::-1]
+        return [dict(entry, read=position >= unread) for position, entry in enumerate(latest)]
+
+    def mark_read(self, username):
+        with self.lock:
+            self.unread[username] = 0
+
+class Notifier:
+    """Queue, background fan-out worker and delivery for one store"""
+
+    def __init__(self, store, smtp=SMTP, batch_seconds=BATCH_SECONDS, digest_seconds=DIGEST_SECONDS):
+        self.store = store
+        self.smtp = smtp
+        self.batch_seconds = batch_seconds
+        self.digest_seconds = digest_seconds
+        self.queue = queue.Queue()
+        self.inbox = Inbox()
+        self.pending_mail = {}
+        self.digest_window = self._window()
+        self.delivered = 0
+        with store.lock:
+            # idea id -> usernames following it (its submitter and commenters)
+            self.followers = {}
+            for idea_id, submitter in zip(store.ideas_df['id'].tolist(), store.ideas_df['submitter'].tolist()):
+                self.followers[idea_id] = {submitter}
+            for idea_id, username in zip(store.comments_df['idea_id'].tolist(), store.comments_df['username'].tolist()):
+                self.followers.setdefault(idea_id, set()).add(username)
+            store.bus.subscribe(self.enqueue)
+        self.thread = threading.Thread(target=self._run, name='notifier', daemon=True)
+        self.thread.start()
+
+    def enqueue(self, delta):
+        """Bus listener: O(1), runs in the writer's thread"""
+        self.queue.put_nowait(delta)
+
+    def _run(self):
+        while True:
+            batch = []
+            deadline = time.monotonic() + self.batch_seconds
+            while len(batch) < BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            # One bad delta or mail error costs that batch or digest, not the thread (and every inbox)
+            if batch:
+                try:
+                    self.fan_out(batch)
+                except Exception:
+                    logger.exception("Notification fan-out failed for a batch of %d events", len(batch))
+            if self.smtp and self._window() != self.digest_window:
+                try:
+                    self.send_digests()
+                except Exception:
+                    logger.exception("Sending the notification digests failed")
+
+    def _window(self):
+        return int(time.time() // self.digest_seconds)
+
+    def _recipients(self, delta):
+        idea_id = delta['idea_id']
+        if delta['type'] == 'idea_added':
+            idea = self.store.get_idea(idea_id)
+            self.followers.setdefault(idea_id, set()).add(idea['submitter'] if idea else delta['actor'])
+            return ()
+        followers = self.followers.setdefault(idea_id, set())
+        if delta['type'] == 'comment_added':
+            recipients = set(followers)
+            followers.add(delta['actor'])
+        elif FAN_OUT.get(delta['type']) == 'submitter':
+            idea = self.store.get_idea(idea_id)
+            recipients = {idea['submitter']} if idea else set()
+        else:
+            recipients = followers
+        return recipients - {delta['actor']}
+
+    def fan_out(self, batch):
+        """Coalesce a batch of deltas per recipient and deliver them"""
+        groups = {}
+        for delta in sorted(batch, key=lambda d: d['version']):
+            if delta['type'] not in FAN_OUT and delta['type'] != 'idea_added':
+                continue
+            for recipient in self._recipients(delta):
+                groups.setdefault(recipient, {}).setdefault((delta['idea_id'], delta['type']), []).append(delta)
+        for recipient, by_idea in groups.items():
+            entries = []
+            for (idea_id, kind), deltas in by_idea.items():
+                icon, text = describe(kind, deltas[-1]['title'], deltas)
+                entries.append({'at': deltas[-1]['at'], 'idea_id': idea_id, 'icon': icon, 'text': text})
+            self.inbox.deliver(recipient, entries)
+            if self.smtp:
+                self.pending_mail.setdefault(recipient, []).extend(entries)
+            self.delivered += len(entries)
+
+    def send_digests(self):
+        """Mail each recipient one message with everything collected since the last digest"""
+        pending, self.pending_mail = self.pending_mail, {}
+        window, self.digest_window = self.digest_window, self._window()
+        if not pending or not self.store.claim(f"digest:{window}"):
+            return
+        host, _, port = self.smtp.partition(':')
+        try:
+            with smtplib.SMTP(host, int(port or 25), timeout=10) as smtp:
+                for recipient, entries in pending.items():
+                    user = self.store.get_user(recipient)
+                    if not user:
+                        continue
+                    message = EmailMessage()
+                    message['From'] = 'ideas@localhost'
+                    message['To'] = user['email']
+                    message['Subject'] = f"💡 {len(entries)} update{'s' if len(entries) > 1 else ''} on your ideas"
+                    message.set_content('\n'.join(f"{e['icon']} {e['text']} ({e['at']})" for e in entries))
+                    smtp.send_message(message)
+        except OSError:
+            # The in-app inbox already has everything; a missing mail server only loses the digest
+            pass
@@ -0,0 +1,244 @@
+# perf.py - Opt-in timing spans, percentile histograms and trace export
+import os
+import time
+import json
+import threading
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Configuration (everything is off unless IDEAS_PROFILE is set or an admin enables it)
+ENABLED = os.environ.get('IDEAS_PROFILE', '').lower() in ('1', 'true', 'yes', 'on')
+TRACE_FILE = os.environ.get('IDEAS_TRACE_FILE')
+METRICS_PORT = int(os.environ.get('IDEAS_METRICS_PORT', '0') or 0)
+
+# Histogram bucket upper bounds in milliseconds
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+RECENT_RUNS = 50
+SAMPLES_PER_SPAN = 1024
+
+_NULL_SPAN = nullcontext()
+
+class Histogram:
+    """Fixed-bucket latency histogram with a window of recent samples"""
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.samples = deque(maxlen=SAMPLES_PER_SPAN)
+
+    def observe(self, ms):
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.bucket_counts[i] += 1
+                break
+        else:
+            self.bucket_counts[-1] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.samples.append(ms)
+
+    def percentile(self, q):
+        """Percentile (0-100) over the recent samples"""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        rank = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+        return ordered[rank]
+
+class Recorder:
+    """Collects spans for the current rerun and aggregates them per section"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.recent_runs = deque(maxlen=RECENT_RUNS)
+        self._local = threading.local()
+
+    def begin_run(self, label=None):
+        """Start collecting spans for a script run on this thread"""
+        if not self.enabled:
+            self._local.run = None
+            return
+        self._local.run = {
+            'label': label,
+            'started_at': time.time(),
+            'start': time.perf_counter(),
+            'spans': [],
+            'depth': 0
+        }
+
+    def end_run(self):
+        """Finish the current run, aggregate it and write it to the trace file"""
+        run = getattr(self._local, 'run', None)
+        self._local.run = None
+        if run is None:
+            return None
+
+        total_ms = (time.perf_counter() - run['start']) * 1000
+        record = {
+            'label': run['label'],
+            'started_at': run['started_at'],
+            'total_ms': round(total_ms, 3),
+            'spans': run['spans']
+        }
+        with self.lock:
+            self._observe('rerun', 'run', total_ms)
+            for span in run['spans']:
+                self._observe(span['name'], span['kind'], span['ms'])
+            self.recent_runs.append(record)
+
+        if TRACE_FILE:
+            try:
+                with open(TRACE_FILE, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record) + '\n')
+            except OSError:
+                pass
+        return record
+
+    def _observe(self, name, kind, ms):
+        hist = self.histograms.get((name, kind))
+        if hist is None:
+            hist = self.histograms[(name, kind)] = Histogram()
+        hist.observe(ms)
+
+    @contextmanager
+    def _span(self, run, name, kind):
+        depth = run['depth']
+        run['depth'] = depth + 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            run['depth'] = depth
+            run['spans'].append({'name': name, 'kind': kind, 'depth': depth, 'ms': round(ms, 3)})
+
+    def span(self, name, kind='section'):
+        """Time a block; a no-op when profiling is off or no run is active"""
+        run = getattr(self._local, 'run', None)
+        if run is None:
+            if not self.enabled:
+                return _NULL_SPAN
+            # Outside a script run (e.g. a background thread): record directly
+            return self._standalone_span(name, kind)
+        return self._span(run, name, kind)
+
+    @contextmanager
+    def _standalone_span(self, name, kind):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self._observe(name, kind, (time.perf_counter() - start) * 1000)
+
+    def timed(self, name, kind='call'):
+        """Decorator form of span()"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name, kind):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def summary(self):
+        """Per-section latency percentiles, slowest p95 first"""
+        with self.lock:
+            rows = [
+                {
+                    'section': name,
+                    'kind': kind,
+                    'count': hist.count,
+                    'p50_ms': hist.percentile(50),
+                    'p95_ms': hist.percentile(95),
+                    'p99_ms': hist.percentile(99),
+                    'max_ms': max(hist.samples) if hist.samples else None,
+                    'total_ms': hist.total_ms
+                }
+                for (name, kind), hist in self.histograms.items()
+            ]
+        return sorted(rows, key=lambda r: r['p95_ms'] or 0, reverse=True)
+
+    def slowest_spans(self, limit=20):
+        """Slowest individual spans across the recent reruns"""
+        with self.lock:
+            runs = list(self.recent_runs)
+        spans = [
+            dict(span, run_started_at=run['started_at'], run_label=run['label'])
+            for run in runs for span in run['spans']
+        ]
+        return sorted(spans, key=lambda s: s['ms'], reverse=True)[:limit]
+
+    def recent(self):
+        with self.lock:
+            return list(self.recent_runs)
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.recent_runs.clear()
+
+    def prometheus_text(self):
+        """Render all histograms in the Prometheus text exposition format"""
+        lines = [
+            '# HELP ideas_span_duration_seconds Time spent in instrumented sections of the app',
+            '# TYPE ideas_span_duration_seconds histogram'
+        ]
+        with self.lock:
+            items = sorted(self.histograms.items())
+            for (name, kind), hist in items:
+                labels = f'section="{_escape_label(name)}",kind="{_escape_label(kind)}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS_MS, hist.bucket_counts):
+                    cumulative += count
+                    lines.append(f'ideas_span_duration_seconds_bucket{{{labels},le="{bound / 1000:g}"}} {cumulative}')
+                lines.append(f'ideas_span_duration_seconds_bucket{{{labels},le="+Inf"}} {hist.count}')
+                lines.append(f'ideas_span_duration_seconds_sum{{{labels}}} {hist.total_ms / 1000:.6f}')
+                lines.append(f'ideas_span_duration_seconds_count{{{labels}}} {hist.count}')
+        return '\n'.join(lines) + '\n'
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip('/') != '/metrics':
+            self.send_error(404)
+            return
+        body = recorder.prometheus_text().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+_server_lock = threading.Lock()
+_server = None
+
+def start_metrics_server(port=METRICS_PORT, host='127.0.0.1'):
+    """Serve /metrics on a local port once per process (no-op when port is 0)"""
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError:
+                # Another worker already owns the port
+                return None
+            threading.Thread(target=_server.serve_forever, name='ideas-metrics', daemon=True).start()
+    return _server
+
+# Process-wide recorder
+recorder = Recorder(enabled=ENABLED)
+span = recorder.span
+timed = recorder.timed
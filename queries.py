@@ -0,0 +1,122 @@
+# queries.py - Data operations behind the app's tabs (shared by App.py and bench.py)
+import hashlib
+from io import BytesIO
+import pandas as pd
+
+APPROVED_STATUSES = ['Approved', 'In Progress', 'Implemented']
+PENDING_STATUSES = ['New', 'Under Review']
+ALL_STATUSES = ['New', 'Under Review', 'Approved', 'Rejected', 'In Progress', 'Implemented']
+DEFAULT_BROWSE_STATUSES = ['New', 'Under Review', 'Approved', 'In Progress']
+SORT_COLUMNS = {
+    'Recent': 'submit_date',
+    'Most Upvoted': 'upvotes',
+    'Highest Score': 'total_score',
+    'Most Commented': 'comments_count'
+}
+TRENDING = 'Trending'
+FOR_YOU = 'For You'
+
+def hash_password(password):
+    """Hash a password for storage"""
+    return hashlib.sha256(password.encode()).hexdigest()
+
+def authenticate(users_df, username, password):
+    """Return the matching user record or None"""
+    password_hash = hash_password(password)
+    if username in users_df.index:
+        # Users indexed by username (IdeaStore): O(1) lookup
+        user = users_df.loc[username]
+        return user.to_dict() if user['password'] == password_hash else None
+    user = users_df[
+        (users_df['username'] == username) &
+        (users_df['password'] == password_hash)
+    ]
+    if not user.empty:
+        return user.iloc[0].to_dict()
+    return None
+
+def filter_ideas(ideas_df, statuses, category_ids, submitter='All', idea_ids=None):
+    """Browse Ideas filters (categories by id; idea_ids restricts to e.g. the ids of a tag lookup)"""
+    mask = (ideas_df['status'].isin(statuses)) & (ideas_df['category_id'].isin(category_ids))
+    if idea_ids is not None:
+        mask &= ideas_df['id'].isin(idea_ids)
+    filtered = ideas_df[mask]
+    if submitter != 'All':
+        filtered = filtered[filtered['submitter'] == submitter]
+    return filtered
+
+def sort_ideas(ideas_df, sort_by):
+    """Browse Ideas sort orders (descending)"""
+    return ideas_df.sort_values(SORT_COLUMNS.get(sort_by, 'comments_count'), ascending=False)
+
+def rank_ideas(ideas_df, ranked_ids):
+    """ranked_ids first, in that order, then the remaining ideas newest first"""
+    ideas_df = ideas_df.sort_values('submit_date', ascending=False)
+    positions = pd.Index(ranked_ids).get_indexer(ideas_df['id'])
+    positions[positions < 0] = len(ranked_ids)
+    return ideas_df.iloc[positions.argsort(kind='stable')]
+
+def recent_ideas(ideas_df, n=5):
+    return ideas_df.sort_values('submit_date', ascending=False).head(n)
+
+def status_summary(ideas_df):
+    """Total, approved, implemented, rejected and pending counts"""
+    status_counts = ideas_df['status'].value_counts()
+    total = len(ideas_df)
+    approved = int(status_counts.reindex(APPROVED_STATUSES, fill_value=0).sum())
+    rejected = int(status_counts.get('Rejected', 0))
+    return {
+        'total': total,
+        'approved': approved,
+        'implemented': int(status_counts.get('Implemented', 0)),
+        'rejected': rejected,
+        'pending': total - approved - rejected
+    }
+
+def impact_totals(ideas_df):
+    """Cost savings, revenue impact and average evaluation score"""
+    total_savings = ideas_df['cost_savings'].fillna(0).sum()
+    total_revenue = ideas_df['revenue_impact'].fillna(0).sum()
+    avg_score = ideas_df.loc[ideas_df['total_score'] > 0, 'total_score'].mean()
+    return {'cost_savings': total_savings, 'revenue_impact': total_revenue, 'avg_score': avg_score}
+
+def monthly_submissions(ideas_df):
+    """Number of ideas submitted per month"""
+    submit_dates = pd.to_datetime(ideas_df['submit_date'])
+    return submit_dates.groupby(submit_dates.dt.to_period('M')).size()
+
+def ideas_with_department(ideas_df, users_df):
+    return ideas_df.merge(
+        users_df[['username', 'department']],
+        left_on='submitter',
+        right_on='username',
+        how='left'
+    )
+
+def department_counts(ideas_df, users_df):
+    return ideas_with_department(ideas_df, users_df)['department'].value_counts()
+
+def department_rankings(ideas_df, users_df):
+    """Idea count, upvotes and average score per department"""
+    dept_stats = ideas_with_department(ideas_df, users_df).groupby('department').agg({
+        'id': 'count',
+        'upvotes': 'sum',
+        'total_score': 'mean'
+    }).round(2)
+    dept_stats.columns = ['Total Ideas', 'Total Upvotes', 'Avg Score']
+    return dept_stats.sort_values('Total Ideas', ascending=False)
+
+def top_contributors(users_df, n=10):
+    return users_df.sort_values('points', ascending=False).head(n)
+
+def top_ideas(ideas_df, n=10):
+    return ideas_df.sort_values('upvotes', ascending=False).head(n)
+
+def pending_ideas(ideas_df):
+    return ideas_df[ideas_df['status'].isin(PENDING_STATUSES)]
+
+def export_excel(df):
+    """Serialize a table to .xlsx bytes"""
+    output = BytesIO()
+    df.to_excel(output, index=False, engine='openpyxl')
+    return output.getvalue()
@@ -0,0 +1,122 @@
+# ratelimit.py - Per-user token buckets for point-earning and other write actions
+"""
+Every upvote, comment, reply, like and submission is a store write, and most
+of them pay points. RateLimiter gives each (user, action) a token bucket:
+QUOTAS[action] = (count, seconds) allows a burst of count and refills at
+count per seconds. allow() refills and takes a token in O(1); a user who
+runs out is refused until the bucket refills.
+
+Refusals are counted per user and action for the admin report, and the first
+refusal of a user for an action in every REPORT_SECONDS is handed to
+on_throttle (App.py delivers it to the admins' inboxes).
+
+IDEAS_RATE_LIMITS overrides quotas, e.g. "upvote=30/60,submit=3/3600".
+Buckets live in this process, so with several workers each enforces its own
+quota.
+"""
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# action -> (burst, seconds to refill it)
+QUOTAS = {
+    'upvote': (20, 60),
+    'comment': (10, 60),
+    'like': (30, 60),
+    'submit': (5, 3600)
+}
+REPORT_SECONDS = 600
+LOG_SIZE = 200
+# Buckets idle long enough to be full again are dropped this often
+SWEEP_SECONDS = 300
+
+def parse_quotas(spec, defaults=QUOTAS):
+    """QUOTAS updated from "action=count/seconds,..." """
+    quotas = dict(defaults)
+    for item in filter(None, (part.strip() for part in (spec or '').split(','))):
+        action, _, quota = item.partition('=')
+        count, _, seconds = quota.partition('/')
+        quotas[action.strip()] = (int(count), float(seconds or 60))
+    return quotas
+
+class RateLimiter:
+    """Token bucket per (username, action), plus a record of who was throttled"""
+
+    def __init__(self, quotas=None, on_throttle=None):
+        self.quotas = quotas if quotas is not None else parse_quotas(os.environ.get('IDEAS_RATE_LIMITS'))
+        self.on_throttle = on_throttle
+        self.lock = threading.Lock()
+        # (username, action) -> [tokens, monotonic time of last refill]
+        self.buckets = {}
+        # (username, action) -> {'count', 'first', 'last', 'reported'}
+        self.throttled = {}
+        self.log = deque(maxlen=LOG_SIZE)
+        self.last_sweep = time.monotonic()
+
+    def allow(self, username, action):
+        """Take one token for username's action; False if their quota is used up"""
+        quota = self.quotas.get(action)
+        if quota is None:
+            return True
+        burst, seconds = quota
+        now = time.monotonic()
+        key = (username, action)
+        with self.lock:
+            if now - self.last_sweep > SWEEP_SECONDS:
+                self._sweep(now)
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = [burst, now]
+            else:
+                bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * burst / seconds)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return True
+            report = self._record(key, now)
+        if report and self.on_throttle is not None:
+            self.on_throttle(username, action, report)
+        return False
+
+    def retry_after(self, username, action):
+        """Seconds until username's next action of this kind is allowed"""
+        quota = self.quotas.get(action)
+        with self.lock:
+            bucket = self.buckets.get((username, action))
+            if quota is None or bucket is None:
+                return 0.0
+            burst, seconds = quota
+            tokens = bucket[0] + (time.monotonic() - bucket[1]) * burst / seconds
+        return max(0.0, (1 - tokens) * seconds / burst)
+
+    def _record(self, key, now):
+        """Count a refusal; the entry if it's the first one to report in this window"""
+        at = datetime.now()
+        entry = self.throttled.get(key)
+        if entry is None:
+            entry = self.throttled[key] = {'count': 0, 'first': at, 'last': at, 'reported': None}
+        entry['count'] += 1
+        entry['last'] = at
+        self.log.append({'at': at, 'username': key[0], 'action': key[1]})
+        if entry['reported'] is None or now - entry['reported'] >= REPORT_SECONDS:
+            entry['reported'] = now
+            return dict(entry)
+        return None
+
+    def _sweep(self, now):
+        self.last_sweep = now
+        for key in [key for key, (_, last) in self.buckets.items()
+                    if now - last >= self.quotas.get(key[1], (1, 0))[1]]:
+            del self.buckets[key]
+
+    def report(self):
+        """Throttled users and actions, most refusals first"""
+        with self.lock:
+            rows = [{'username': username, 'action': action, 'refused': entry['count'],
+                     'first': entry['first'], 'last': entry['last']}
+                    for (username, action), entry in self.throttled.items()]
+            recent = list(self.log)
+        rows.sort(key=lambda row: row['refused'], reverse=True)
+        return rows, recent[::-1]
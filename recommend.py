@@ -0,0 +1,283 @@
+# recommend.py - "For you" feed: item-to-item similarity plus decayed hotness, cached per user
+"""
+Every idea gets a 64-dimensional unit vector: the TF-IDF weights of its
+title, description and tag tokens, randomly projected with the bits of each
+token's 64-bit hash as the ±1 projection row (no vocabulary or projection
+matrix to store). Cosine similarity is then a dot product. Nearest
+neighbours are cached per idea: the background thread computes them for the
+seeds of active users in blocked matrix products, and a new idea is scored
+against every cached idea and merged into its top NEIGHBOURS instead of
+invalidating the cache.
+
+A user's seeds are the ideas they submitted, commented on or upvoted. Their
+feed scores candidates (the seeds' neighbours plus the hottest ideas) by
+weighted similarity to the seeds and by trending score, and is kept in a
+per-user cache that a background thread refreshes for recently active users
+after the data changes, so serving a feed is a dictionary lookup.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+DIM = 64
+NEIGHBOURS = 20
+HOT_CANDIDATES = 100
+FEED_SIZE = 50
+MAX_SEEDS = 30
+SIMILARITY_WEIGHT = 0.7
+REFRESH_SECONDS = float(os.environ.get('IDEAS_FEED_REFRESH_SECONDS', 30))
+ACTIVE_SECONDS = 600
+CHUNK_ROWS = 1 << 18
+# Seeds whose neighbours one matrix product computes
+NEIGHBOUR_BLOCK = 256
+# Interest each interaction signals
+SEED_WEIGHTS = {'idea_added': 1.0, 'idea_upvoted': 1.0, 'comment_added': 2.0}
+_TOKEN = re.compile(r'[a-z0-9]{3,}')
+_BITS = np.uint64(1) << np.arange(DIM, dtype=np.uint64)
+logger = logging.getLogger(__name__)
+
+def embed(ideas_df, idf=None):
+    """(ids, float32 unit vectors, idf per token hash) for the ideas' text and tags, vectorized over all rows
+
+    Pass the idf of an earlier call to embed new ideas against that corpus.
+    """
+    text = (ideas_df['title'].fillna('') + ' ' + ideas_df['description'].fillna('')).str.lower()
+    tags = ideas_df['tags'].fillna('').str.lower().str.split(',')
+    tokens = pd.concat([
+        pd.Series(text.str.findall(_TOKEN.pattern).to_numpy()).explode(),
+        # Whole tags count as their own, rarer tokens
+        ('tag:' + pd.Series(tags.to_numpy()).explode().str.strip()).where(lambda t: t != 'tag:')
+    ]).dropna()
+    docs = tokens.index.to_numpy(dtype=np.int64)
+    hashes = pd.util.hash_array(tokens.to_numpy(dtype=object))
+    pairs = pd.DataFrame({'doc': docs, 'hash': hashes}).value_counts().reset_index(name='tf').sort_values('doc')
+    if idf is None:
+        idf = np.log((1 + len(ideas_df)) / pairs.groupby('hash').size())
+    # Tokens the corpus never saw are as rare as it gets
+    token_idf = idf.reindex(pairs['hash'].to_numpy()).fillna(idf.max() if len(idf) else 1.0).to_numpy()
+    weights = ((1 + np.log(pairs['tf'].to_numpy())) * token_idf).astype(np.float32)
+    # ±1 projection row of each distinct token: the bits of its hash
+    codes, uniques = pd.factorize(pairs['hash'].to_numpy(dtype=np.uint64))
+    signs = np.where(uniques[:, None] & _BITS, np.float32(1), np.float32(-1))
+    vectors = np.zeros((len(ideas_df), DIM), dtype=np.float32)
+    doc = pairs['doc'].to_numpy()
+    # Sum each document's weighted rows with reduceat, a bounded number of rows at a time
+    for start in range(0, len(doc), CHUNK_ROWS):
+        chunk = slice(start, start + CHUNK_ROWS)
+        chunk_docs, offsets = np.unique(doc[chunk], return_index=True)
+        vectors[chunk_docs] += np.add.reduceat(weights[chunk, None] * signs[codes[chunk]], offsets)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return ideas_df['id'].to_numpy(dtype=np.int64), vectors / np.where(norms > 0, norms, 1), idf
+
+def nearest(ids, vectors, positions, k=NEIGHBOURS):
+    """[(ids, similarities), ...] of the k ideas most similar to each of the ideas at positions
+
+    Best first, each idea itself excluded; one matrix product per NEIGHBOUR_BLOCK positions.
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    k = min(k, len(ids) - 1)
+    results = []
+    for start in range(0, len(positions), NEIGHBOUR_BLOCK):
+        block = positions[start:start + NEIGHBOUR_BLOCK]
+        sims = vectors[block] @ vectors.T
+        sims[np.arange(len(block)), block] = -np.inf
+        if k <= 0:
+            results.extend((ids[:0], sims[row, :0]) for row in range(len(block)))
+            continue
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top_sims = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_sims, axis=1, kind='stable')
+        top, top_sims = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_sims, order, axis=1)
+        results.extend((ids[top[row]], top_sims[row]) for row in range(len(block)))
+    return results
+
+def merge_neighbours(cached, ids, sims, k=NEIGHBOURS):
+    """A cached (ids, similarities) list with new candidates merged into its top k"""
+    all_ids = np.concatenate([cached[0], ids])
+    all_sims = np.concatenate([cached[1], sims])
+    order = np.argsort(-all_sims, kind='stable')[:k]
+    return all_ids[order], all_sims[order]
+
+class Recommender:
+    """Idea vectors, per-user seeds and cached feeds for one store"""
+
+    def __init__(self, store, trending, refresh_seconds=REFRESH_SECONDS):
+        self.store = store
+        self.trending = trending
+        self.refresh_seconds = refresh_seconds
+        self.lock = threading.Lock()
+        self.neighbours = {}
+        # username -> {idea id: weight}, most recent last
+        self.seeds = {}
+        # username -> (store version, [(idea id, score), ...])
+        self.feeds = {}
+        self.last_seen = {}
+        # Filled in by the background thread; until then feeds rank by trending score alone
+        self.ready = threading.Event()
+        self.idf = None
+        self.size = 0
+        self.vectors = np.zeros((0, DIM), dtype=np.float32)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.positions = {}
+        with store.lock:
+            ideas_df = store.ideas_df.copy(deep=False)
+            self.submitters = dict(zip(ideas_df['id'].tolist(), ideas_df['submitter'].tolist()))
+            for idea_id, username in self.submitters.items():
+                self._add_seed(username, idea_id, SEED_WEIGHTS['idea_added'])
+            for idea_id, username in zip(store.comments_df['idea_id'].tolist(), store.comments_df['username'].tolist()):
+                self._add_seed(username, idea_id, SEED_WEIGHTS['comment_added'])
+            # Ideas added while the corpus is embedded are queued and appended after it
+            self.pending = []
+            store.bus.subscribe(self.on_event)
+        self.thread = threading.Thread(target=self._run, args=(ideas_df,), name='recommender', daemon=True)
+        self.thread.start()
+
+    def _add_seed(self, username, idea_id, weight):
+        seeds = self.seeds.setdefault(username, OrderedDict())
+        seeds[idea_id] = seeds.pop(idea_id, 0.0) + weight
+        if len(seeds) > MAX_SEEDS:
+            seeds.popitem(last=False)
+
+    def on_event(self, delta):
+        """Bus listener: record the interaction (and embed new ideas)"""
+        kind = delta['type']
+        if kind not in SEED_WEIGHTS:
+            return
+        with self.lock:
+            if kind == 'idea_added':
+                idea = self.store.get_idea(delta['idea_id'])
+                if idea is None:
+                    return
+                self.submitters[idea['id']] = idea['submitter']
+                if self.ready.is_set():
+                    self._append(pd.DataFrame([idea]))
+                else:
+                    self.pending.append(idea)
+            self._add_seed(delta['actor'], delta['idea_id'], SEED_WEIGHTS[kind])
+
+    def _append(self, ideas_df):
+        """Embed new ideas against the corpus idf (caller holds the lock)"""
+        ids, vectors, _ = embed(ideas_df, self.idf)
+        if self.size + len(ids) > len(self.vectors):
+            # Grown by doubling so appends stay amortized O(1)
+            grown = np.zeros((max(2 * len(self.vectors), self.size + len(ids)), DIM), dtype=np.float32)
+            grown[:self.size] = self.vectors[:self.size]
+            self.vectors = grown
+        self.vectors[self.size:self.size + len(ids)] = vectors
+        self.positions.update(zip(ids.tolist(), range(self.size, self.size + len(ids))))
+        self.ids = np.append(self.ids, ids)
+        self.size += len(ids)
+        self._merge_appended(self.neighbours, self.size - len(ids))
+
+    def _merge_appended(self, neighbours, start):
+        """Merge the ideas appended from position start on into the neighbour lists (caller holds the lock)"""
+        if not neighbours or start >= self.size:
+            return
+        cached = list(neighbours)
+        # One product scores the new ideas against every cached idea
+        sims = self.vectors[[self.positions[idea_id] for idea_id in cached]] @ self.vectors[start:self.size].T
+        new_ids = self.ids[start:self.size]
+        for row, idea_id in enumerate(cached):
+            neighbours[idea_id] = merge_neighbours(neighbours[idea_id], new_ids, sims[row])
+
+    def similar(self, idea_id):
+        """(ids, similarities) of the NEIGHBOURS ideas most similar to idea_id (caller holds the lock)"""
+        cached = self.neighbours.get(idea_id)
+        if cached is not None:
+            return cached
+        position = self.positions.get(idea_id)
+        if position is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        self.neighbours[idea_id] = result = nearest(self.ids, self.vectors[:self.size], [position])[0]
+        return result
+
+    def precompute(self, usernames):
+        """Cache the neighbours of the users' seeds, computed outside the lock so events aren't held up"""
+        with self.lock:
+            missing = [idea_id for idea_id in dict.fromkeys(seed for username in usernames
+                                                            for seed in self.seeds.get(username, ()))
+                       if idea_id not in self.neighbours and idea_id in self.positions]
+            positions = [self.positions[idea_id] for idea_id in missing]
+            # Rows below size are never rewritten (appends go after them or into a new array)
+            size, ids, vectors = self.size, self.ids, self.vectors[:self.size]
+        if not missing:
+            return
+        computed = dict(zip(missing, nearest(ids, vectors, positions)))
+        with self.lock:
+            # Ideas appended meanwhile aren't in these lists yet
+            self._merge_appended(computed, size)
+            for idea_id, result in computed.items():
+                self.neighbours.setdefault(idea_id, result)
+
+    def build_feed(self, username):
+        """[(idea id, score), ...] best first, excluding ideas the user already interacted with"""
+        with self.lock:
+            seeds = dict(self.seeds.get(username, {}))
+            similarity = {}
+            for seed, weight in seeds.items():
+                for idea_id, sim in zip(*self.similar(seed)):
+                    if sim > 0:
+                        similarity[idea_id] = similarity.get(idea_id, 0.0) + weight * float(sim)
+        hottest = [idea_id for idea_id, _ in self.trending.top(HOT_CANDIDATES)]
+        candidates = np.array([idea_id for idea_id in dict.fromkeys(list(similarity) + hottest)
+                               if idea_id not in seeds and self.submitters.get(idea_id) != username], dtype=np.int64)
+        if not len(candidates):
+            return []
+        sim = np.array([similarity.get(idea_id, 0.0) for idea_id in candidates.tolist()])
+        hot = self.trending.scores_for(candidates.tolist())
+        # Both signals scaled to [0, 1] over the candidates
+        score = (SIMILARITY_WEIGHT * sim / (sim.max() or 1)) + (1 - SIMILARITY_WEIGHT) * hot / (hot.max() or 1)
+        order = np.argsort(-score, kind='stable')[:FEED_SIZE]
+        return list(zip(candidates[order].tolist(), score[order].tolist()))
+
+    def feed(self, username):
+        """The user's cached feed (built now on first use, then refreshed in the background)"""
+        self.last_seen[username] = time.monotonic()
+        cached = self.feeds.get(username)
+        if cached is None:
+            version = self.store.version
+            cached = self.feeds[username] = (version, self.build_feed(username))
+        return cached[1]
+
+    def _run(self, ideas_df):
+        try:
+            ids, vectors, idf = embed(ideas_df)
+            with self.lock:
+                self.ids, self.vectors, self.idf, self.size = ids, vectors, idf, len(ids)
+                self.positions = dict(zip(ids.tolist(), range(len(ids))))
+                if self.pending:
+                    self._append(pd.DataFrame(self.pending))
+                self.pending = []
+                self.ready.set()
+                # Feeds built before this ranked by trending score alone
+                self.feeds.clear()
+        except Exception:
+            # Feeds keep ranking by trending score alone
+            logger.exception("Embedding the ideas for recommendations failed")
+        while True:
+            time.sleep(self.refresh_seconds)
+            # A failed refresh leaves the cached feeds as they were until the next one
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Refreshing the recommendation feeds failed")
+
+    def refresh(self):
+        """Drop idle users, then precompute neighbours and rebuild stale feeds for the active ones"""
+        version = self.store.version
+        cutoff = time.monotonic() - ACTIVE_SECONDS
+        for username, seen in list(self.last_seen.items()):
+            if seen < cutoff:
+                self.last_seen.pop(username, None)
+                self.feeds.pop(username, None)
+        active = list(self.last_seen)
+        if self.ready.is_set():
+            self.precompute(active)
+        for username in active:
+            if self.feeds.get(username, (version,))[0] != version:
+                self.feeds[username] = (version, self.build_feed(username))
@@ -0,0 +1,127 @@
+# serve.py - Run several app worker processes behind a local sticky load balancer
+"""
+Usage:
+    python serve.py --workers 4                        # http://localhost:8501
+    python serve.py --workers 4 --db /data/ideas.db --base-port 8601
+    python serve.py --workers 4 --api-port 8502        # plus the REST API (api.py)
+
+Each worker is `streamlit run App.py` with IDEAS_DB pointing at the shared
+SQLite database (see sqlstore.py). Streamlit keeps session state, uploads and
+download buttons in the worker's memory, so a browser must stay on one worker:
+the balancer assigns new clients round-robin and pins them with a cookie.
+
+Behind a production proxy, use its own sticky routing instead, e.g. nginx:
+
+    upstream ideas { hash $cookie_ideas_worker consistent; server 127.0.0.1:8601; ... }
+
+with proxy_http_version 1.1 and the Upgrade/Connection headers set for the
+/_stcore/stream websocket.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+APP_PATH = str(Path(__file__).parent / "App.py")
+API_PATH = str(Path(__file__).parent / "api.py")
+COOKIE = b'ideas_worker'
+_COOKIE_RE = re.compile(rb'^cookie:.*\b' + COOKIE + rb'=(\d+)', re.IGNORECASE | re.MULTILINE)
+
+def start_workers(n_workers, base_port, db_path):
+    env = dict(os.environ, IDEAS_DB=db_path)
+    return [
+        subprocess.Popen([
+            sys.executable, '-m', 'streamlit', 'run', APP_PATH,
+            '--server.port', str(base_port + i),
+            '--server.address', '127.0.0.1',
+            '--server.headless', 'true'
+        ], env=env)
+        for i in range(n_workers)
+    ]
+
+async def _pipe(reader, writer):
+    try:
+        while data := await reader.read(65536):
+            writer.write(data)
+            await writer.drain()
+    finally:
+        writer.close()
+
+async def _read_head(reader):
+    """Bytes up to and including the end of the first HTTP header block"""
+    try:
+        return await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError as e:
+        return e.partial
+
+class StickyBalancer:
+    """TCP proxy that pins each browser to one worker with a cookie
+
+    Only the first request and response on a connection are inspected; the
+    rest of the connection (including websocket upgrades) is piped through.
+    """
+
+    def __init__(self, ports):
+        self.ports = ports
+        self.next_worker = itertools.cycle(range(len(ports)))
+
+    async def handle(self, client_reader, client_writer):
+        head = await _read_head(client_reader)
+        if not head:
+            client_writer.close()
+            return
+        match = _COOKIE_RE.search(head)
+        worker = int(match.group(1)) if match and int(match.group(1)) < len(self.ports) else None
+        if worker is None:
+            worker = next(self.next_worker)
+        try:
+            upstream_reader, upstream_writer = await asyncio.open_connection('127.0.0.1', self.ports[worker])
+        except OSError:
+            client_writer.close()
+            return
+        upstream_writer.write(head)
+        response = await _read_head(upstream_reader)
+        if match is None and response.endswith(b'\r\n\r\n'):
+            cookie = b'Set-Cookie: ' + COOKIE + b'=' + str(worker).encode() + b'; Path=/; SameSite=Lax\r\n'
+            response = response[:-2] + cookie + b'\r\n'
+        client_writer.write(response)
+        await asyncio.gather(_pipe(client_reader, upstream_writer), _pipe(upstream_reader, client_writer),
+                             return_exceptions=True)
+
+async def balance(port, worker_ports):
+    server = await asyncio.start_server(StickyBalancer(worker_ports).handle, '0.0.0.0', port)
+    async with server:
+        await server.serve_forever()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the idea app on several worker processes")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--port', type=int, default=8501, help="port the load balancer listens on")
+    parser.add_argument('--base-port', type=int, default=8601, help="first worker port")
+    parser.add_argument('--db', default='ideas.db', help="shared SQLite database")
+    parser.add_argument('--api-port', type=int, help="also serve the REST API (api.py) on this port")
+    args = parser.parse_args(argv)
+
+    worker_ports = [args.base_port + i for i in range(args.workers)]
+    workers = start_workers(args.workers, args.base_port, args.db)
+    print(f"{args.workers} workers on ports {worker_ports[0]}-{worker_ports[-1]}, "
+          f"load balancer on http://localhost:{args.port}")
+    if args.api_port:
+        # Starts serving once a worker has seeded the database (on its first session)
+        workers.append(subprocess.Popen([sys.executable, API_PATH, '--db', args.db, '--wait', '--host', '0.0.0.0',
+                                         '--port', str(args.api_port)]))
+    try:
+        asyncio.run(balance(args.port, worker_ports))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for worker in workers:
+            worker.terminate()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+# snapshots.py - Memory-mapped Arrow IPC snapshots of the store's tables
+"""
+A snapshot is a directory v<version>/ holding one uncompressed Arrow IPC file
+per table. Readers memory-map the files, so string columns (most of the
+bytes: titles, descriptions, ...) stay in the shared page cache instead of
+every worker owning a private pandas copy; the small numeric columns are
+copied so the store can update them in place. Rows appended later become
+extra Arrow chunks rather than a rewrite of the mapped ones.
+
+SqliteIdeaStore starts from the newest snapshot and replays the events
+written after it (the delta), then periodically materializes a new one.
+Older snapshots are thinned to one per SPACING_SECONDS over the point-in-time
+window (see prune), so any moment in it is an older snapshot plus a replay.
+"""
+import shutil
+import tempfile
+import time
+from pathlib import Path
+import pyarrow as pa
+
+TABLES = ('users', 'ideas', 'comments', 'transitions', 'categories', 'departments')
+SNAPSHOTS_KEPT = 2
+SPACING_SECONDS = 3600
+# Unfinished temporary directories (a writer crashed) are removed after this long
+STALE_TMP_SECONDS = 3600
+
+def _version_of(path):
+    return int(path.name[1:])
+
+def list_snapshots(directory):
+    """[(version, path), ...] of the complete snapshots, oldest first"""
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    paths = [path for path in directory.glob('v*') if path.is_dir() and path.name[1:].isdigit()]
+    return sorted(((_version_of(path), path) for path in paths), key=lambda snapshot: snapshot[0])
+
+def latest_snapshot(directory, max_version=None):
+    """(version, path) of the newest complete snapshot (at or below max_version), or None"""
+    snapshots = [snapshot for snapshot in list_snapshots(directory) if max_version is None or snapshot[0] <= max_version]
+    return snapshots[-1] if snapshots else None
+
+def write_snapshot(directory, tables, version, since=None):
+    """Write {name: DataFrame} as snapshot `version`; a no-op if another writer got there first
+
+    since: start (epoch seconds) of the point-in-time window older snapshots are kept for, see prune().
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    target = directory / f"v{version}"
+    if target.exists():
+        return target
+    # Written to a temporary directory and renamed, so readers never see a partial snapshot
+    tmp = Path(tempfile.mkdtemp(prefix='.tmp-', dir=directory))
+    for name, df in tables.items():
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.OSFile(str(tmp / f"{name}.arrow"), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    try:
+        tmp.rename(target)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+    prune(directory, since=since)
+    return target
+
+def load_snapshot(path):
+    """{name: DataFrame} with string columns backed by the memory-mapped files (tables it lacks are left out)"""
+    tables = {}
+    for name in TABLES:
+        if not (Path(path) / f"{name}.arrow").exists():
+            continue
+        source = pa.memory_map(str(Path(path) / f"{name}.arrow"), 'r')
+        df = pa.ipc.open_file(source).read_all().to_pandas(split_blocks=True)
+        # Numeric columns come back as read-only views of the map; the store updates them in place
+        for column in df.columns:
+            if df[column].dtype.kind in 'iufb':
+                df[column] = df[column].to_numpy(copy=True)
+        tables[name] = df
+    return tables
+
+def prune(directory, keep=SNAPSHOTS_KEPT, since=None, spacing=SPACING_SECONDS):
+    """Remove old snapshots (mapped files stay readable until unmapped); returns the oldest version kept
+
+    Keeps the newest `keep`. With `since`, also keeps the first snapshot of every `spacing` seconds
+    after it and the last one before it, the base for reading the state as of `since`.
+    """
+    snapshots = list_snapshots(directory)
+    kept = {path for _, path in snapshots[-keep:]}
+    if since is not None:
+        base, slot = None, None
+        for _, path in snapshots:
+            created = path.stat().st_mtime
+            if created < since:
+                base = path
+            elif int(created // spacing) != slot:
+                kept.add(path)
+                slot = int(created // spacing)
+        if base is not None:
+            kept.add(base)
+    for _, path in snapshots:
+        if path not in kept:
+            shutil.rmtree(path, ignore_errors=True)
+    for tmp in Path(directory).glob('.tmp-*'):
+        if tmp.stat().st_mtime < time.time() - STALE_TMP_SECONDS:
+            shutil.rmtree(tmp, ignore_errors=True)
+    remaining = [version for version, path in snapshots if path in kept]
+    return min(remaining) if remaining else None
@@ -0,0 +1,581 @@
+# sqlstore.py - Idea store backed by a SQLite (WAL) database shared by several app processes
+"""
+App.py persists to ideas.db with this store unless IDEAS_DB names another
+file (or is empty, for the in-memory IdeaStore). Multi-process deployment:
+
+    IDEAS_DB=ideas.db streamlit run App.py --server.port 8601   # one per worker
+    python serve.py --workers 4                                  # or: workers + load balancer
+
+Every worker keeps the in-memory IdeaStore frames as a read cache. Writes go
+to SQLite inside a BEGIN IMMEDIATE transaction together with an entry in the
+events table; each worker replays new events by re-reading just the rows they
+touched (sync() runs at the start of every script run and in the live
+activity fragment). memo() results are shared through the cache table, keyed
+by the database event version, so one worker's aggregation serves the others
+until the next write.
+
+Workers start from the newest Arrow snapshot in IDEAS_SNAPSHOT_DIR (default
+<db>.snapshots, see snapshots.py) and replay only the events after it; every
+IDEAS_SNAPSHOT_EVERY events one worker writes a fresh snapshot in the
+background.
+
+Each event also records when it happened and the touched rows as they were
+after the write (zlib-compressed JSON), which makes the event log a
+write-ahead log of row images: tables_at(T) loads the newest snapshot at or
+before T and applies the images logged up to T. Snapshots are thinned to one
+per hour over the last IDEAS_PITR_HOURS, and events older than the oldest
+remaining snapshot are compacted away; a worker that fell behind that point
+re-reads whole tables instead of replaying.
+"""
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+import snapshots
+from content import DETAIL_COLUMNS, split_details
+from dimensions import DEFAULTS, DIMENSIONS, seed_frame
+from history import COLUMNS as TRANSITION_COLUMNS
+from store import IdeaStore
+from tags import TagIndex, normalize_tags
+
+TABLE_KEYS = {'users': 'username', 'ideas': 'id', 'comments': 'id', 'transitions': 'id', 'categories': 'id',
+              'departments': 'id'}
+SNAPSHOT_EVERY = int(os.environ.get('IDEAS_SNAPSHOT_EVERY', 500))
+PITR_HOURS = float(os.environ.get('IDEAS_PITR_HOURS', 168))
+# NORMAL survives process crashes; FULL also survives power loss, at an fsync per write
+SYNCHRONOUS = os.environ.get('IDEAS_DB_SYNC', 'NORMAL')
+
+def connect(path):
+    db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute(f'PRAGMA synchronous={SYNCHRONOUS}')
+    return db
+
+def _python_rows(df):
+    """Rows as tuples of plain Python values (sqlite3 can't bind numpy scalars or timestamps)"""
+    df = df.assign(**{column: df[column].dt.strftime('%Y-%m-%d %H:%M:%S')
+                      for column in df.columns if df[column].dtype.kind == 'M'})
+    values = df.astype(object).where(df.notna(), None)
+    return list(values.itertuples(index=False, name=None))
+
+def _create_table(db, name, df):
+    columns = ', '.join(f'"{column}"' for column in df.columns)
+    db.execute(f'CREATE TABLE {name} ({columns})')
+    db.execute(f'CREATE UNIQUE INDEX {name}_key ON {name}("{TABLE_KEYS[name]}")')
+    placeholders = ', '.join('?' for _ in df.columns)
+    db.executemany(f'INSERT INTO {name} VALUES ({placeholders})', _python_rows(df))
+
+def _one(db, sql, params=()):
+    """First result row (fetched to the end so RETURNING statements finish before COMMIT)"""
+    rows = db.execute(sql, params).fetchall()
+    return rows[0] if rows else None
+
+def _insert(db, name, row):
+    columns = ', '.join(f'"{column}"' for column in row)
+    placeholders = ', '.join('?' for _ in row)
+    db.execute(f'INSERT INTO {name} ({columns}) VALUES ({placeholders})', _python_rows(pd.DataFrame([row]))[0])
+
+class SqliteIdeaStore(IdeaStore):
+    """IdeaStore whose writes go through a shared SQLite database"""
+
+    def __init__(self, path, users_df, ideas_df, comments_df, transitions_df=None, snapshot_dir=None, dimensions=None):
+        self.db = connect(path)
+        self.db_lock = threading.RLock()
+        self.snapshot_dir = snapshot_dir or os.environ.get('IDEAS_SNAPSHOT_DIR') or f"{path}.snapshots"
+        self.materializing = threading.Lock()
+        with self._transaction() as db:
+            if not db.execute("SELECT 1 FROM sqlite_master WHERE name = 'events'").fetchone():
+                # First worker on an empty database seeds it
+                for name, df in (('users', users_df), ('ideas', ideas_df), ('comments', comments_df)):
+                    _create_table(db, name, df)
+                # AUTOINCREMENT: versions are never reused, even once compaction has emptied the table
+                db.execute('CREATE TABLE events (version INTEGER PRIMARY KEY AUTOINCREMENT, delta TEXT, touched TEXT)')
+                db.execute('CREATE TABLE cache (key TEXT PRIMARY KEY, version INTEGER, value BLOB)')
+            if not db.execute("SELECT 1 FROM sqlite_master WHERE name = 'transitions'").fetchone():
+                # Also upgrades databases created before the status history existed
+                _create_table(db, 'transitions', transitions_df if transitions_df is not None
+                              else pd.DataFrame(columns=TRANSITION_COLUMNS))
+            # ... and before it kept evaluation scores and comments
+            present = {row[1] for row in db.execute('PRAGMA table_info(transitions)')}
+            for column in TRANSITION_COLUMNS:
+                if column not in present:
+                    db.execute(f'ALTER TABLE transitions ADD COLUMN "{column}"')
+            # One-off jobs (e.g. mailing a digest) that only one worker may run
+            db.execute('CREATE TABLE IF NOT EXISTS claims (key TEXT PRIMARY KEY)')
+            # The database's identity, shared by its workers (see IdeaStore.instance_id)
+            db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+            db.execute("INSERT OR IGNORE INTO meta VALUES ('instance_id', ?)", (uuid.uuid4().hex[:8],))
+            instance_id = db.execute("SELECT value FROM meta WHERE key = 'instance_id'").fetchone()[0]
+            # When each event happened and the row images it left, for point-in-time reads
+            present = {row[1] for row in db.execute('PRAGMA table_info(events)')}
+            for column in ('at', 'images'):
+                if column not in present:
+                    db.execute(f'ALTER TABLE events ADD COLUMN {column}')
+            # Comment threads and per-user likes
+            if 'parent_id' not in {row[1] for row in db.execute('PRAGMA table_info(comments)')}:
+                db.execute('ALTER TABLE comments ADD COLUMN parent_id INTEGER')
+            db.execute('CREATE INDEX IF NOT EXISTS comments_idea_date ON comments(idea_id, date)')
+            db.execute('CREATE TABLE IF NOT EXISTS comment_likes (comment_id INTEGER, username TEXT, '
+                       'PRIMARY KEY (comment_id, username))')
+            # Category and department tables, referenced by integer id from ideas and users
+            for kind, (table, column, id_column) in DIMENSIONS.items():
+                if not db.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (kind,)).fetchone():
+                    rows = (dimensions or {}).get(kind)
+                    if rows is None:
+                        used = db.execute(f'SELECT "{column}" FROM {table} GROUP BY "{column}" ORDER BY min(rowid)')
+                        rows = seed_frame(DEFAULTS[kind], [row[0] for row in used])
+                    _create_table(db, kind, rows)
+                if id_column not in {row[1] for row in db.execute(f'PRAGMA table_info({table})')}:
+                    db.execute(f'ALTER TABLE {table} ADD COLUMN {id_column} INTEGER')
+                    db.execute(f'UPDATE {table} SET {id_column} = coalesce((SELECT id FROM {kind} '
+                               f'WHERE name = {table}."{column}"), 0)')
+            self.db_version = db.execute('SELECT coalesce(max(version), 0) FROM events').fetchone()[0]
+            latest = snapshots.latest_snapshot(self.snapshot_dir)
+            if latest is not None and latest[0] <= self.db_version:
+                # Map the snapshot; sync() below replays the events written since
+                self.db_version, snapshot_path = latest
+                tables = snapshots.load_snapshot(snapshot_path)
+                # Snapshots from before a table existed still have it in the database
+                tables.update({name: self._read(name) for name in snapshots.TABLES if name not in tables})
+            else:
+                latest = None
+                tables = {name: self._read(name) for name in snapshots.TABLES}
+        self.snapshot_version = self.db_version
+        # Detail text stays in the ideas table and is read per idea (see get_details); snapshots
+        # written before that still carry it
+        tables['ideas'] = split_details(tables['ideas'])[0]
+        super().__init__(tables['users'], tables['ideas'], tables['comments'], TagIndex.from_ideas(tables['ideas']),
+                         tables['transitions'], {kind: tables[kind] for kind in DIMENSIONS})
+        self.instance_id = instance_id
+        self.sync()
+        if latest is None:
+            self.materialize()
+
+    @property
+    def data_version(self):
+        return self.db_version
+
+    @contextmanager
+    def _transaction(self):
+        with self.db_lock:
+            self.db.execute('BEGIN IMMEDIATE')
+            try:
+                yield self.db
+            except BaseException:
+                self.db.execute('ROLLBACK')
+                raise
+            self.db.execute('COMMIT')
+
+    def _columns(self, name):
+        """Columns the in-memory frame keeps (all but the ideas' detail text)"""
+        if name != 'ideas':
+            return '*'
+        present = [row[1] for row in self.db.execute('PRAGMA table_info(ideas)')]
+        return ', '.join(f'"{column}"' for column in present if column not in DETAIL_COLUMNS)
+
+    def _read(self, name, keys=None):
+        if keys is None:
+            return pd.read_sql_query(f'SELECT {self._columns(name)} FROM {name}', self.db)
+        placeholders = ', '.join('?' for _ in keys)
+        return pd.read_sql_query(f'SELECT {self._columns(name)} FROM {name} WHERE "{TABLE_KEYS[name]}" IN ({placeholders})',
+                                 self.db, params=list(keys))
+
+    def get_details(self, idea_id):
+        """An idea's detail text, read from the database when it is shown"""
+        columns = ', '.join(f'"{column}"' for column in DETAIL_COLUMNS)
+        with self.db_lock:
+            row = self.db.execute(f'SELECT {columns} FROM ideas WHERE id = ?', (int(idea_id),)).fetchone()
+        return dict(zip(DETAIL_COLUMNS, row)) if row is not None else None
+
+    def details_frame(self, idea_ids=None):
+        columns = ', '.join(f'"{column}"' for column in ['id'] + DETAIL_COLUMNS)
+        with self.db_lock:
+            if idea_ids is None:
+                details = pd.read_sql_query(f'SELECT {columns} FROM ideas', self.db)
+            else:
+                ids = [int(idea_id) for idea_id in idea_ids]
+                placeholders = ', '.join('?' for _ in ids)
+                details = pd.read_sql_query(f'SELECT {columns} FROM ideas WHERE id IN ({placeholders})',
+                                            self.db, params=ids)
+        return details.set_index('id').rename_axis(None)
+
+    def _log(self, db, delta, **touched):
+        """Record a write; runs last in its transaction, so the row images are the rows after it"""
+        images = {}
+        for name, keys in touched.items():
+            placeholders = ', '.join('?' for _ in keys)
+            cursor = db.execute(f'SELECT * FROM {name} WHERE "{TABLE_KEYS[name]}" IN ({placeholders})', list(keys))
+            columns = [column[0] for column in cursor.description]
+            images[name] = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        db.execute('INSERT INTO events (delta, touched, at, images) VALUES (?, ?, ?, ?)',
+                   (json.dumps(delta, default=str), json.dumps(touched, default=str),
+                    datetime.now().isoformat(timespec='seconds'),
+                    zlib.compress(json.dumps(images, default=str).encode())))
+
+    # Replication
+    def sync(self):
+        """Apply writes committed by any worker since the last sync"""
+        with self.db_lock:
+            events = self.db.execute('SELECT version, delta, touched FROM events WHERE version > ? ORDER BY version',
+                                     (self.db_version,)).fetchall()
+            if not events:
+                return
+            if events[0][0] > self.db_version + 1:
+                # The events in between were compacted away: re-read whole tables instead
+                fresh = {name: self._read(name) for name in TABLE_KEYS}
+            else:
+                touched = {name: set() for name in TABLE_KEYS}
+                for _, _, keys in events:
+                    for name, values in json.loads(keys).items():
+                        touched[name].update(values)
+                fresh = {name: self._read(name, sorted(keys)) for name, keys in touched.items() if keys}
+        with self.lock:
+            # Another thread's sync may have applied these events since they were read: apply and
+            # publish each one once. A sync holding newer events read its rows later, so they are
+            # at least as fresh as the ones already applied.
+            events = [event for event in events if event[0] > self.db_version]
+            if not events:
+                return
+            for name, rows in fresh.items():
+                self._upsert(name, rows)
+            for version, delta, _ in events:
+                self.db_version = version
+                self.bus.publish(json.loads(delta))
+        if self.db_version - self.snapshot_version >= SNAPSHOT_EVERY and not self.materializing.locked():
+            threading.Thread(target=self.materialize, daemon=True).start()
+
+    def materialize(self):
+        """Write the current tables as a snapshot for workers that start later"""
+        if not self.materializing.acquire(blocking=False):
+            return
+        try:
+            with self.lock:
+                version = self.db_version
+                # Shallow copies: copy-on-write (always on in pandas 3) keeps them fixed as the store updates
+                tables = {name: getattr(self, f'{name}_df').copy(deep=False) for name in ('users', 'ideas', 'comments')}
+                tables['transitions'] = self.history.frame()
+                tables.update({kind: getattr(self, kind).frame() for kind in DIMENSIONS})
+            snapshots.write_snapshot(self.snapshot_dir, tables, version, since=time.time() - PITR_HOURS * 3600)
+            self.snapshot_version = version
+            self.compact()
+        finally:
+            self.materializing.release()
+
+    def compact(self):
+        """Delete the events no remaining snapshot needs (startup and point-in-time reads begin at one)
+
+        The newest event always stays: databases created before the events table used
+        AUTOINCREMENT would otherwise hand out its version again after emptying it.
+        """
+        oldest = snapshots.list_snapshots(self.snapshot_dir)
+        if oldest:
+            with self._transaction() as db:
+                db.execute('DELETE FROM events WHERE version <= ? AND version < (SELECT max(version) FROM events)',
+                           (oldest[0][0],))
+
+    # Point in time
+    def tables_at(self, timestamp):
+        """{name: DataFrame} as the tables were at timestamp (the state after the last write before it)
+
+        Raises ValueError if the point-in-time window doesn't reach back that far.
+        """
+        at = pd.Timestamp(timestamp).strftime('%Y-%m-%dT%H:%M:%S')
+        with self.db_lock:
+            # The last write before `at` is the one before the first write after it (events logged
+            # before timestamps existed have none, and all come first)
+            after = self.db.execute('SELECT min(version) FROM events WHERE at > ?', (at,)).fetchone()[0]
+            version = after - 1 if after is not None else \
+                self.db.execute('SELECT coalesce(max(version), 0) FROM events').fetchone()[0]
+            base = snapshots.latest_snapshot(self.snapshot_dir, max_version=version)
+            if base is None:
+                raise ValueError(f"No snapshot from before {at}: the point-in-time window starts later")
+            events = self.db.execute('SELECT version, images FROM events WHERE version > ? AND version <= ? '
+                                     'ORDER BY version', (base[0], version)).fetchall()
+        if any(images is None for _, images in events):
+            raise ValueError(f"Events before {at} were written before row images were logged")
+        tables = snapshots.load_snapshot(base[1])
+        for kind in DIMENSIONS:
+            # Snapshots from before the dimension tables: today's names
+            tables.setdefault(kind, getattr(self, kind).frame())
+        changed = {name: [] for name in TABLE_KEYS}
+        for _, images in events:
+            for name, rows in json.loads(zlib.decompress(images)).items():
+                changed[name].extend(rows)
+        for name, rows in changed.items():
+            if not rows:
+                continue
+            key = TABLE_KEYS[name]
+            rows = pd.DataFrame(rows).drop_duplicates(key, keep='last')
+            table = tables[name]
+            rows = rows[[column for column in rows.columns if column in table.columns]]
+            tables[name] = pd.concat([table[~table[key].isin(rows[key])], rows], ignore_index=True)
+        for name in ('ideas', 'comments', 'transitions'):
+            tables[name] = tables[name].sort_values('id', ignore_index=True)
+        # A rename only logs the dimension row; the names on ideas and users follow their ids
+        for kind, (table, column, id_column) in DIMENSIONS.items():
+            if id_column in tables[table].columns:
+                names = tables[table][id_column].map(dict(zip(tables[kind]['id'], tables[kind]['name'])))
+                tables[table][column] = names.fillna(tables[table][column])
+        # Snapshots hold the transition times as datetimes, row images as text
+        tables['transitions']['at'] = pd.to_datetime(tables['transitions']['at'], format='mixed')
+        # Detail text is never edited, so today's is also the text at `at`
+        details = self.details_frame(tables['ideas']['id'].tolist())
+        tables['ideas'] = split_details(tables['ideas'])[0].join(details, on='id')
+        return tables
+
+    def write_copy(self, timestamp, path):
+        """A new database (with its snapshot) holding the store as of timestamp; start workers on it to roll back"""
+        if Path(path).exists():
+            raise FileExistsError(path)
+        tables = self.tables_at(timestamp)
+        copy = SqliteIdeaStore(path, tables['users'], tables['ideas'], tables['comments'], tables['transitions'],
+                               snapshot_dir=f"{path}.snapshots", dimensions={kind: tables[kind] for kind in DIMENSIONS})
+        copy.db.close()
+        return path
+
+    def _upsert(self, name, rows):
+        if name in DIMENSIONS:
+            dimension = getattr(self, name)
+            for option_id, option in zip(rows['id'].tolist(), rows['name'].tolist()):
+                if dimension.names.get(option_id) not in (None, option):
+                    self._relabel(name, option_id, option)
+                dimension.set(option_id, option)
+            return
+        if name == 'transitions':
+            # Append-only: rows come sorted by id, which follows commit order
+            for row in rows[rows['id'] >= self.history.next_id].itertuples(index=False):
+                self.history.append(row.idea_id, row.from_status, row.to_status, row.actor, at=row.at,
+                                    score=row.score, comment=row.comment, transition_id=row.id)
+            return
+        rows = rows.set_index(TABLE_KEYS[name], drop=False).rename_axis(None)
+        frame = getattr(self, f'{name}_df')
+        existing = rows.index.isin(frame.index)
+        if name == 'comments':
+            rows['parent_id'] = rows['parent_id'].astype('Int64')
+            for comment_id, idea_id, parent_id in zip(rows.index[~existing], rows['idea_id'][~existing],
+                                                      rows['parent_id'][~existing]):
+                self.threads.add(comment_id, idea_id, None if pd.isna(parent_id) else parent_id)
+        if existing.any():
+            frame.loc[rows.index[existing], rows.columns] = rows[existing]
+        if not existing.all():
+            frame = pd.concat([frame, rows[~existing]])
+            setattr(self, f'{name}_df', frame)
+        if name == 'ideas':
+            for idea_id, raw, submit_date in zip(rows['id'], rows['tags'], rows['submit_date']):
+                self.tag_index.add(int(idea_id), normalize_tags(raw), submit_date)
+
+    def memo(self, key, compute, shared=True):
+        """Result of compute() cached until the next write by any worker
+
+        Shared results go through the cache table; pass shared=False for large
+        intermediate values that are cheaper to recompute than to pickle.
+        """
+        version = self.db_version
+        hit = self._memo.get(key)
+        if hit is not None and hit[0] == version:
+            return hit[1]
+        if not shared:
+            value = compute()
+            self._memo[key] = (version, value)
+            return value
+        with self.db_lock:
+            row = self.db.execute('SELECT value FROM cache WHERE key = ? AND version = ?',
+                                  (repr(key), version)).fetchone()
+        if row is not None:
+            value = pickle.loads(row[0])
+        else:
+            value = compute()
+            with self.db_lock:
+                self.db.execute('INSERT OR REPLACE INTO cache VALUES (?, ?, ?)',
+                                (repr(key), version, pickle.dumps(value)))
+        self._memo[key] = (version, value)
+        return value
+
+    def claim(self, key):
+        """True for the first worker to claim key"""
+        with self.db_lock:
+            return self.db.execute('INSERT OR IGNORE INTO claims VALUES (?)', (key,)).rowcount == 1
+
+    def _insert_transition(self, db, idea_id, from_status, to_status, actor, score=None, comment=None):
+        transition_id = db.execute('SELECT coalesce(max(id), 0) + 1 FROM transitions').fetchone()[0]
+        _insert(db, 'transitions', {
+            'id': transition_id,
+            'idea_id': idea_id,
+            'from_status': from_status,
+            'to_status': to_status,
+            'actor': actor,
+            'at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'score': score,
+            'comment': comment or None
+        })
+        return transition_id
+
+    # Writes
+    def add_idea(self, idea, tags, actor):
+        with self._transaction() as db:
+            idea_id = db.execute('SELECT coalesce(max(id), 0) + 1 FROM ideas').fetchone()[0]
+            category = _one(db, 'SELECT id FROM categories WHERE name = ?', (idea['category'],))
+            _insert(db, 'ideas', dict(idea, id=idea_id, category_id=category[0] if category else 0))
+            db.execute('UPDATE users SET ideas_submitted = ideas_submitted + 1 WHERE username = ?',
+                       (idea['submitter'],))
+            transition_id = self._insert_transition(db, idea_id, None, idea['status'], actor)
+            self._log(db, {'type': 'idea_added', 'idea_id': idea_id, 'title': idea['title'], 'actor': actor},
+                      ideas=[idea_id], users=[idea['submitter']], transitions=[transition_id])
+        self.sync()
+        return idea_id
+
+    def upvote(self, idea_id, actor):
+        idea_id = int(idea_id)
+        with self._transaction() as db:
+            row = _one(db, 'UPDATE ideas SET upvotes = upvotes + 1 WHERE id = ? RETURNING upvotes, title',
+                       (idea_id,))
+            if row is None:
+                return None
+            upvotes, title = row
+            self._log(db, {'type': 'idea_upvoted', 'idea_id': idea_id, 'upvotes': upvotes,
+                           'title': title, 'actor': actor}, ideas=[idea_id])
+        self.sync()
+        return upvotes
+
+    def add_comment(self, idea_id, username, text, parent_id=None):
+        """Comment on an idea, or reply to one of its comments (replies to replies join the same thread)"""
+        idea_id = int(idea_id)
+        with self._transaction() as db:
+            if parent_id is not None:
+                parent = _one(db, 'SELECT parent_id FROM comments WHERE id = ? AND idea_id = ?',
+                              (int(parent_id), idea_id))
+                if parent is None:
+                    return None
+                parent_id = int(parent[0] if parent[0] is not None else parent_id)
+            row = _one(db, 'UPDATE ideas SET comments_count = comments_count + 1 WHERE id = ? RETURNING title',
+                       (idea_id,))
+            if row is None:
+                return None
+            comment_id = db.execute('SELECT coalesce(max(id), 0) + 1 FROM comments').fetchone()[0]
+            _insert(db, 'comments', {
+                'id': comment_id,
+                'idea_id': idea_id,
+                'username': username,
+                'comment': text,
+                'date': datetime.now().strftime('%Y-%m-%d'),
+                'likes': 0,
+                'parent_id': parent_id
+            })
+            self._log(db, {'type': 'comment_added', 'idea_id': idea_id, 'comment_id': comment_id,
+                           'parent_id': parent_id, 'title': row[0], 'actor': username},
+                      ideas=[idea_id], comments=[comment_id])
+        self.sync()
+        return comment_id
+
+    def like_comment(self, comment_id, username):
+        """Add username's like to a comment; returns the new count, or None if unknown or already liked"""
+        comment_id = int(comment_id)
+        with self._transaction() as db:
+            if _one(db, 'SELECT 1 FROM comments WHERE id = ?', (comment_id,)) is None:
+                return None
+            # The primary key makes the like and its dedupe one atomic step
+            if db.execute('INSERT OR IGNORE INTO comment_likes VALUES (?, ?)', (comment_id, username)).rowcount != 1:
+                return None
+            likes, idea_id = _one(db, 'UPDATE comments SET likes = likes + 1 WHERE id = ? RETURNING likes, idea_id',
+                                  (comment_id,))
+            title = _one(db, 'SELECT title FROM ideas WHERE id = ?', (idea_id,))[0]
+            self._log(db, {'type': 'comment_liked', 'idea_id': idea_id, 'comment_id': comment_id,
+                           'likes': likes, 'title': title, 'actor': username}, comments=[comment_id])
+        self.sync()
+        return likes
+
+    def liked(self, username, comment_ids):
+        """The ids among comment_ids that username already liked (from any worker)"""
+        ids = [int(comment_id) for comment_id in comment_ids]
+        if not ids:
+            return set()
+        placeholders = ', '.join('?' for _ in ids)
+        with self.db_lock:
+            rows = self.db.execute(f'SELECT comment_id FROM comment_likes WHERE username = ? '
+                                   f'AND comment_id IN ({placeholders})', [username] + ids).fetchall()
+        return {row[0] for row in rows}
+
+    def set_status(self, idea_id, status, actor, scores=None, comment=None):
+        """Change an idea's status, optionally recording its evaluation scores and comment"""
+        idea_id = int(idea_id)
+        with self._transaction() as db:
+            previous = _one(db, 'SELECT status FROM ideas WHERE id = ?', (idea_id,))
+            if previous is None:
+                return False
+            title, submitter = _one(db, 'UPDATE ideas SET status = ? WHERE id = ? RETURNING title, submitter',
+                                    (status, idea_id))
+            transition_id = self._insert_transition(db, idea_id, previous[0], status, actor,
+                                                    int(sum(scores.values())) if scores else None, comment)
+            if scores:
+                assignments = ', '.join(f'"{column}" = ?' for column in scores)
+                db.execute(f'UPDATE ideas SET {assignments}, total_score = ? WHERE id = ?',
+                           [int(v) for v in scores.values()] + [int(sum(scores.values())), idea_id])
+            if status == 'Approved':
+                db.execute('UPDATE users SET ideas_approved = ideas_approved + 1 WHERE username = ?', (submitter,))
+            self._log(db, {'type': 'status_changed', 'idea_id': idea_id, 'status': status,
+                           'title': title, 'actor': actor},
+                      ideas=[idea_id], users=[submitter], transitions=[transition_id])
+        self.sync()
+        return True
+
+    def add_user(self, user, actor):
+        with self._transaction() as db:
+            if db.execute('SELECT 1 FROM users WHERE username = ?', (user['username'],)).fetchone():
+                return False
+            department = _one(db, 'SELECT id FROM departments WHERE name = ?', (user['department'],))
+            _insert(db, 'users', dict(user, department_id=department[0] if department else 0))
+            self._log(db, {'type': 'user_added', 'username': user['username'], 'actor': actor},
+                      users=[user['username']])
+        self.sync()
+        return True
+
+    def add_option(self, kind, name, actor):
+        """Add a category or department (kind as in dimensions.DIMENSIONS); its id, or None if the name exists"""
+        self.dimension(kind)
+        with self._transaction() as db:
+            if _one(db, f'SELECT 1 FROM {kind} WHERE name = ?', (name,)) is not None:
+                return None
+            option_id = db.execute(f'SELECT coalesce(max(id), 0) + 1 FROM {kind}').fetchone()[0]
+            _insert(db, kind, {'id': option_id, 'name': name})
+            self._log(db, {'type': 'option_added', 'dimension': kind, 'option_id': option_id, 'name': name,
+                           'actor': actor}, **{kind: [option_id]})
+        self.sync()
+        return option_id
+
+    def rename_option(self, kind, option_id, name, actor):
+        """Rename a category or department on every idea or user; False if unknown or the name is taken"""
+        table, column, id_column = DIMENSIONS[kind]
+        option_id = int(option_id)
+        with self._transaction() as db:
+            if _one(db, f'SELECT 1 FROM {kind} WHERE name = ?', (name,)) is not None:
+                return False
+            if db.execute(f'UPDATE {kind} SET name = ? WHERE id = ?', (name, option_id)).rowcount != 1:
+                return False
+            db.execute(f'UPDATE {table} SET "{column}" = ? WHERE {id_column} = ?', (name, option_id))
+            # Only the dimension row is logged: every worker relabels its own rows (see _upsert)
+            self._log(db, {'type': 'option_renamed', 'dimension': kind, 'option_id': option_id, 'name': name,
+                           'actor': actor}, **{kind: [option_id]})
+        self.sync()
+        return True
+
+    def award_points(self, username, points, level_for):
+        """Add points and recompute the level with level_for(points); returns the new total"""
+        with self._transaction() as db:
+            row = _one(db, 'UPDATE users SET points = points + ? WHERE username = ? RETURNING points',
+                       (int(points), username))
+            if row is None:
+                return None
+            current_points = row[0]
+            db.execute('UPDATE users SET level = ? WHERE username = ?', (level_for(current_points), username))
+            self._log(db, {'type': 'points_awarded', 'username': username, 'points': points,
+                           'total': current_points, 'actor': username}, users=[username])
+        self.sync()
+        return current_points
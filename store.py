@@ -0,0 +1,346 @@
+# store.py - Process-wide idea store shared by every session, with change notifications
+import itertools
+import threading
+import uuid
+from collections import deque
+from datetime import datetime
+import pandas as pd
+from comments import CommentThreads, parent_ids
+from content import DETAIL_COLUMNS, ContentStore, split_details
+from dimensions import DEFAULTS, DIMENSIONS, Dimension, seed_frame
+from history import TransitionLog
+
+EVENT_LOG_SIZE = 1000
+
+class EventBus:
+    """In-process pub/sub: a versioned, bounded log of deltas that sessions read from their last seen version"""
+
+    def __init__(self, size=EVENT_LOG_SIZE):
+        self.lock = threading.Lock()
+        self.version = 0
+        self.log = deque(maxlen=size)
+        self.listeners = []
+
+    def subscribe(self, listener):
+        """Call listener(delta) after every publish, in the publisher's thread (keep it O(1))"""
+        self.listeners.append(listener)
+
+    def publish(self, delta):
+        with self.lock:
+            self.version += 1
+            delta = dict(delta, version=self.version, at=datetime.now().isoformat(timespec='seconds'))
+            self.log.append(delta)
+        for listener in self.listeners:
+            listener(delta)
+        return delta
+
+    def since(self, version):
+        """Deltas newer than version, or None if some were already dropped from the log"""
+        with self.lock:
+            if version >= self.version:
+                return []
+            if not self.log or self.log[0]['version'] > version + 1:
+                return None
+            return [delta for delta in self.log if delta['version'] > version]
+
+def _next_id(df):
+    return int(df['id'].max()) + 1 if not df.empty else 1
+
+class IdeaStore:
+    """Ideas, users, comments, status history and the tag index behind one lock; every write publishes a delta
+
+    Ideas are indexed by their id and users by username, so single rows are
+    addressed with .at/.loc in O(1); new ids come from monotonic sequences.
+    New ideas and comments are queued in O(1) and merged into their frame
+    with one concat when it is next read, so a burst of inserts copies the
+    frame once instead of once per row.
+    """
+
+    def __init__(self, users_df, ideas_df, comments_df, tag_index, transitions_df=None, dimensions=None):
+        self.lock = threading.RLock()
+        # {name: frame} behind the ideas_df and comments_df properties, and the rows added since each was read
+        self._frames = {}
+        self._appended = {'ideas': [], 'comments': []}
+        self.users_df = users_df.set_index('username', drop=False).rename_axis(None)
+        # Long detail text lives in the content store; the frame keeps ids and short metadata
+        self.ideas_df, details_df = split_details(ideas_df.set_index('id', drop=False).rename_axis(None))
+        self.content = ContentStore.from_frame(details_df)
+        # Managed categories and departments ({name: (id, name) frame}, seeded from the data if not
+        # given); ideas and users reference them by integer id next to the name
+        for kind, (table, column, id_column) in DIMENSIONS.items():
+            frame = getattr(self, f'{table}_df')
+            rows = (dimensions or {}).get(kind)
+            setattr(self, kind, Dimension.from_frame(rows if rows is not None else seed_frame(DEFAULTS[kind], frame[column])))
+            if id_column not in frame.columns:
+                frame[id_column] = getattr(self, kind).codes(frame[column])
+        # (number of ideas, submitters in order of first idea): ideas are only ever added
+        self._submitters = None
+        self.comments_df = comments_df.set_index('id', drop=False).rename_axis(None)
+        # Replies point at a top-level comment; tables from before threads have no parent_id
+        parents = parent_ids(self.comments_df)
+        self.comments_df['parent_id'] = pd.arrays.IntegerArray(parents, parents == 0)
+        self.threads = CommentThreads.from_frame(self.comments_df)
+        # (comment id, username) of every like since startup, so each user likes a comment once
+        self.comment_likes = set()
+        # Append-only status and evaluation history, indexed by idea and by reviewer
+        self.history = TransitionLog.from_frame(transitions_df)
+        self.tag_index = tag_index
+        self.idea_ids = itertools.count(_next_id(ideas_df))
+        self.comment_ids = itertools.count(_next_id(comments_df))
+        self.bus = EventBus()
+        # Tells this store's data apart from other stores' and earlier runs' (data_version restarts at 0)
+        self.instance_id = uuid.uuid4().hex[:8]
+        self._memo = {}
+        self.claims = set()
+
+    @property
+    def ideas_df(self):
+        return self._merged('ideas')
+
+    @ideas_df.setter
+    def ideas_df(self, frame):
+        self._frames['ideas'] = frame
+
+    @property
+    def comments_df(self):
+        return self._merged('comments')
+
+    @comments_df.setter
+    def comments_df(self, frame):
+        self._frames['comments'] = frame
+
+    def _merged(self, name):
+        """The frame with the rows appended since it was last read merged in"""
+        if self._appended[name]:
+            with self.lock:
+                rows = self._appended[name]
+                if rows:
+                    self._appended[name] = []
+                    added = pd.DataFrame(rows, index=[row['id'] for row in rows])
+                    if name == 'comments':
+                        added = added.astype({'parent_id': 'Int64'})
+                    self._frames[name] = pd.concat([self._frames[name], added])
+        return self._frames[name]
+
+    @property
+    def version(self):
+        return self.bus.version
+
+    @property
+    def data_version(self):
+        """Version that names the same data in every process sharing the store (see sqlstore.py)"""
+        return self.bus.version
+
+    def sync(self):
+        """Pick up writes made outside this process (nothing to do for an in-process store)"""
+
+    def memo(self, key, compute, shared=True):
+        """Result of compute() cached until the next write (shared: may be copied to other workers)"""
+        version = self.bus.version
+        hit = self._memo.get(key)
+        if hit is not None and hit[0] == version:
+            return hit[1]
+        value = compute()
+        self._memo[key] = (version, value)
+        return value
+
+    def claim(self, key):
+        """True for the first caller to claim key (one process: always the first time)"""
+        with self.lock:
+            if key in self.claims:
+                return False
+            self.claims.add(key)
+            return True
+
+    def has_idea(self, idea_id):
+        return idea_id in self.ideas_df.index
+
+    def get_idea(self, idea_id):
+        return self.ideas_df.loc[idea_id].to_dict() if idea_id in self.ideas_df.index else None
+
+    def get_details(self, idea_id):
+        """An idea's problem, solution, benefits and resources text (None if unknown)"""
+        return self.content.get(idea_id)
+
+    def details_frame(self, idea_ids=None):
+        return self.content.frame(idea_ids)
+
+    def export_ideas(self):
+        """(data_version, the ideas frame at that version with the detail text joined back in)"""
+        with self.lock:
+            # Shallow copy: copy-on-write keeps it fixed while the store keeps updating
+            version, ideas_df = self.data_version, self.ideas_df.copy(deep=False)
+        return version, ideas_df.join(self.details_frame(), how='left')
+
+    def export_users(self):
+        """(data_version, the users frame at that version without the password hashes)"""
+        with self.lock:
+            return self.data_version, self.users_df.drop(columns='password')
+
+    def dimension(self, kind):
+        """The Dimension for 'categories' or 'departments'"""
+        if kind not in DIMENSIONS:
+            raise KeyError(kind)
+        return getattr(self, kind)
+
+    def submitter_options(self):
+        """Usernames that submitted ideas, in order of their first idea (cached until an idea is added)"""
+        ideas_df = self.ideas_df
+        cached = self._submitters
+        if cached is None or cached[0] != len(ideas_df):
+            cached = self._submitters = (len(ideas_df), ideas_df['submitter'].unique().tolist())
+        return cached[1]
+
+    def get_comments(self, comment_ids):
+        """Comment rows as dicts, in the order of comment_ids"""
+        return self.comments_df.loc[list(comment_ids)].to_dict('records') if len(comment_ids) else []
+
+    def liked(self, username, comment_ids):
+        """The ids among comment_ids that username already liked"""
+        return {comment_id for comment_id in comment_ids if (comment_id, username) in self.comment_likes}
+
+    def get_user(self, username):
+        return self.users_df.loc[username].to_dict() if username in self.users_df.index else None
+
+    # Writes
+    def add_idea(self, idea, tags, actor):
+        with self.lock:
+            idea_id = next(self.idea_ids)
+            self.content.add(idea_id, idea)
+            idea = {column: value for column, value in dict(idea, id=idea_id).items() if column not in DETAIL_COLUMNS}
+            idea['category_id'] = self.categories.id_for(idea['category']) or 0
+            self._appended['ideas'].append(idea)
+            self.tag_index.add(idea_id, tags, idea['submit_date'])
+            self._increment_user(idea['submitter'], 'ideas_submitted')
+            self.history.append(idea_id, None, idea['status'], actor)
+            self.bus.publish({'type': 'idea_added', 'idea_id': idea_id, 'title': idea['title'], 'actor': actor})
+        return idea_id
+
+    def upvote(self, idea_id, actor):
+        with self.lock:
+            if not self.has_idea(idea_id):
+                return None
+            self.ideas_df.at[idea_id, 'upvotes'] += 1
+            upvotes = int(self.ideas_df.at[idea_id, 'upvotes'])
+            self.bus.publish({'type': 'idea_upvoted', 'idea_id': idea_id, 'upvotes': upvotes,
+                              'title': self.ideas_df.at[idea_id, 'title'], 'actor': actor})
+        return upvotes
+
+    def _thread_root(self, idea_id, parent_id):
+        """The top-level comment a reply to parent_id belongs under (None: not a comment on idea_id)"""
+        if parent_id not in self.comments_df.index or self.comments_df.at[parent_id, 'idea_id'] != idea_id:
+            return None
+        root = self.comments_df.at[parent_id, 'parent_id']
+        return parent_id if pd.isna(root) else int(root)
+
+    def add_comment(self, idea_id, username, text, parent_id=None):
+        """Comment on an idea, or reply to one of its comments (replies to replies join the same thread)"""
+        with self.lock:
+            if not self.has_idea(idea_id):
+                return None
+            if parent_id is not None:
+                parent_id = self._thread_root(idea_id, parent_id)
+                if parent_id is None:
+                    return None
+            comment = {
+                'id': next(self.comment_ids),
+                'idea_id': idea_id,
+                'username': username,
+                'comment': text,
+                'date': datetime.now().strftime('%Y-%m-%d'),
+                'likes': 0,
+                'parent_id': parent_id
+            }
+            self._appended['comments'].append(comment)
+            self.threads.add(comment['id'], idea_id, parent_id)
+            self.ideas_df.at[idea_id, 'comments_count'] += 1
+            self.bus.publish({'type': 'comment_added', 'idea_id': idea_id, 'comment_id': comment['id'],
+                              'parent_id': parent_id, 'title': self.ideas_df.at[idea_id, 'title'],
+                              'actor': username})
+        return comment['id']
+
+    def like_comment(self, comment_id, username):
+        """Add username's like to a comment; returns the new count, or None if unknown or already liked"""
+        with self.lock:
+            if comment_id not in self.comments_df.index or (comment_id, username) in self.comment_likes:
+                return None
+            self.comment_likes.add((comment_id, username))
+            self.comments_df.at[comment_id, 'likes'] += 1
+            likes = int(self.comments_df.at[comment_id, 'likes'])
+            idea_id = int(self.comments_df.at[comment_id, 'idea_id'])
+            self.bus.publish({'type': 'comment_liked', 'idea_id': idea_id, 'comment_id': comment_id,
+                              'likes': likes, 'title': self.ideas_df.at[idea_id, 'title'], 'actor': username})
+        return likes
+
+    def set_status(self, idea_id, status, actor, scores=None, comment=None):
+        """Change an idea's status, optionally recording its evaluation scores and comment"""
+        with self.lock:
+            if not self.has_idea(idea_id):
+                return False
+            self.history.append(idea_id, self.ideas_df.at[idea_id, 'status'], status, actor,
+                                score=sum(scores.values()) if scores else None, comment=comment)
+            self.ideas_df.at[idea_id, 'status'] = status
+            if scores:
+                for column, value in scores.items():
+                    self.ideas_df.at[idea_id, column] = value
+                self.ideas_df.at[idea_id, 'total_score'] = sum(scores.values())
+            if status == 'Approved':
+                self._increment_user(self.ideas_df.at[idea_id, 'submitter'], 'ideas_approved')
+            self.bus.publish({'type': 'status_changed', 'idea_id': idea_id, 'status': status,
+                              'title': self.ideas_df.at[idea_id, 'title'], 'actor': actor})
+        return True
+
+    def add_user(self, user, actor):
+        with self.lock:
+            if user['username'] in self.users_df.index:
+                return False
+            user = dict(user, department_id=self.departments.id_for(user['department']) or 0)
+            self.users_df = pd.concat([self.users_df, pd.DataFrame([user], index=[user['username']])])
+            self.bus.publish({'type': 'user_added', 'username': user['username'], 'actor': actor})
+        return True
+
+    def add_option(self, kind, name, actor):
+        """Add a category or department (kind as in dimensions.DIMENSIONS); its id, or None if the name exists"""
+        dimension = self.dimension(kind)
+        with self.lock:
+            if dimension.id_for(name) is not None:
+                return None
+            option_id = dimension.next_id()
+            dimension.set(option_id, name)
+            self.bus.publish({'type': 'option_added', 'dimension': kind, 'option_id': option_id, 'name': name,
+                              'actor': actor})
+        return option_id
+
+    def rename_option(self, kind, option_id, name, actor):
+        """Rename a category or department on every idea or user; False if unknown or the name is taken"""
+        dimension = self.dimension(kind)
+        with self.lock:
+            if option_id not in dimension.names or dimension.id_for(name) is not None:
+                return False
+            dimension.set(option_id, name)
+            self._relabel(kind, option_id, name)
+            self.bus.publish({'type': 'option_renamed', 'dimension': kind, 'option_id': option_id, 'name': name,
+                              'actor': actor})
+        return True
+
+    def _relabel(self, kind, option_id, name):
+        """Write a renamed option's name into the rows referencing it"""
+        table, column, id_column = DIMENSIONS[kind]
+        frame = getattr(self, f'{table}_df')
+        frame.loc[frame[id_column] == option_id, column] = name
+
+    def award_points(self, username, points, level_for):
+        """Add points and recompute the level with level_for(points); returns the new total"""
+        with self.lock:
+            if username not in self.users_df.index:
+                return None
+            self.users_df.at[username, 'points'] += points
+            current_points = int(self.users_df.at[username, 'points'])
+            self.users_df.at[username, 'level'] = level_for(current_points)
+            self.bus.publish({'type': 'points_awarded', 'username': username, 'points': points,
+                              'total': current_points, 'actor': username})
+        return current_points
+
+    def _increment_user(self, username, column):
+        if username in self.users_df.index:
+            self.users_df.at[username, column] += 1
@@ -0,0 +1,166 @@
+# synthetic.py - Deterministic synthetic users, ideas and comments for load testing
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from dimensions import DEFAULT_CATEGORIES, DEFAULT_DEPARTMENTS
+from queries import ALL_STATUSES, hash_password
+from gamification import levels_for
+
+DEPARTMENTS = DEFAULT_DEPARTMENTS
+CATEGORIES = DEFAULT_CATEGORIES
+TAGS = ['AI', 'automation', 'customer service', 'wellness', 'culture', 'retention',
+        'mobile', 'app', 'ecommerce', 'sustainability', 'cost reduction', 'environment',
+        'marketing', 'growth', 'referral', 'security', 'analytics', 'cloud', 'training', 'remote']
+WORDS = ['improve', 'reduce', 'customer', 'process', 'cost', 'team', 'platform', 'data',
+         'automate', 'workflow', 'quality', 'support', 'revenue', 'energy', 'training',
+         'digital', 'feedback', 'onboarding', 'inventory', 'pricing', 'latency', 'report']
+STATUS_WEIGHTS = [0.30, 0.20, 0.20, 0.10, 0.10, 0.10]
+# Status path that ends in each status, and the mean days spent before each step
+STATUS_PATHS = {
+    'New': ['New'],
+    'Under Review': ['New', 'Under Review'],
+    'Approved': ['New', 'Under Review', 'Approved'],
+    'Rejected': ['New', 'Under Review', 'Rejected'],
+    'In Progress': ['New', 'Under Review', 'Approved', 'In Progress'],
+    'Implemented': ['New', 'Under Review', 'Approved', 'In Progress', 'Implemented']
+}
+STEP_MEAN_DAYS = [0, 4, 10, 7, 45]
+
+# Demo accounts are always present so the app can be logged into
+DEMO_USERS = [
+    ('admin', 'admin123', 'IT', 'Admin'),
+    ('john_doe', 'demo123', 'Product', 'Employee'),
+    ('jane_smith', 'demo123', 'Marketing', 'Employee')
+]
+
+def _sentences(rng, n, words_per_row):
+    """n pseudo-sentences built from a small vocabulary"""
+    picks = rng.integers(0, len(WORDS), size=(n, words_per_row))
+    vocab = np.array(WORDS, dtype=object)
+    return [' '.join(row).capitalize() + '.' for row in vocab[picks]]
+
+def generate_users(n_users, seed=0):
+    rng = np.random.default_rng(seed)
+    n_extra = max(n_users - len(DEMO_USERS), 0)
+    usernames = [u[0] for u in DEMO_USERS] + [f"user_{i:07d}" for i in range(n_extra)]
+    # One hash for all generated accounts: hashing millions of passwords is not what's measured here
+    demo_hash = hash_password('demo123')
+    passwords = [hash_password(u[1]) for u in DEMO_USERS] + [demo_hash] * n_extra
+    departments = [u[2] for u in DEMO_USERS] + list(np.array(DEPARTMENTS, dtype=object)[rng.integers(0, len(DEPARTMENTS), n_extra)])
+    roles = [u[3] for u in DEMO_USERS] + ['Employee'] * n_extra
+    today = datetime.now().date()
+    join_offsets = rng.integers(0, 3 * 365, len(usernames))
+    points = rng.integers(0, 6000, len(usernames))
+    points[:len(DEMO_USERS)] = [0, 0, 250]
+    return pd.DataFrame({
+        'username': usernames,
+        'password': passwords,
+        'email': [f"{u}@company.com" for u in usernames],
+        'department': departments,
+        'role': roles,
+        'join_date': [(today - timedelta(days=int(d))).strftime('%Y-%m-%d') for d in join_offsets],
+        'points': points,
+        'level': levels_for(points),
+        'ideas_submitted': 0,
+        'ideas_approved': 0
+    })
+
+def generate_ideas(n_ideas, usernames, seed=0):
+    rng = np.random.default_rng(seed + 1)
+    today = datetime.now().date()
+    statuses = np.array(ALL_STATUSES, dtype=object)[rng.choice(len(ALL_STATUSES), n_ideas, p=STATUS_WEIGHTS)]
+    evaluated = ~np.isin(statuses, ['New', 'Under Review'])
+    scores = rng.integers(1, 11, size=(n_ideas, 4)) * evaluated[:, None]
+    tag_picks = rng.integers(0, len(TAGS), size=(n_ideas, 3))
+    tags = np.array(TAGS, dtype=object)
+    day_offsets = rng.integers(0, 2 * 365, n_ideas)
+    date_strings = {d: (today - timedelta(days=int(d))).strftime('%Y-%m-%d') for d in np.unique(day_offsets)}
+    return pd.DataFrame({
+        'id': np.arange(1, n_ideas + 1),
+        'title': [f"Idea {i}: " + s for i, s in enumerate(_sentences(rng, n_ideas, 4), start=1)],
+        'description': _sentences(rng, n_ideas, 20),
+        'category': np.array(CATEGORIES, dtype=object)[rng.integers(0, len(CATEGORIES), n_ideas)],
+        'problem': _sentences(rng, n_ideas, 15),
+        'solution': _sentences(rng, n_ideas, 15),
+        'benefits': _sentences(rng, n_ideas, 12),
+        'resources': _sentences(rng, n_ideas, 8),
+        'submitter': np.array(usernames, dtype=object)[rng.integers(0, len(usernames), n_ideas)],
+        'submit_date': [date_strings[d] for d in day_offsets],
+        'status': statuses,
+        'upvotes': rng.poisson(8, n_ideas),
+        'comments_count': 0,
+        'impact_score': scores[:, 0],
+        'feasibility_score': scores[:, 1],
+        'innovation_score': scores[:, 2],
+        'strategic_score': scores[:, 3],
+        'total_score': scores.sum(axis=1),
+        'tags': [', '.join(dict.fromkeys(row)) for row in tags[tag_picks]],
+        'cost_savings': rng.integers(0, 20, n_ideas) * 10000,
+        'revenue_impact': rng.integers(0, 20, n_ideas) * 10000
+    })
+
+def generate_comments(n_comments, n_ideas, usernames, seed=0):
+    rng = np.random.default_rng(seed + 2)
+    today = datetime.now().date()
+    day_offsets = rng.integers(0, 2 * 365, n_comments)
+    date_strings = {d: (today - timedelta(days=int(d))).strftime('%Y-%m-%d') for d in np.unique(day_offsets)}
+    return pd.DataFrame({
+        'id': np.arange(1, n_comments + 1),
+        'idea_id': rng.integers(1, n_ideas + 1, n_comments) if n_ideas else np.zeros(n_comments, dtype=int),
+        'username': np.array(usernames, dtype=object)[rng.integers(0, len(usernames), n_comments)],
+        'comment': _sentences(rng, n_comments, 10),
+        'date': [date_strings[d] for d in day_offsets],
+        'likes': rng.poisson(2, n_comments),
+        # All top level: replies only come from the app
+        'parent_id': pd.array([None] * n_comments, dtype='Int64')
+    })
+
+def generate_transitions(ideas_df, reviewer='admin', seed=0):
+    """A status history consistent with each idea's current status, starting at its submit date"""
+    rng = np.random.default_rng(seed + 3)
+    path_lengths = ideas_df['status'].map(lambda s: len(STATUS_PATHS[s])).to_numpy()
+    rows = np.repeat(np.arange(len(ideas_df)), path_lengths)
+    starts = np.cumsum(path_lengths) - path_lengths
+    steps = np.arange(len(rows)) - np.repeat(starts, path_lengths)
+    statuses = ideas_df['status'].to_numpy()[rows]
+    to_status = np.array([STATUS_PATHS[s][k] for s, k in zip(statuses, steps)], dtype=object)
+    from_status = np.where(steps > 0, np.roll(to_status, 1), None)
+
+    # Days after submission: a running sum of per-step delays within each idea
+    delays = rng.exponential(1.0, len(rows)) * np.array(STEP_MEAN_DAYS)[steps]
+    totals = np.cumsum(delays)
+    offsets = totals - np.repeat(totals[starts] - delays[starts], path_lengths)
+    submitted = pd.to_datetime(ideas_df['submit_date']).to_numpy()[rows]
+    now = np.datetime64(datetime.now().replace(microsecond=0))
+    at = np.minimum(submitted + (offsets * 86400).astype('timedelta64[s]'), now)
+    submitters = ideas_df['submitter'].to_numpy()[rows]
+    return pd.DataFrame({
+        'id': np.arange(1, len(rows) + 1),
+        'idea_id': ideas_df['id'].to_numpy()[rows],
+        'from_status': from_status,
+        'to_status': to_status,
+        'actor': np.where(steps == 0, submitters, reviewer),
+        'at': pd.DatetimeIndex(at).strftime('%Y-%m-%d %H:%M:%S')
+    })
+
+def generate_data(n_users, n_ideas, n_comments, seed=0):
+    """Build users, ideas, comments and status-history tables with the same columns as the app's sample data"""
+    users_df = generate_users(n_users, seed)
+    usernames = users_df['username'].tolist()
+    ideas_df = generate_ideas(n_ideas, usernames, seed)
+    comments_df = generate_comments(n_comments, n_ideas, usernames, seed)
+
+    # Keep the denormalized counters consistent with the generated rows
+    comment_counts = comments_df['idea_id'].value_counts()
+    ideas_df['comments_count'] = ideas_df['id'].map(comment_counts).fillna(0).astype(int)
+    submitted = ideas_df['submitter'].value_counts()
+    approved = ideas_df.loc[ideas_df['status'].isin(['Approved', 'In Progress', 'Implemented']), 'submitter'].value_counts()
+    users_df['ideas_submitted'] = users_df['username'].map(submitted).fillna(0).astype(int)
+    users_df['ideas_approved'] = users_df['username'].map(approved).fillna(0).astype(int)
+    transitions_df = generate_transitions(ideas_df, seed=seed)
+    return {'users': users_df, 'ideas': ideas_df, 'comments': comments_df, 'transitions': transitions_df}
+
+def parse_scale(spec):
+    """Parse 'users,ideas,comments' (e.g. '1000,100000,300000') into three ints"""
+    n_users, n_ideas, n_comments = (int(float(part)) for part in spec.split(','))
+    return n_users, n_ideas, n_comments
@@ -0,0 +1,101 @@
+# tags.py - Tag normalization and the tag -> idea-id postings index
+import re
+from bisect import bisect_left, insort
+from collections import Counter
+import pandas as pd
+
+_WHITESPACE = re.compile(r'\s+')
+
+def normalize_tags(raw):
+    """Split a comma-separated tag string into unique, lower-case tags (in input order)"""
+    if not isinstance(raw, str):
+        return []
+    tags = (_WHITESPACE.sub(' ', part).strip().lower() for part in raw.split(','))
+    return list(dict.fromkeys(tag for tag in tags if tag))
+
+def format_tags(tags):
+    return ', '.join(tags)
+
+class TagIndex:
+    """Idea-tag mapping with per-tag postings kept sorted by submit date"""
+
+    def __init__(self):
+        self.idea_tags = {}
+        # tag -> sorted [(submit_date, idea_id), ...]
+        self.postings = {}
+
+    @classmethod
+    def from_ideas(cls, ideas_df):
+        """Parse every idea's tag string once (vectorized: every worker does this at startup)"""
+        index = cls()
+        pairs = pd.DataFrame({
+            'id': ideas_df['id'].to_numpy(),
+            'date': ideas_df['submit_date'].to_numpy(),
+            'tag': ideas_df['tags'].str.split(',').to_numpy()
+        }).explode('tag')
+        pairs['tag'] = pairs['tag'].str.replace(_WHITESPACE.pattern, ' ', regex=True).str.strip().str.lower()
+        pairs = pairs[pairs['tag'].notna() & (pairs['tag'] != '')].drop_duplicates(['id', 'tag'])
+        grouped = {}
+        for idea_id, submit_date, tag in zip(pairs['id'].tolist(), pairs['date'].tolist(), pairs['tag'].tolist()):
+            grouped.setdefault(idea_id, (submit_date, []))[1].append(tag)
+        index.idea_tags = {idea_id: (tuple(tags), submit_date) for idea_id, (submit_date, tags) in grouped.items()}
+        # Postings come out of one table sort instead of an insort per idea
+        pairs = pairs.sort_values(['tag', 'date', 'id'])
+        for idea_id, submit_date, tag in zip(pairs['id'].tolist(), pairs['date'].tolist(), pairs['tag'].tolist()):
+            index.postings.setdefault(tag, []).append((submit_date, idea_id))
+        return index
+
+    def copy(self):
+        index = TagIndex()
+        index.idea_tags = dict(self.idea_tags)
+        index.postings = {tag: list(entries) for tag, entries in self.postings.items()}
+        return index
+
+    def add(self, idea_id, tags, submit_date):
+        self.remove(idea_id)
+        self.idea_tags[idea_id] = (tuple(tags), submit_date)
+        for tag in tags:
+            insort(self.postings.setdefault(tag, []), (submit_date, idea_id))
+
+    def remove(self, idea_id):
+        tags, submit_date = self.idea_tags.pop(idea_id, ((), None))
+        for tag in tags:
+            entries = self.postings[tag]
+            pos = bisect_left(entries, (submit_date, idea_id))
+            if pos < len(entries) and entries[pos] == (submit_date, idea_id):
+                del entries[pos]
+            if not entries:
+                del self.postings[tag]
+
+    def tags_for(self, idea_id):
+        return list(self.idea_tags.get(idea_id, ((), None))[0])
+
+    def ids_for(self, tags, match_all=False):
+        """Ids of ideas carrying any (or all) of the given tags"""
+        id_sets = [{idea_id for _, idea_id in self.postings.get(tag, ())} for tag in tags]
+        if not id_sets:
+            return set()
+        return set.intersection(*id_sets) if match_all else set.union(*id_sets)
+
+    def counts(self):
+        """Number of ideas per tag, most used first"""
+        return Counter({tag: len(entries) for tag, entries in self.postings.items()})
+
+    def options(self):
+        return [tag for tag, _ in self.counts().most_common()]
+
+    def trending(self, since_date, limit=10):
+        """Tags used most by ideas submitted on or after since_date ('YYYY-MM-DD')"""
+        recent = Counter()
+        for tag, entries in self.postings.items():
+            count = len(entries) - bisect_left(entries, (since_date,))
+            if count:
+                recent[tag] = count
+        return recent.most_common(limit)
+
+    def mapping_df(self):
+        """The normalized idea-tag table"""
+        return pd.DataFrame(
+            [(idea_id, tag) for idea_id, (tags, _) in self.idea_tags.items() for tag in tags],
+            columns=['idea_id', 'tag']
+        )
@@ -0,0 +1,87 @@
+# test_api.py - Authentication, caching, paging, quotas and batches of the REST API
+import base64
+import json
+import pytest
+import api
+import sqlstore
+import synthetic
+from ratelimit import RateLimiter
+
+ADMIN = {'authorization': 'Basic ' + base64.b64encode(b'admin:admin123').decode()}
+EMPLOYEE = {'authorization': 'Basic ' + base64.b64encode(b'john_doe:demo123').decode()}
+IDEA = {'title': 'Shared printers', 'description': 'd', 'category': 'Technology', 'problem': 'p',
+        'solution': 's', 'benefits': 'b'}
+
+@pytest.fixture
+def app(tmp_path):
+    data = synthetic.generate_data(20, 200, 50)
+    store = sqlstore.SqliteIdeaStore(str(tmp_path / 'ideas.db'), data['users'], data['ideas'], data['comments'])
+    return api.IdeaApi(store, RateLimiter(quotas={'submit': (100, 60), 'upvote': (3, 60), 'comment': (100, 60)}))
+
+def call(app, method, path, query=None, headers=ADMIN, body=b''):
+    if not isinstance(body, bytes):
+        body = json.dumps(body).encode()
+    return app.handle(method, f'{api.PREFIX}{path}', query or {}, headers, body)
+
+def test_requests_need_valid_credentials(app):
+    assert call(app, 'GET', '/health', headers={})[0] == 200
+    status, _, headers = call(app, 'GET', '/ideas', headers={})
+    assert status == 401 and 'WWW-Authenticate' in headers
+    wrong = {'authorization': 'Basic ' + base64.b64encode(b'admin:wrong').decode()}
+    assert call(app, 'GET', '/ideas', headers=wrong)[0] == 401
+    assert call(app, 'GET', '/ideas', headers={'authorization': 'Basic !!!'})[0] == 401
+    assert call(app, 'GET', '/ideas')[0] == 200
+
+def test_unchanged_data_is_not_modified(app):
+    status, _, headers = call(app, 'GET', '/ideas')
+    etag = headers['ETag']
+    assert call(app, 'GET', '/ideas', headers=dict(ADMIN, **{'if-none-match': etag}))[:2] == (304, None)
+    assert call(app, 'POST', '/ideas/5/votes', headers=EMPLOYEE)[0] == 200
+    status, _, headers = call(app, 'GET', '/ideas', headers=dict(ADMIN, **{'if-none-match': etag}))
+    assert status == 200 and headers['ETag'] != etag
+
+def test_cursor_pages_survive_new_ideas(app):
+    status, first, _ = call(app, 'GET', '/ideas', {'limit': ['30']})
+    seen = [idea['id'] for idea in first['ideas']]
+    assert seen == sorted(seen, reverse=True)
+    assert call(app, 'POST', '/ideas', headers=EMPLOYEE, body=IDEA)[0] == 201
+    cursor = first['next_cursor']
+    while cursor:
+        status, page, _ = call(app, 'GET', '/ideas', {'limit': ['30'], 'cursor': [cursor]})
+        seen += [idea['id'] for idea in page['ideas']]
+        cursor = page['next_cursor']
+    assert seen == sorted(set(seen), reverse=True) and len(seen) == first['total']
+    assert call(app, 'GET', '/ideas', {'cursor': ['not a cursor']})[0] == 400
+
+def test_writes_beyond_the_quota_are_throttled(app):
+    for _ in range(3):
+        assert call(app, 'POST', '/ideas/5/votes', headers=EMPLOYEE)[0] == 200
+    status, payload, headers = call(app, 'POST', '/ideas/5/votes', headers=EMPLOYEE)
+    assert status == 429 and int(headers['Retry-After']) >= 1
+    # Per user
+    assert call(app, 'POST', '/ideas/5/votes')[0] == 200
+
+@pytest.mark.parametrize('path, body', [
+    ('/ideas/5/comments', {'comment': 'hi', 'parent_id': 'x'}),
+    ('/ideas/5/comments', {'comment': 'hi', 'parent_id': True}),
+    ('/ideas/5/comments', {'comment': ['hi']}),
+    ('/ideas', dict(IDEA, category=['Technology'])),
+    ('/ideas', dict(IDEA, tags=['AI', 3])),
+    ('/ideas', dict(IDEA, tags={'AI': 1}))
+])
+def test_malformed_fields_are_client_errors(app, path, body):
+    status, payload, _ = call(app, 'POST', path, body=body)
+    assert status == 400 and 'must be' in payload['error']
+
+def test_batch_parts_fail_alone(app):
+    before = call(app, 'GET', '/ideas/5')[1]['upvotes']
+    status, payload, _ = call(app, 'POST', '/batch', headers=EMPLOYEE, body={'requests': [
+        {'method': 'POST', 'path': f'{api.PREFIX}/ideas/5/votes'},
+        {'method': 'POST', 'path': f'{api.PREFIX}/ideas/5/comments', 'body': {'comment': 'hi', 'parent_id': 'x'}},
+        {'method': 'POST', 'path': f'{api.PREFIX}/ideas', 'body': dict(IDEA, category=['Technology'])},
+        {'method': 'POST', 'path': 5},
+        {'path': f'{api.PREFIX}/ideas/5'}
+    ]})
+    assert status == 200
+    assert [response['status'] for response in payload['responses']] == [200, 400, 400, 400, 200]
+    assert payload['responses'][-1]['body']['upvotes'] == before + 1
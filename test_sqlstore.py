@@ -0,0 +1,59 @@
+# test_sqlstore.py - Replication and compaction of the SQLite-backed store
+import threading
+import pytest
+import sqlstore
+import synthetic
+
+@pytest.fixture
+def data():
+    return synthetic.generate_data(20, 200, 50)
+
+def open_store(path, data=None):
+    if data is None:
+        return sqlstore.SqliteIdeaStore(str(path), None, None, None)
+    return sqlstore.SqliteIdeaStore(str(path), data['users'], data['ideas'], data['comments'])
+
+def test_concurrent_syncs_publish_each_event_once(tmp_path, data):
+    writer = open_store(tmp_path / 'ideas.db', data)
+    reader = open_store(tmp_path / 'ideas.db')
+    upvoted = []
+    reader.bus.subscribe(lambda delta: upvoted.append(delta) if delta['type'] == 'idea_upvoted' else None)
+    before = int(reader.get_idea(5)['upvotes'])
+    stop = threading.Event()
+
+    def keep_syncing():
+        # Yield between syncs (and stop after a while regardless) so the writer isn't starved
+        for _ in range(5000):
+            reader.sync()
+            if stop.wait(0.001):
+                return
+
+    threads = [threading.Thread(target=keep_syncing, daemon=True) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    try:
+        for _ in range(100):
+            writer.upvote(5, 'john_doe')
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join(timeout=30)
+    assert not any(thread.is_alive() for thread in threads)
+    reader.sync()
+    assert len(upvoted) == 100
+    assert int(reader.get_idea(5)['upvotes']) == before + 100
+    assert reader.db_version == writer.db_version
+
+def test_writes_after_compaction_replicate(tmp_path, data):
+    path = tmp_path / 'ideas.db'
+    writer = open_store(path, data)
+    for _ in range(3):
+        writer.upvote(5, 'john_doe')
+    # A worker starting without snapshots writes one at the newest version and compacts every event before it
+    restarted = sqlstore.SqliteIdeaStore(str(path), None, None, None, snapshot_dir=str(tmp_path / 'fresh'))
+    version = restarted.db_version
+    assert restarted.upvote(5, 'john_doe') == int(writer.get_idea(5)['upvotes']) + 1
+    assert restarted.db_version == version + 1
+    writer.sync()
+    assert writer.db_version == version + 1
+    assert int(writer.get_idea(5)['upvotes']) == int(restarted.get_idea(5)['upvotes'])
@@ -0,0 +1,176 @@
+# trending.py - Exponentially decayed engagement scores, updated per event
+"""
+An idea's trending score is the sum of its engagement weights, each halved
+every HALF_LIFE_DAYS since it happened. Decaying every score on every read
+would touch all ideas, so scores are stored relative to a fixed reference
+time t0 instead:
+
+    stored = sum(w * 2 ** ((t - t0) / half_life))
+    score(now) = stored * 2 ** (-(now - t0) / half_life)
+
+All stored values share the same factor at any moment, so they compare
+(and rank) without decaying anything; a vote or comment adds one term.
+
+The stored values live in the leaves of a MaxTree (a tournament tree: every
+inner node holds the larger of its children), so a vote or comment updates
+one leaf and its O(log n) ancestors, and the top K come out of a best-first
+walk from the root in O(K log n) without sorting anything.
+"""
+import heapq
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+HALF_LIFE_DAYS = float(os.environ.get('IDEAS_TRENDING_HALF_LIFE_DAYS', 3))
+WEIGHTS = {'idea_added': 3.0, 'idea_upvoted': 1.0, 'comment_added': 2.0}
+# Rebase before 2 ** exponent gets anywhere near float64's limit
+MAX_EXPONENT = 900
+
+def _seconds(timestamps):
+    return pd.to_datetime(pd.Series(timestamps)).to_numpy(dtype='datetime64[s]').astype(np.int64)
+
+class MaxTree:
+    """Values in slots 0..n-1 with O(log n) updates and best-first iteration"""
+
+    def __init__(self, values=()):
+        values = np.asarray(values, dtype=np.float64)
+        self.capacity = 1
+        while self.capacity < max(len(values), 1):
+            self.capacity *= 2
+        self._build(values)
+
+    def _build(self, values):
+        tree = np.full(2 * self.capacity, -np.inf)
+        tree[self.capacity:self.capacity + len(values)] = values
+        # Inner nodes one level at a time, bottom up
+        level = self.capacity
+        while level > 1:
+            tree[level // 2:level] = np.maximum(tree[level:2 * level:2], tree[level + 1:2 * level:2])
+            level //= 2
+        # A list: single-element reads and writes are much cheaper than on an ndarray
+        self.tree = tree.tolist()
+
+    def values(self):
+        return np.array(self.tree[self.capacity:])
+
+    def get(self, slot):
+        return self.tree[self.capacity + slot]
+
+    def set(self, slot, value):
+        if slot >= self.capacity:
+            values = self.values()
+            self.capacity *= 2
+            self._build(values)
+        tree = self.tree
+        node = self.capacity + slot
+        tree[node] = value
+        node //= 2
+        while node:
+            best = max(tree[2 * node], tree[2 * node + 1])
+            if tree[node] == best:
+                break
+            tree[node] = best
+            node //= 2
+
+    def scale(self, factor):
+        """Multiply every value by a positive factor (order is unchanged)"""
+        self.tree = [value * factor for value in self.tree]
+
+    def top(self, k, keep=None):
+        """Up to k (slot, value) pairs, largest first, skipping slots for which keep(slot) is false"""
+        tree, capacity = self.tree, self.capacity
+        heap = [(-tree[1], 1)]
+        found = []
+        while heap and len(found) < k:
+            value, node = heapq.heappop(heap)
+            if value == np.inf:
+                break
+            if node >= capacity:
+                slot = node - capacity
+                if keep is None or keep(slot):
+                    found.append((slot, -value))
+                continue
+            heapq.heappush(heap, (-tree[2 * node], 2 * node))
+            heapq.heappush(heap, (-tree[2 * node + 1], 2 * node + 1))
+        return found
+
+class TrendingScores:
+    """Decayed engagement score per idea id, kept current by the store's events and ordered in a MaxTree"""
+
+    def __init__(self, store, half_life_days=HALF_LIFE_DAYS):
+        self.store = store
+        self.half_life = half_life_days * 86400
+        self.lock = threading.Lock()
+        self.t0 = time.time()
+        with store.lock:
+            stored = self._seed(store.ideas_df, store.comments_df)
+            self.ids = stored.index.tolist()
+            self.slots = dict(zip(self.ids, range(len(self.ids))))
+            self.index = MaxTree(stored.to_numpy())
+            store.bus.subscribe(self.on_event)
+
+    def _exponent(self, seconds):
+        return (np.asarray(seconds, dtype=np.float64) - self.t0) / self.half_life
+
+    def _seed(self, ideas_df, comments_df):
+        """Submissions, upvotes (dated at submission: votes carry no time) and comments, vectorized"""
+        submitted = np.exp2(self._exponent(_seconds(ideas_df['submit_date'])))
+        stored = pd.Series(submitted * (WEIGHTS['idea_added'] + WEIGHTS['idea_upvoted'] * ideas_df['upvotes'].to_numpy()),
+                           index=ideas_df['id'].to_numpy(dtype=np.int64))
+        if not comments_df.empty:
+            commented = WEIGHTS['comment_added'] * np.exp2(self._exponent(_seconds(comments_df['date'])))
+            per_idea = pd.Series(commented).groupby(comments_df['idea_id'].to_numpy(dtype=np.int64)).sum()
+            stored = stored.add(per_idea.reindex(stored.index, fill_value=0.0), fill_value=0.0)
+        return stored
+
+    def on_event(self, delta):
+        """Bus listener: one O(log n) index update per vote, comment or new idea"""
+        weight = WEIGHTS.get(delta['type'])
+        if weight is not None:
+            self.add(delta['idea_id'], weight)
+
+    def add(self, idea_id, weight, at=None):
+        with self.lock:
+            exponent = self._exponent(at if at is not None else time.time())
+            if exponent > MAX_EXPONENT:
+                self._rebase()
+                exponent = self._exponent(at if at is not None else time.time())
+            slot = self.slots.get(idea_id)
+            if slot is None:
+                slot = self.slots[idea_id] = len(self.ids)
+                self.ids.append(idea_id)
+                self.index.set(slot, 0.0)
+            self.index.set(slot, self.index.get(slot) + weight * float(np.exp2(exponent)))
+
+    def _rebase(self):
+        """Move t0 to now, scaling every stored value by the same factor"""
+        now = time.time()
+        self.index.scale(float(np.exp2(-(now - self.t0) / self.half_life)))
+        self.t0 = now
+
+    def _decay(self, now=None):
+        return float(np.exp2(-self._exponent(now or time.time())))
+
+    def score(self, idea_id, now=None):
+        """Decayed score as of now"""
+        slot = self.slots.get(idea_id)
+        return self.index.get(slot) * self._decay(now) if slot is not None else 0.0
+
+    def scores_for(self, idea_ids):
+        """Stored (comparable, not decayed) values for an array of ids"""
+        with self.lock:
+            return np.array([self.index.get(self.slots[idea_id]) if idea_id in self.slots else 0.0
+                             for idea_id in idea_ids], dtype=np.float64)
+
+    def top(self, k, idea_ids=None):
+        """[(idea id, decayed score), ...] for the k highest scores, optionally only among idea_ids"""
+        keep = None
+        if idea_ids is not None:
+            idea_ids = set(idea_ids)
+            keep = lambda slot: self.ids[slot] in idea_ids
+        with self.lock:
+            found = self.index.top(k, keep)
+            decay = self._decay()
+            return [(self.ids[slot], value * decay) for slot, value in found]
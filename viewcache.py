@@ -0,0 +1,78 @@
+# viewcache.py - Process-wide LRU of Browse Ideas results (filtered, sorted id arrays)
+"""
+Browse Ideas filters and sorts the whole ideas frame on every rerun, and
+sessions with the same filters repeat the same work. ViewCache keeps the
+resulting id arrays keyed by (view, data version), where the view is the
+normalized filter and sort selection, so every session in the process shares
+them until the next write.
+
+Entries are evicted least recently used first once their total size passes
+IDEAS_VIEW_CACHE_MB, and entries for an older data version are dropped as
+soon as a newer one is stored (the version only grows, so they can never hit
+again).
+"""
+import os
+import threading
+from collections import OrderedDict
+
+MAX_BYTES = int(float(os.environ.get('IDEAS_VIEW_CACHE_MB', 64)) * 1024 * 1024)
+# Key, tuple and bookkeeping cost per entry on top of the id array
+ENTRY_OVERHEAD = 512
+
+def view_key(statuses, categories, submitter, tags, sort_by):
+    """Selection order doesn't change the result, so sets are stored sorted"""
+    return (tuple(sorted(statuses)), tuple(sorted(categories)), submitter, tuple(sorted(tags)), sort_by)
+
+class ViewCache:
+    """Memory-bounded LRU of id arrays keyed by (view, data version)"""
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, view, version, compute):
+        """The cached ids for view at version, or compute() them (outside the lock) and store them"""
+        key = (view, version)
+        with self.lock:
+            ids = self.entries.get(key)
+            if ids is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return ids
+            self.misses += 1
+        ids = compute()
+        ids.flags.writeable = False
+        self._put(key, ids)
+        return ids
+
+    def _put(self, key, ids):
+        size = ids.nbytes + ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            version = key[1]
+            if self.version is None or version > self.version:
+                self.version = version
+                for stale in [k for k in self.entries if k[1] < version]:
+                    self._evict(stale)
+            elif version < self.version:
+                # Computed by a session that hadn't seen the newest write yet
+                return
+            if key in self.entries:
+                self._evict(key)
+            self.entries[key] = ids
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._evict(next(iter(self.entries)))
+
+    def _evict(self, key):
+        self.bytes -= self.entries.pop(key).nbytes + ENTRY_OVERHEAD
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'bytes': self.bytes, 'hits': self.hits, 'misses': self.misses}
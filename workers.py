@@ -0,0 +1,41 @@
+# workers.py - Process pools whose workers start without re-running the app script
+"""
+A spawned worker imports its parent's __main__ before it runs any task, so
+that functions defined there can be unpickled. Under `streamlit run`,
+__main__ is App.py: every compute and export worker would build its own
+store, open ideas.db and start the notifier and recommender threads.
+
+The tasks sent to the pools live in importable modules (compute.py,
+exports.py), so process_pool() launches its workers with this module as
+their main module instead. __main__ is swapped only while a worker is being
+launched, under a lock.
+"""
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.context import SpawnContext, SpawnProcess
+
+_launching = threading.Lock()
+
+class WorkerProcess(SpawnProcess):
+    """Spawned process whose main module is this one rather than the parent's __main__"""
+
+    @staticmethod
+    def _Popen(process_obj):
+        this = sys.modules[__name__]
+        with _launching:
+            main = sys.modules['__main__']
+            sys.modules['__main__'] = this
+            try:
+                return SpawnProcess._Popen(process_obj)
+            finally:
+                # Streamlit sets __main__ at the start of every run: keep one set meanwhile
+                if sys.modules['__main__'] is this:
+                    sys.modules['__main__'] = main
+
+class WorkerContext(SpawnContext):
+    Process = WorkerProcess
+
+def process_pool(workers):
+    """ProcessPoolExecutor of clean workers (spawned, not forked: the app process is multi-threaded)"""
+    return ProcessPoolExecutor(workers, mp_context=WorkerContext())